@@ -14,7 +14,8 @@ export default function WithSecureAssessor() {
 
   const fetchHistory = async () => {
     try {
-      const response = await fetch('http://localhost:5000/api/history');
+      // Only web assessments have the shape this view renders.
+      const response = await fetch('http://localhost:5000/api/history?source=web');
       const data = await response.json();
       setHistory(data);
     } catch (error) {
@@ -22,6 +23,17 @@ export default function WithSecureAssessor() {
     }
   };
 
+  const openHistoryItem = async (id) => {
+    try {
+      const response = await fetch(`http://localhost:5000/api/history/${id}`);
+      const item = await response.json();
+      if (!response.ok) throw new Error(item.error || 'Failed to load assessment');
+      setAssessment(item.data);
+    } catch (error) {
+      setError(error.message);
+    }
+  };
+
   const runAssessment = async () => {
     if (!input.trim()) return;
     
@@ -358,12 +370,12 @@ export default function WithSecureAssessor() {
               {history.slice(0, 5).map((item, i) => (
                 <button
                   key={i}
-                  onClick={() => setAssessment(item)}
+                  onClick={() => openHistoryItem(item.id)}
                   className="w-full text-left p-2 bg-slate-700 hover:bg-slate-600 rounded text-sm transition-colors"
                 >
-                  <div className="text-white font-medium">{item.entity?.product_name || 'Unknown'}</div>
+                  <div className="text-white font-medium">{item.product || 'Unknown'}</div>
                   <div className="text-xs text-gray-400">
-                    {item.trust_score?.value}/100 • {new Date(item.timestamp).toLocaleString()}
+                    {item.score ?? '-'}/100 • {new Date(`${item.created_at}Z`).toLocaleString()}
                   </div>
                 </button>
               ))}
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Benchmark facts_for() lookups and print the query plans behind them.
+
+Usage: python scripts/bench_facts.py [--facts 200000] [--products 500]
+
+Populates a throwaway cache database, then times each lookup shape and
+shows SQLite's EXPLAIN QUERY PLAN so regressions to full table scans are
+easy to spot.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from assessor.cache import db  # noqa: E402
+
+SEVERITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+CONTROLS = ["sso_saml", "mfa", "rbac", "audit_logs", "encryption_at_rest"]
+
+
+def populate(total: int, products: int) -> None:
+    content_ids = db.upsert_contents(
+        (f"https://example.com/evidence/{i}", f"page {i}".encode()) for i in range(products)
+    )
+
+    def facts():
+        rng = random.Random(0)
+        for i in range(total):
+            product = rng.randrange(products)
+            if i % 3:
+                claim = "cve"
+                payload = {"id": f"CVE-2024-{i:05d}", "severity": rng.choice(SEVERITIES)}
+            else:
+                claim = "control"
+                payload = {"control": rng.choice(CONTROLS), "present": True}
+            yield {
+                "content_id": content_ids[product],
+                "claim": claim,
+                "parser_id": "bench",
+                "source_type": "vendor",
+                "payload": payload,
+                "snapshot_id": "bench" if i % 2 else None,
+                "product": f"product-{product}",
+            }
+
+    db.record_facts(facts())
+
+
+def explain(sql: str, params) -> str:
+    with db.get_connection(readonly=True) as conn:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return "; ".join(row["detail"] for row in plan)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--facts", type=int, default=200_000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db._DB_PATH = Path(tmp) / "bench.sqlite3"
+        started = time.perf_counter()
+        populate(args.facts, args.products)
+        print(f"inserted {args.facts} facts in {time.perf_counter() - started:.2f}s\n")
+
+        cases = [
+            ("product", {"product": "product-7"}),
+            ("product + claim", {"product": "product-7", "claim": "cve"}),
+            ("product + claim + snapshot", {"product": "product-7", "claim": "cve", "snapshot": "bench"}),
+            ("product + severity", {"product": "product-7", "severity": "critical"}),
+            ("cve_id", {"cve_id": "CVE-2024-00010"}),
+            ("control", {"control": "mfa", "product": "product-7"}),
+        ]
+        for label, filters in cases:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                found = db.facts_for(**filters)
+            elapsed = (time.perf_counter() - started) / args.repeat * 1000
+            print(f"{label:<28} {len(found):>5} rows  {elapsed:8.3f} ms/query")
+
+        print("\nquery plans:")
+        plans = [
+            ("product + claim", "SELECT id FROM facts WHERE product = ? AND claim = ?", ("p", "cve")),
+            ("product + severity", "SELECT id FROM facts WHERE product = ? AND severity = ?", ("p", "HIGH")),
+            ("cve_id", "SELECT id FROM facts WHERE cve_id = ?", ("CVE-2024-00010",)),
+            ("control", "SELECT id FROM facts WHERE control = ?", ("mfa",)),
+            ("content_id", "SELECT id FROM facts WHERE content_id = ?", (1,)),
+        ]
+        for label, sql, params in plans:
+            print(f"  {label:<20} {explain(sql, params)}")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
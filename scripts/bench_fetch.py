@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Measure fetch-pipeline throughput and tail latency against a stand-in upstream.
+
+Usage: python scripts/bench_fetch.py [--cassette upstream.json] [--requests 300]
+       [--concurrency 16] [--latency 0.05] [--sigma 0.6] [--error-rate 0.02]
+       [--rate-limit 100/1] [--client-limits]
+
+Starts scripts/standin_server.py's server in-process, replaying the given
+cassette (by default one built from the test fixtures: KEV catalog, an NVD
+page and a vendor homepage), and points the shared HTTP clients at it. The
+KEV, NVD and vendor-posture fetchers are then run round-robin against a
+throwaway cache with freshness disabled, so every call revalidates through
+the rate limiter, retries, breakers and single-flight like a cold worker.
+Client-side host budgets are lifted unless --client-limits is given; use
+--rate-limit to have the server throttle instead.
+"""
+import argparse
+import asyncio
+import math
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from assessor.cache import db  # noqa: E402
+from assessor.config.settings import Config  # noqa: E402
+from assessor.fetchers import cisa_kev, nvd, vendor_psirt  # noqa: E402
+from assessor.fetchers.revalidate import collect_stale  # noqa: E402
+from assessor.utils.breaker import breakers  # noqa: E402
+from assessor.utils.cassette import Cassette  # noqa: E402
+from assessor.utils.http import run_sync  # noqa: E402
+from assessor.utils.standin import StandInServer, UpstreamProfile  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parents[1] / "tests" / "fixtures"
+PRODUCT = "peazip"
+HOMEPAGE = "https://vendor.example/"
+
+
+def fixture_cassette() -> Cassette:
+    cassette = Cassette()
+    json_headers = [("Content-Type", "application/json"), ("ETag", '"fixture"')]
+    cassette.record("GET", cisa_kev._API_URL, 200, json_headers,
+                    (FIXTURES / "api" / "cisa_kev_sample.json").read_bytes())
+    cassette.record("GET", nvd._build_query_url(PRODUCT), 200, json_headers,
+                    (FIXTURES / "api" / "nvd_cve_sample.json").read_bytes())
+    page = (FIXTURES / "html" / "sample_vendor_page.html").read_bytes()
+    html_headers = [("Content-Type", "text/html"), ("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")]
+    cassette.record("GET", HOMEPAGE, 200, html_headers, page)
+    cassette.record("GET", f"{HOMEPAGE}security", 200, html_headers, page)
+    return cassette
+
+
+SOURCES = {
+    "cisa_kev": lambda: cisa_kev.fetch_kev_index(),
+    "nvd_cves": lambda: nvd.fetch_cves(PRODUCT),
+    "vendor_posture": lambda: vendor_psirt.fetch_vendor_posture(HOMEPAGE, "Vendor"),
+}
+
+
+async def run(requests: int, concurrency: int):
+    latencies = defaultdict(list)
+    errors = defaultdict(Counter)
+    stale = Counter()
+    names = list(SOURCES)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        name = names[i % len(names)]
+        async with gate:
+            started = time.perf_counter()
+            with collect_stale() as served:
+                try:
+                    await SOURCES[name]()
+                except Exception as exc:
+                    errors[name][type(exc).__name__] += 1
+            latencies[name].append(time.perf_counter() - started)
+            stale[name] += bool(served)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - started, latencies, errors, stale
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def rate_limit(value: str):
+    count, _, seconds = value.partition("/")
+    return int(count), float(seconds or 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", type=Path)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--sigma", type=float, default=0.6)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--rate-limit", type=rate_limit)
+    parser.add_argument("--client-limits", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cassette = Cassette.load(args.cassette) if args.cassette else fixture_cassette()
+    profile = UpstreamProfile(args.latency, args.sigma, args.error_rate, args.rate_limit, args.seed)
+    # Every call goes upstream: nothing is fresh and nothing is served stale-while-revalidate.
+    Config.EVIDENCE_CACHE_TTL = -1
+    Config.STALE_WHILE_REVALIDATE = 0
+    if not args.client_limits:
+        Config.HOST_RATE_LIMITS = {}
+
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(cassette, profile) as server:
+        db._DB_PATH = Path(tmp) / "bench.sqlite3"
+        Config.HTTP_STANDIN_URL = server.url
+        breakers.reset()
+        elapsed, latencies, errors, stale = run_sync(run(args.requests, args.concurrency))
+
+    print(f"{args.requests} fetches, concurrency {args.concurrency}: "
+          f"{elapsed:.2f}s, {args.requests / elapsed:.1f} fetches/s")
+    print(f"{'source':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+          f"{'stale':>7}  errors")
+    for name, values in latencies.items():
+        ms = [value * 1000 for value in values]
+        print(f"{name:<16}{len(ms):>6}{percentile(ms, 0.5):>10.1f}{percentile(ms, 0.95):>10.1f}"
+              f"{percentile(ms, 0.99):>10.1f}{max(ms):>10.1f}{stale[name]:>7}  "
+              f"{dict(errors[name]) or '-'}")
+    print(f"upstream responses: {dict(sorted(server.statuses.items()))}")
+    print(f"breakers: {[(b['name'], b['state']) for b in breakers.states()]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Compare the streaming HTML text extractor with the BeautifulSoup path.
+
+Usage: python scripts/bench_html_text.py [page.html ...] [--repeat 50] [--inflate 200]
+
+Defaults to the recorded vendor page in tests/fixtures/html. Each page is
+also benchmarked inflated (body repeated --inflate times) to approximate a
+large marketing homepage. Reports time per page and peak allocation.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from assessor.fetchers.vendor_psirt import _HOMEPAGE_KEYWORDS  # noqa: E402
+from assessor.parsers.html_text import match_keywords  # noqa: E402
+
+DEFAULT_PAGE = ROOT / "tests/fixtures/html/sample_vendor_page.html"
+CHUNK = 16 * 1024
+
+
+def bs4_signals(html: str) -> set:
+    text = BeautifulSoup(html, "html.parser").get_text().lower()
+    return {name for name, phrases in _HOMEPAGE_KEYWORDS.items() if any(p in text for p in phrases)}
+
+
+def streaming_signals(html: str) -> set:
+    chunks = (html[i : i + CHUNK] for i in range(0, len(html), CHUNK))
+    return match_keywords(chunks, _HOMEPAGE_KEYWORDS)
+
+
+def measure(func, html: str, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func(html)
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pages", nargs="*", type=Path, default=[DEFAULT_PAGE])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--inflate", type=int, default=200)
+    args = parser.parse_args()
+
+    for page in args.pages:
+        html = page.read_text(encoding="utf-8", errors="replace")
+        variants = [(page.name, html)]
+        if args.inflate > 1:
+            head, sep, rest = html.partition("<body")
+            body = sep + rest
+            variants.append((f"{page.name} x{args.inflate}", head + body * args.inflate))
+        for label, text in variants:
+            print(f"{label} ({len(text) / 1024:.0f} KiB)")
+            expected = None
+            for name, func in (("beautifulsoup", bs4_signals), ("streaming", streaming_signals)):
+                signals, ms, peak = measure(func, text, args.repeat)
+                expected = signals if expected is None else expected
+                flag = "" if signals == expected else "  (signals differ)"
+                print(f"  {name:<14} {ms:9.3f} ms  peak {peak / 1024:9.1f} KiB{flag}")
+
+
+if __name__ == "__main__":
+    main()
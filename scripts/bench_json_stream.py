@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Compare peak memory of whole-document and streaming feed parsing.
+
+Usage: python scripts/bench_json_stream.py [--cves 2000] [--kev 1200] [--repeat 3]
+
+Builds a synthetic NVD 2.0 result page and KEV catalog, then aggregates
+severities / indexes the catalog both ways: json.loads + normalize (the
+old path) and the incremental parser over the raw bytes and over a
+zlib-compressed cache blob. Peak allocation is measured with tracemalloc.
+The repeated-hit case reads the CVEs of a page already held by the
+memory tier, once kept as a normalized list and once streamed from its
+blob (pages over ``nvd._MATERIALIZE_MAX_BYTES``).
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import zlib
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from assessor.cache.blobs import CODEC_ZLIB, LazyBlob  # noqa: E402
+from assessor.fetchers import cisa_kev, nvd  # noqa: E402
+
+SEVERITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+
+def nvd_page(total: int) -> bytes:
+    vulnerabilities = []
+    for i in range(total):
+        vulnerabilities.append({
+            "cve": {
+                "id": f"CVE-2024-{i:05d}",
+                "published": "2024-01-01T00:00:00.000",
+                "lastModified": "2024-02-01T00:00:00.000",
+                "descriptions": [{"lang": "en", "value": "Improper input validation " * 12}],
+                "metrics": {"cvssMetricV31": [{
+                    "type": "Primary",
+                    "cvssData": {"baseScore": 7.5, "baseSeverity": SEVERITIES[i % 4],
+                                 "vectorString": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:N/A:N"},
+                }]},
+                "references": [{"url": f"https://example.com/advisory/{i}/{n}"} for n in range(6)],
+                "configurations": [{"nodes": [{"cpeMatch": [
+                    {"vulnerable": True, "criteria": f"cpe:2.3:a:vendor{i % 50}:product{i}:*:*:*:*:*:*:*:*"}
+                ]}]}],
+            }
+        })
+    return json.dumps({"resultsPerPage": total, "startIndex": 0, "totalResults": total,
+                       "format": "NVD_CVE", "version": "2.0",
+                       "vulnerabilities": vulnerabilities}).encode()
+
+
+def kev_catalog(total: int) -> bytes:
+    return json.dumps({"title": "CISA KEV", "catalogVersion": "bench",
+                       "count": total, "vulnerabilities": [
+                           {"cveID": f"CVE-2023-{i:05d}", "vendorProject": f"Vendor {i % 80}",
+                            "product": f"Product {i}", "vulnerabilityName": "Remote code execution " * 3,
+                            "dateAdded": "2023-05-01", "dueDate": "2023-05-22",
+                            "shortDescription": "Allows a remote attacker to execute code. " * 5,
+                            "requiredAction": "Apply mitigations per vendor instructions.",
+                            "knownRansomwareCampaignUse": "Known" if i % 7 == 0 else "Unknown",
+                            "notes": f"https://example.com/kev/{i}", "cwes": ["CWE-20"]}
+                           for i in range(total)]}).encode()
+
+
+def blob(raw: bytes, compressed: bytes) -> LazyBlob:
+    return LazyBlob("bench", CODEC_ZLIB, len(raw), compressed)
+
+
+def measure(func, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cves", type=int, default=2000)
+    parser.add_argument("--kev", type=int, default=1200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    page = nvd_page(args.cves)
+    catalog = kev_catalog(args.kev)
+    page_blob, catalog_blob = zlib.compress(page), zlib.compress(catalog)
+
+    kept_page = nvd._Page(page)
+    streamed_page = nvd._Page(blob(page, page_blob))
+    streamed_page._cves, streamed_page._raw = None, blob(page, page_blob)
+
+    def kev_index(build):
+        cisa_kev.KevIndex._by_version.clear()
+        return len(build().ids)
+
+    cases = [
+        (f"NVD page, {args.cves} CVEs ({len(page) / 1e6:.1f} MB)", [
+            ("json.loads + normalize", lambda: Counter(
+                c["severity"] for c in nvd._normalize_items(json.loads(page)))),
+            ("stream bytes", lambda: Counter(c["severity"] for c in nvd.iter_normalized(page))),
+            ("stream zlib blob", lambda: Counter(
+                c["severity"] for c in nvd.iter_normalized(blob(page, page_blob)))),
+        ]),
+        (f"NVD page memory-tier hit, {args.cves} CVEs", [
+            ("normalized list", lambda: Counter(c["severity"] for c in kept_page.cves())),
+            ("stream zlib blob", lambda: Counter(c["severity"] for c in streamed_page.cves())),
+        ]),
+        (f"KEV catalog, {args.kev} entries ({len(catalog) / 1e6:.1f} MB)", [
+            ("json.loads + index", lambda: kev_index(
+                lambda: cisa_kev.KevIndex.from_payload(json.loads(catalog)))),
+            ("stream bytes", lambda: kev_index(lambda: cisa_kev.KevIndex.from_body(catalog))),
+            ("stream zlib blob", lambda: kev_index(
+                lambda: cisa_kev.KevIndex.from_body(blob(catalog, catalog_blob)))),
+        ]),
+    ]
+    for title, variants in cases:
+        print(title)
+        for name, func in variants:
+            ms, peak = measure(func, args.repeat)
+            print(f"  {name:<24} {ms:9.1f} ms  peak {peak / 1e6:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
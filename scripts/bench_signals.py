@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Time the single-pass control/compliance matcher against per-pattern searches.
+
+Usage: python scripts/bench_signals.py [--kib 300] [--repeat 20]
+
+Builds a trust-center-sized document of filler text with a few signal
+phrases near the end (the worst case for early exit) and times
+parse_controls_from_text / parse_compliance_from_text against the old
+approach: lower-case the text, then one re.search per pattern.
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from assessor.parsers import compliance, controls  # noqa: E402
+
+FILLER = "Our platform helps teams collaborate on documents and ship work faster. "
+TAIL = " We support SAML single sign-on, keep audit logs and hold an ISO 27001 certificate."
+
+
+def per_pattern(patterns, text: str):
+    text_lower = text.lower()
+    return {
+        name: any(re.search(p, text_lower) for p in signal_patterns)
+        for name, signal_patterns in patterns.items()
+    }
+
+
+def measure(func, text: str, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func(text)
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kib", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    text = FILLER * (args.kib * 1024 // len(FILLER)) + TAIL
+    print(f"document: {len(text) / 1024:.0f} KiB")
+    for label, patterns, parse in (
+        ("controls", controls._CONTROL_PATTERNS, controls.parse_controls_from_text),
+        ("compliance", compliance._COMPLIANCE_PATTERNS, compliance.parse_compliance_from_text),
+    ):
+        old, old_ms = measure(lambda t: per_pattern(patterns, t), text, args.repeat)
+        new, new_ms = measure(parse, text, args.repeat)
+        flag = "" if old == new else "  (results differ)"
+        print(f"  {label:<11} per-pattern {old_ms:7.2f} ms  single-pass {new_ms:7.2f} ms"
+              f"  x{old_ms / new_ms:.1f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
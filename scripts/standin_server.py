@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Serve a recorded cassette as a slow, flaky, rate-limited stand-in upstream.
+
+Usage: python scripts/standin_server.py CASSETTE [--port 8765] [--latency 0.2]
+       [--sigma 0.6] [--error-rate 0.02] [--rate-limit 50/30] [--seed 0]
+
+Record a cassette first by running any command with
+ASSESSOR_HTTP_CASSETTE=path.json ASSESSOR_HTTP_CASSETTE_MODE=record, then
+point runs at this server with ASSESSOR_HTTP_STANDIN=<printed url>.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from assessor.utils.cassette import Cassette  # noqa: E402
+from assessor.utils.standin import StandInServer, UpstreamProfile  # noqa: E402
+
+
+def rate_limit(value: str):
+    requests, _, seconds = value.partition("/")
+    return int(requests), float(seconds or 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette", type=Path)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="median seconds per response")
+    parser.add_argument("--sigma", type=float, default=0.0, help="log-normal spread of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=rate_limit, help="REQUESTS/SECONDS per upstream host")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    cassette = Cassette.load(args.cassette)
+    profile = UpstreamProfile(args.latency, args.sigma, args.error_rate, args.rate_limit, args.seed)
+    server = StandInServer(cassette, profile, host=args.host, port=args.port)
+    print(f"replaying {len(cassette)} exchanges from {args.cassette}")
+    print(f"export ASSESSOR_HTTP_STANDIN={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(dict(server.statuses))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import json
+from typing import Any, Dict, Iterable, List, Set
+
+from .db import get_connection
+
+
+def _cve_aliases(advisory: Dict[str, Any]) -> Set[str]:
+    aliases = {advisory["cve_id"]} if advisory.get("cve_id") else set()
+    for identifier in advisory.get("identifiers") or []:
+        if identifier.get("type") == "CVE" and identifier.get("value"):
+            aliases.add(identifier["value"])
+    return aliases
+
+
+def store_advisories(advisories: Iterable[Dict[str, Any]]) -> int:
+    """Index raw GitHub advisories by their CVE aliases in one transaction.
+
+    An advisory already stored with the same or a later ``updated_at`` is
+    left alone, so replaying pages is cheap. Returns the number of
+    advisories written.
+    """
+    count = 0
+    with get_connection() as conn:
+        for advisory in advisories:
+            ghsa_id = advisory.get("ghsa_id")
+            if not ghsa_id:
+                continue
+            cursor = conn.execute(
+                """
+                INSERT INTO ghsa_advisories (ghsa_id, updated_at, data)
+                VALUES (?, ?, ?)
+                ON CONFLICT(ghsa_id) DO UPDATE SET
+                    updated_at=excluded.updated_at,
+                    data=excluded.data
+                WHERE ghsa_advisories.updated_at IS NULL
+                   OR excluded.updated_at > ghsa_advisories.updated_at
+                """,
+                (ghsa_id, advisory.get("updated_at"), json.dumps(advisory)),
+            )
+            if not cursor.rowcount:
+                continue
+            conn.execute("DELETE FROM ghsa_aliases WHERE ghsa_id = ?", (ghsa_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO ghsa_aliases (cve_id, ghsa_id) VALUES (?, ?)",
+                [(cve_id, ghsa_id) for cve_id in _cve_aliases(advisory)],
+            )
+            count += 1
+    return count
+
+
+def advisories_for_cves(cve_ids: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Indexed advisories keyed by each of ``cve_ids`` that has any."""
+    ids = sorted({cve_id for cve_id in cve_ids if cve_id})
+    if not ids:
+        return {}
+    with get_connection(readonly=True) as conn:
+        rows = conn.execute(
+            """
+            SELECT ghsa_aliases.cve_id, ghsa_advisories.data
+            FROM ghsa_aliases JOIN ghsa_advisories USING (ghsa_id)
+            WHERE ghsa_aliases.cve_id IN (SELECT value FROM json_each(?))
+            ORDER BY ghsa_aliases.cve_id, ghsa_aliases.ghsa_id
+            """,
+            (json.dumps(ids),),
+        ).fetchall()
+    found: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        found.setdefault(row["cve_id"], []).append(json.loads(row["data"]))
+    return found
@@ -0,0 +1,203 @@
+"""Awaitable wrappers around the blocking cache API.
+
+SQLite calls (and the decoding done by ``get_cached_*``) run on dedicated
+thread pools so the event loop keeps driving network I/O meanwhile. Reads
+get a small pool, each thread with its own reader connection; writes go
+through a single thread, since the connection manager serialises them on
+one writer anyway and a queue is cheaper than contending for its lock.
+Fetched bodies are queued on the shared :class:`~.writer.BackgroundWriter`
+instead, so bodies stored by concurrent fetches share one transaction.
+"""
+import asyncio
+import atexit
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from . import advisories, db, leases, mirror, throttle
+from .writer import get_writer
+
+_READ_WORKERS = 4
+
+_lock = threading.Lock()
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_pid = os.getpid()
+
+
+def _executor(kind: str) -> ThreadPoolExecutor:
+    global _pid
+    with _lock:
+        if _pid != os.getpid():
+            # Worker threads do not survive fork; start fresh pools.
+            _executors.clear()
+            _pid = os.getpid()
+        executor = _executors.get(kind)
+        if executor is None:
+            workers = 1 if kind == "write" else _READ_WORKERS
+            executor = ThreadPoolExecutor(workers, thread_name_prefix=f"cache-{kind}")
+            _executors[kind] = executor
+        return executor
+
+
+async def _run(kind: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(kind), functools.partial(func, *args, **kwargs))
+
+
+async def get_cached_content(
+    url: str,
+    max_age_seconds: Optional[int] = None,
+    snapshot_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    return await _run(
+        "read", db.get_cached_content, url, max_age_seconds=max_age_seconds, snapshot_id=snapshot_id
+    )
+
+
+async def get_cached_entry(
+    url: str,
+    decode: Callable[[Any], Any],
+    max_age_seconds: Optional[int] = None,
+    snapshot_id: Optional[str] = None,
+) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    return await _run(
+        "read",
+        db.get_cached_entry,
+        url,
+        decode,
+        max_age_seconds=max_age_seconds,
+        snapshot_id=snapshot_id,
+    )
+
+
+async def reload_cached_entry(
+    url: str,
+    decode: Callable[[Any], Any],
+    snapshot_id: Optional[str] = None,
+) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    return await _run("read", db.reload_cached_entry, url, decode, snapshot_id=snapshot_id)
+
+
+async def get_cached_payload(
+    url: str,
+    decode: Callable[[Any], Any],
+    max_age_seconds: Optional[int] = None,
+    snapshot_id: Optional[str] = None,
+) -> Optional[Any]:
+    return await _run(
+        "read",
+        db.get_cached_payload,
+        url,
+        decode,
+        max_age_seconds=max_age_seconds,
+        snapshot_id=snapshot_id,
+    )
+
+
+async def upsert_content(
+    url: str,
+    raw: bytes,
+    snapshot_id: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None,
+) -> int:
+    future = get_writer().queue_content(url, raw, snapshot_id=snapshot_id, headers=headers)
+    return await asyncio.wrap_future(future)
+
+
+async def touch_content(
+    url: str,
+    headers: Optional[Mapping[str, str]] = None,
+    snapshot_id: Optional[str] = None,
+) -> None:
+    await _run("write", db.touch_content, url, headers=headers, snapshot_id=snapshot_id)
+
+
+async def record_fact(
+    content_id: int,
+    claim: str,
+    parser_id: str,
+    source_type: str,
+    payload: Dict[str, Any],
+    snapshot_id: Optional[str] = None,
+    product: Optional[str] = None,
+) -> int:
+    return await _run(
+        "write",
+        db.record_fact,
+        content_id,
+        claim,
+        parser_id,
+        source_type,
+        payload,
+        snapshot_id=snapshot_id,
+        product=product,
+    )
+
+
+async def facts_for(product: Optional[str] = None, **filters: Any) -> List[Dict[str, Any]]:
+    return await _run("read", db.facts_for, product, **filters)
+
+
+async def store_cves(records: List[mirror.CveRecord]) -> int:
+    return await _run("write", mirror.store_cves, records)
+
+
+async def search_cves(
+    product: str,
+    vendor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    return await _run("read", mirror.search_cves, product, vendor=vendor, limit=limit)
+
+
+async def get_sync_state(feed: str = mirror.NVD_FEED) -> Optional[str]:
+    return await _run("read", mirror.get_sync_state, feed)
+
+
+async def get_synced_at(feed: str = mirror.NVD_FEED) -> Optional[str]:
+    return await _run("read", mirror.get_synced_at, feed)
+
+
+async def set_sync_state(last_modified: str, feed: str = mirror.NVD_FEED) -> None:
+    await _run("write", mirror.set_sync_state, last_modified, feed)
+
+
+async def store_advisories(items: List[Dict[str, Any]]) -> int:
+    return await _run("write", advisories.store_advisories, items)
+
+
+async def advisories_for_cves(cve_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    return await _run("read", advisories.advisories_for_cves, cve_ids)
+
+
+async def reserve_token(host: str, capacity: float, rate: float) -> float:
+    return await _run("write", throttle.reserve, host, capacity, rate)
+
+
+async def block_host(host: str, until: float) -> None:
+    await _run("write", throttle.block, host, until)
+
+
+async def acquire_lease(key: str, owner: str, ttl: float) -> bool:
+    return await _run("write", leases.acquire, key, owner, ttl)
+
+
+async def release_lease(key: str, owner: str) -> None:
+    await _run("write", leases.release, key, owner)
+
+
+async def lease_holder(key: str) -> Optional[str]:
+    return await _run("read", leases.holder, key)
+
+
+def shutdown() -> None:
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+atexit.register(shutdown)
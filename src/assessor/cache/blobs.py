@@ -0,0 +1,145 @@
+import sqlite3
+import zlib
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+CODEC_IDENTITY = "identity"
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+# Bodies smaller than this are not worth the codec overhead.
+_MIN_COMPRESS_SIZE = 512
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 3
+_CHUNK_SIZE = 64 * 1024
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def compress(raw: bytes) -> Tuple[str, bytes]:
+    """Compress ``raw`` with the best available codec.
+
+    Returns ``(codec, data)``; falls back to ``identity`` when compression
+    does not shrink the payload.
+    """
+    if len(raw) < _MIN_COMPRESS_SIZE:
+        return CODEC_IDENTITY, raw
+    if zstandard is not None:
+        codec, data = CODEC_ZSTD, zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    else:
+        codec, data = CODEC_ZLIB, zlib.compress(raw, _ZLIB_LEVEL)
+    if len(data) >= len(raw):
+        return CODEC_IDENTITY, raw
+    return codec, data
+
+
+def decompress(codec: str, data: BytesLike) -> BytesLike:
+    if codec == CODEC_IDENTITY:
+        return data
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("blob is zstd-compressed but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"unknown blob codec: {codec}")
+
+
+class LazyBlob:
+    """A stored body that is decompressed on first access."""
+
+    __slots__ = ("sha256", "codec", "size", "_data", "_raw")
+
+    def __init__(self, sha256: str, codec: str, size: int, data: BytesLike):
+        self.sha256 = sha256
+        self.codec = codec
+        self.size = size
+        self._data = data
+        self._raw: Optional[BytesLike] = None
+
+    def read(self) -> BytesLike:
+        if self._raw is None:
+            self._raw = decompress(self.codec, self._data)
+            self._data = None
+        return self._raw
+
+    def iter_chunks(self, size: int = _CHUNK_SIZE) -> Iterator[BytesLike]:
+        """Yield the body in pieces without holding all of it decompressed.
+
+        Identity blobs are sliced in place (zero-copy over a memory-mapped
+        bundle); compressed ones are inflated into pieces of at most
+        ``size`` bytes. A body already read is sliced from memory.
+        """
+        if self._raw is not None:
+            codec, data = CODEC_IDENTITY, self._raw
+        else:
+            codec, data = self.codec, self._data
+        view = memoryview(data)
+        if codec == CODEC_IDENTITY:
+            for start in range(0, len(view), size):
+                yield view[start:start + size]
+            return
+        if codec == CODEC_ZLIB:
+            inflater = zlib.decompressobj()
+            for start in range(0, len(view), size):
+                pending = view[start:start + size]
+                while pending:
+                    piece = inflater.decompress(pending, size)
+                    pending = inflater.unconsumed_tail
+                    if piece:
+                        yield piece
+            tail = inflater.flush()
+            if tail:
+                yield tail
+            return
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("blob is zstd-compressed but 'zstandard' is not installed")
+            yield from zstandard.ZstdDecompressor().read_to_iter(
+                view, read_size=size, write_size=size
+            )
+            return
+        raise ValueError(f"unknown blob codec: {codec}")
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.read())
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"LazyBlob(sha256={self.sha256[:12]}, codec={self.codec}, size={self.size})"
+
+
+def put_blobs(conn: sqlite3.Connection, bodies: Dict[str, bytes]) -> None:
+    """Store each ``sha256 -> raw`` body that is not already present.
+
+    Existing blobs are looked up first so duplicates are never recompressed.
+    """
+    if not bodies:
+        return
+    placeholders = ",".join("?" * len(bodies))
+    existing = {
+        row[0]
+        for row in conn.execute(
+            f"SELECT sha256 FROM blobs WHERE sha256 IN ({placeholders})", list(bodies)
+        )
+    }
+    rows = []
+    for sha256, raw in bodies.items():
+        if sha256 not in existing:
+            codec, data = compress(raw)
+            rows.append((sha256, codec, len(raw), data))
+    conn.executemany(
+        "INSERT OR IGNORE INTO blobs (sha256, codec, size, data) VALUES (?, ?, ?, ?)",
+        rows,
+    )
+
+
+def put_blob(conn: sqlite3.Connection, sha256: str, raw: bytes) -> None:
+    """Store ``raw`` under ``sha256`` unless an identical blob already exists."""
+    put_blobs(conn, {sha256: raw})
@@ -0,0 +1,117 @@
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .blobs import LazyBlob
+
+# Layout: MAGIC | header length (u64 LE) | JSON header | blob data.
+# The header indexes every URL to an (offset, length) slice of the data
+# region, so a lookup is one dict access plus a memoryview slice.
+MAGIC = b"ASRBNDL1"
+_PREAMBLE = struct.Struct("<8sQ")
+
+
+class BundleError(ValueError):
+    pass
+
+
+def write_bundle(
+    path: Path,
+    meta: Dict[str, Any],
+    rows: Iterable[Dict[str, Any]],
+    blobs: Iterable[Tuple[str, str, int, bytes]],
+    facts: List[Dict[str, Any]],
+) -> Path:
+    """Write an immutable bundle file atomically.
+
+    ``rows`` are content rows (without bodies), ``blobs`` are
+    ``(sha256, codec, size, data)`` tuples as stored in the ``blobs`` table.
+    Blobs are written once each, in their stored encoding.
+    """
+    path = Path(path)
+    offsets: Dict[str, Dict[str, Any]] = {}
+    chunks: List[bytes] = []
+    position = 0
+    for sha256, codec, size, data in blobs:
+        if sha256 in offsets:
+            continue
+        data = bytes(data)
+        offsets[sha256] = {"offset": position, "length": len(data), "codec": codec, "size": size}
+        chunks.append(data)
+        position += len(data)
+
+    entries = {}
+    for row in rows:
+        entry = dict(row)
+        entry.update(offsets[row["sha256"]])
+        entries[row["url"]] = entry
+
+    header = json.dumps(
+        {**meta, "entries": entries, "facts": facts}, separators=(",", ":")
+    ).encode("utf-8")
+
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as handle:
+        handle.write(_PREAMBLE.pack(MAGIC, len(header)))
+        handle.write(header)
+        for chunk in chunks:
+            handle.write(chunk)
+    os.chmod(tmp, 0o444)
+    os.replace(tmp, path)
+    return path
+
+
+class Bundle:
+    """Read-only, memory-mapped view of a snapshot bundle.
+
+    Bodies are returned as :class:`LazyBlob` objects over slices of the
+    map, so nothing is copied until a caller decodes them, and processes
+    that open the same file share its pages.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _PREAMBLE.size:
+            raise BundleError(f"{self.path} is not a snapshot bundle")
+        magic, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise BundleError(f"{self.path} is not a snapshot bundle")
+        self._data_start = _PREAMBLE.size + header_length
+        header = json.loads(self._mmap[_PREAMBLE.size : self._data_start])
+        self._view = memoryview(self._mmap)
+        self.entries: Dict[str, Dict[str, Any]] = header.pop("entries")
+        self.facts: List[Dict[str, Any]] = header.pop("facts")
+        self.meta = header
+        self.snapshot_id: str = header["snapshot_id"]
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        row = {
+            key: value
+            for key, value in entry.items()
+            if key not in ("offset", "length", "codec", "size")
+        }
+        start = self._data_start + entry["offset"]
+        row["raw"] = LazyBlob(
+            entry["sha256"],
+            entry["codec"],
+            entry["size"],
+            self._view[start : start + entry["length"]],
+        )
+        return row
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # Bodies handed out earlier still reference the map; it is
+            # unmapped once they are garbage collected.
+            pass
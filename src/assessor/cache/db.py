@@ -1,60 +1,436 @@
+import atexit
 import hashlib
 import json
+import os
 import sqlite3
+import threading
+import weakref
 from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from ..config.settings import Config
+from .blobs import LazyBlob, put_blob, put_blobs
+from .bundle import Bundle
+from .memory import MemoryCache
 
 _DB_PATH = Path(__file__).resolve().parent / "cache.sqlite3"
-_SCHEMA_PATH = Path(__file__).resolve().parent / "schema.sql"
+_MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+_BATCH_SIZE = 500
+_MAX_CHAIN_DEPTH = 1000
+
+# Applied to every connection. auto_vacuum only takes effect on a new file,
+# and only before journal_mode=WAL is set. WAL lets readers proceed while the
+# writer commits; synchronous=NORMAL is durable across application crashes
+# in WAL mode and avoids an fsync per commit.
+_PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _load_migrations() -> List[Tuple[int, Path]]:
+    """Return ``(version, path)`` for every ``NNNN_name.sql`` file, in order."""
+    migrations = []
+    for path in _MIGRATIONS_DIR.glob("*.sql"):
+        version, _, _ = path.stem.partition("_")
+        if version.isdigit():
+            migrations.append((int(version), path))
+    return sorted(migrations)
+
+
+def _split_statements(script: str) -> Iterator[str]:
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                yield buffer
+            buffer = ""
+    if buffer.strip():
+        yield buffer
+
+
+def _apply_migrations(conn: sqlite3.Connection) -> None:
+    """Bring the schema up to date, one transaction per migration.
+
+    The version is re-read after taking the write lock, so concurrent
+    processes opening the same file apply each migration exactly once.
+    """
+    for version, path in _load_migrations():
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if current < version:
+                for statement in _split_statements(path.read_text(encoding="utf-8")):
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {version}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class _Reader:
+    """A thread's reader connection, held in the manager's thread-local."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class ConnectionManager:
+    """Long-lived connections to one cache database file.
+
+    Each thread gets its own read-only connection, closed when the thread
+    exits; all writes go through a
+    single writer connection guarded by a lock. Migrations run once, when the
+    writer is first opened. Connections inherited across ``fork()`` are
+    discarded and reopened in the child. ``memory`` is the in-process tier
+    for decoded payloads read from this file and ``bundles`` holds the
+    snapshot bundles opened through it, keyed by snapshot ID, each with
+    the ``(path, imported_at)`` of the registration it was opened from.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.memory = MemoryCache(Config.MEMORY_CACHE_MAX_BYTES, Config.EVIDENCE_CACHE_TTL)
+        self.bundles: Dict[str, Tuple[Tuple[str, str], Bundle]] = {}
+        self._pid = os.getpid()
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._readers: Set[sqlite3.Connection] = set()
+        self._writer: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        return conn
 
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.RLock()
+            self._local = threading.local()
+            self._readers = set()
+            self._writer = None
 
-def _ensure_schema(conn: sqlite3.Connection) -> None:
-    with _SCHEMA_PATH.open("r", encoding="utf-8") as handle:
-        conn.executescript(handle.read())
+    def writer(self) -> sqlite3.Connection:
+        self._check_pid()
+        with self._lock:
+            if self._writer is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = self._connect()
+                _apply_migrations(conn)
+                self._writer = conn
+            return self._writer
+
+    def reader(self) -> sqlite3.Connection:
+        self._check_pid()
+        held = getattr(self._local, "reader", None)
+        if held is None:
+            self.writer()
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            held = self._local.reader = _Reader(conn)
+            with self._lock:
+                self._readers.add(conn)
+            # The thread-local drops ``held`` when its thread exits, so
+            # short-lived request threads do not leave connections behind.
+            weakref.finalize(held, self._release_reader, conn, self._pid)
+        return held.conn
+
+    def _release_reader(self, conn: sqlite3.Connection, pid: int) -> None:
+        if pid != os.getpid():
+            # Inherited across fork(); the parent still owns it.
+            return
+        with self._lock:
+            self._readers.discard(conn)
+        conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Yield the writer inside ``BEGIN IMMEDIATE`` ... ``COMMIT``.
+
+        Nested calls on the same thread join the outer transaction.
+        """
+        with self._lock:
+            conn = self.writer()
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def vacuum(self) -> None:
+        """Return free pages to the filesystem.
+
+        A file created without ``auto_vacuum`` is switched over with one
+        full ``VACUUM``. ``incremental_vacuum`` goes through
+        ``executescript`` because ``execute`` steps a statement that
+        returns no columns only once, which frees a single page.
+        """
+        with self._lock:
+            conn = self.writer()
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            conn.executescript("PRAGMA incremental_vacuum;")
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = set()
+            self._local = threading.local()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            for _, bundle in self.bundles.values():
+                bundle.close()
+            self.bundles = {}
+
+
+_MANAGERS: Dict[Path, ConnectionManager] = {}
+_MANAGERS_LOCK = threading.Lock()
+
+
+def get_manager() -> ConnectionManager:
+    """Return the connection manager for the current ``_DB_PATH``."""
+    path = Path(_DB_PATH)
+    manager = _MANAGERS.get(path)
+    if manager is None:
+        with _MANAGERS_LOCK:
+            manager = _MANAGERS.setdefault(path, ConnectionManager(path))
+    return manager
+
+
+def close_all() -> None:
+    with _MANAGERS_LOCK:
+        for manager in _MANAGERS.values():
+            manager.close()
+        _MANAGERS.clear()
+
+
+atexit.register(close_all)
 
 
 @contextmanager
 def get_connection(readonly: bool = False):
+    manager = get_manager()
     if readonly:
-        uri = f"file:{_DB_PATH}?mode=ro"
-        conn = sqlite3.connect(uri, uri=True)
+        yield manager.reader()
     else:
-        conn = sqlite3.connect(_DB_PATH)
+        with manager.transaction() as conn:
+            yield conn
 
-    conn.row_factory = sqlite3.Row
 
-    if not readonly:
-        _ensure_schema(conn)
+def _sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
 
-    try:
-        yield conn
-    finally:
-        conn.commit()
-        conn.close()
 
+def age_seconds(retrieved_at: str) -> float:
+    retrieved = datetime.fromisoformat(retrieved_at)
+    if retrieved.tzinfo is None:
+        retrieved = retrieved.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - retrieved).total_seconds()
 
-def _sha256(content: bytes) -> str:
-    return hashlib.sha256(content).hexdigest()
 
+def _chunks(items: Iterable[Any], size: int = _BATCH_SIZE) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validators(headers: Optional[Mapping[str, str]]) -> Tuple[Optional[str], ...]:
+    """Extract ``(etag, last_modified, cache_control)`` from response headers."""
+    if not headers:
+        return None, None, None
+    lowered = {key.lower(): value for key, value in headers.items()}
+    return lowered.get("etag"), lowered.get("last-modified"), lowered.get("cache-control")
+
+
+_UPSERT_CONTENT_SQL = """
+    INSERT INTO content (url, sha256, retrieved_at, snapshot_id, etag, last_modified, cache_control)
+    VALUES (?, ?, datetime('now'), ?, ?, ?, ?)
+    ON CONFLICT(url) DO UPDATE SET
+        sha256=excluded.sha256,
+        retrieved_at=datetime('now'),
+        snapshot_id=excluded.snapshot_id,
+        etag=excluded.etag,
+        last_modified=excluded.last_modified,
+        cache_control=excluded.cache_control
+"""
+
+_UPSERT_ENTRY_SQL = """
+    INSERT INTO snapshot_entries
+        (snapshot_id, url, sha256, retrieved_at, etag, last_modified, cache_control)
+    SELECT ?, url, sha256, retrieved_at, etag, last_modified, cache_control
+    FROM content WHERE url = ?
+    ON CONFLICT(snapshot_id, url) DO UPDATE SET
+        sha256=excluded.sha256,
+        retrieved_at=excluded.retrieved_at,
+        etag=excluded.etag,
+        last_modified=excluded.last_modified,
+        cache_control=excluded.cache_control
+"""
+
+_INSERT_FACT_SQL = """
+    INSERT INTO facts (content_id, claim, parser_id, source_type, payload, snapshot_id, product)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
 
-def upsert_content(url: str, raw: bytes, snapshot_id: Optional[str] = None) -> int:
+
+def upsert_content(
+    url: str,
+    raw: bytes,
+    snapshot_id: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None,
+) -> int:
     sha256 = _sha256(raw)
     with get_connection() as conn:
-        conn.execute(
-            """
-            INSERT INTO content (url, sha256, retrieved_at, snapshot_id, raw)
-            VALUES (?, ?, datetime('now'), ?, ?)
-            ON CONFLICT(url) DO UPDATE SET
-                sha256=excluded.sha256,
-                retrieved_at=datetime('now'),
-                snapshot_id=excluded.snapshot_id,
-                raw=excluded.raw
+        put_blob(conn, sha256, raw)
+        conn.execute(_UPSERT_CONTENT_SQL, (url, sha256, snapshot_id, *_validators(headers)))
+        if snapshot_id:
+            conn.execute(_UPSERT_ENTRY_SQL, (snapshot_id, url))
+        row = conn.execute("SELECT id FROM content WHERE url = ?", (url,)).fetchone()
+    get_manager().memory.invalidate(url)
+    return row["id"]
+
+
+def upsert_contents(
+    items: Iterable[Sequence[Any]],
+    snapshot_id: Optional[str] = None,
+) -> List[int]:
+    """Bulk version of :func:`upsert_content`.
+
+    ``items`` yields ``(url, raw)``, ``(url, raw, snapshot_id)`` or
+    ``(url, raw, snapshot_id, headers)`` tuples and may be a generator; it
+    is consumed in chunks of ``_BATCH_SIZE``, one transaction per chunk.
+    Returns the content IDs in input order.
+    """
+    ids: List[int] = []
+    for chunk in _chunks(items):
+        rows = []
+        bodies: Dict[str, bytes] = {}
+        for item in chunk:
+            url, raw = item[0], item[1]
+            sha256 = _sha256(raw)
+            bodies[sha256] = raw
+            rows.append(
+                (
+                    url,
+                    sha256,
+                    item[2] if len(item) > 2 else snapshot_id,
+                    *_validators(item[3] if len(item) > 3 else None),
+                )
+            )
+        urls = list(dict.fromkeys(row[0] for row in rows))
+        with get_connection() as conn:
+            put_blobs(conn, bodies)
+            conn.executemany(_UPSERT_CONTENT_SQL, rows)
+            conn.executemany(_UPSERT_ENTRY_SQL, [(row[2], row[0]) for row in rows if row[2]])
+            placeholders = ",".join("?" * len(urls))
+            assigned = dict(
+                conn.execute(f"SELECT url, id FROM content WHERE url IN ({placeholders})", urls)
+            )
+        memory = get_manager().memory
+        for url in urls:
+            memory.invalidate(url)
+        ids.extend(assigned[row[0]] for row in rows)
+    return ids
+
+
+def snapshot_chain(conn: sqlite3.Connection, snapshot_id: str) -> List[str]:
+    """Return ``snapshot_id`` followed by its ancestors, nearest first."""
+    rows = conn.execute(
+        """
+        WITH RECURSIVE chain(snapshot_id, parent_id, depth) AS (
+            SELECT snapshot_id, parent_id, 0 FROM snapshots WHERE snapshot_id = ?
+            UNION ALL
+            SELECT snapshots.snapshot_id, snapshots.parent_id, chain.depth + 1
+            FROM snapshots JOIN chain ON snapshots.snapshot_id = chain.parent_id
+            WHERE chain.depth < ?
+        )
+        SELECT snapshot_id FROM chain ORDER BY depth
+        """,
+        (snapshot_id, _MAX_CHAIN_DEPTH),
+    ).fetchall()
+    return [row[0] for row in rows] or [snapshot_id]
+
+
+def _snapshot_entry(conn: sqlite3.Connection, snapshot_id: str, url: str) -> Optional[sqlite3.Row]:
+    """The entry for ``url`` from the nearest snapshot in the chain that has one."""
+    chain = snapshot_chain(conn, snapshot_id)
+    placeholders = ",".join("?" * len(chain))
+    entries = {
+        row["snapshot_id"]: row
+        for row in conn.execute(
+            f"""
+            SELECT snapshot_entries.*, content.id AS id
+            FROM snapshot_entries LEFT JOIN content ON content.url = snapshot_entries.url
+            WHERE snapshot_entries.url = ? AND snapshot_entries.snapshot_id IN ({placeholders})
             """,
-            (url, sha256, snapshot_id, raw),
+            (url, *chain),
         )
-        row = conn.execute("SELECT id FROM content WHERE url = ?", (url,)).fetchone()
-        return row["id"]
+    }
+    for member in chain:
+        if member in entries:
+            return entries[member]
+    return None
+
+
+def get_bundle(snapshot_id: str) -> Optional[Bundle]:
+    """Return the imported bundle for ``snapshot_id``, opening it on first use.
+
+    The ``bundles`` row is read on every call (a primary-key lookup), so a
+    bundle imported or re-imported by another process is picked up and
+    a snapshot without one is never remembered as such.
+    """
+    with get_connection(readonly=True) as conn:
+        row = conn.execute(
+            "SELECT path, imported_at FROM bundles WHERE snapshot_id = ?", (snapshot_id,)
+        ).fetchone()
+    if row is None:
+        return None
+    manager = get_manager()
+    registration = (row["path"], row["imported_at"])
+    opened = manager.bundles.get(snapshot_id)
+    if opened is not None and opened[0] == registration:
+        return opened[1]
+    bundle = Bundle(Path(row["path"]))
+    with manager._lock:
+        current = manager.bundles.get(snapshot_id)
+        if current is not None and current[0] == registration:
+            bundle.close()
+            return current[1]
+        manager.bundles[snapshot_id] = (registration, bundle)
+    if current is not None:
+        current[1].close()
+        # Payloads decoded from the old file may be in the memory tier.
+        manager.memory.clear()
+    return bundle
 
 
 def get_cached_content(
@@ -62,29 +438,136 @@ def get_cached_content(
     max_age_seconds: Optional[int] = None,
     snapshot_id: Optional[str] = None,
 ) -> Optional[Dict[str, Any]]:
-    if not _DB_PATH.exists():
-        return None
-    query = "SELECT * FROM content WHERE url = ?"
-    params = [url]
+    """Return the cached row for ``url``, or ``None``.
 
-    if snapshot_id:
-        query += " AND snapshot_id = ?"
-        params.append(snapshot_id)
+    ``raw`` is a :class:`LazyBlob`; the body is only decompressed when a
+    caller reads it. With ``snapshot_id`` the row comes from the nearest
+    snapshot in its parent chain that recorded ``url``; snapshots imported as
+    bundles are served from the memory-mapped bundle file.
+    """
+    bundle = get_bundle(snapshot_id) if snapshot_id else None
+    if bundle is not None:
+        row = bundle.get(url)
+        if row is None:
+            return None
+        if max_age_seconds is not None and age_seconds(row["retrieved_at"]) > max_age_seconds:
+            return None
+        return row
 
     with get_connection(readonly=True) as conn:
-        row = conn.execute(query, params).fetchone()
+        if snapshot_id:
+            row = _snapshot_entry(conn, snapshot_id, url)
+        else:
+            row = conn.execute("SELECT * FROM content WHERE url = ?", (url,)).fetchone()
         if not row:
             return None
+        if max_age_seconds is not None and age_seconds(row["retrieved_at"]) > max_age_seconds:
+            return None
+        blob = conn.execute(
+            "SELECT codec, size, data FROM blobs WHERE sha256 = ?", (row["sha256"],)
+        ).fetchone()
+    if blob is None:
+        return None
+
+    cached = dict(row)
+    cached["raw"] = LazyBlob(cached["sha256"], blob["codec"], blob["size"], blob["data"])
+    return cached
+
+
+def get_cached_entry(
+    url: str,
+    decode: Callable[[Any], Any],
+    max_age_seconds: Optional[int] = None,
+    snapshot_id: Optional[str] = None,
+) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    """Return ``(decode(raw), row)`` for the cached body of ``url``, or ``None``.
+
+    ``row`` is the content row without its body (URL, validators,
+    ``retrieved_at``...). Decoded payloads are kept in the in-process memory
+    tier, keyed by ``(url, snapshot_id)`` and the decoder, so a large feed is
+    decoded once per process rather than on every call. Entries expire after
+    ``Config.EVIDENCE_CACHE_TTL`` and are dropped whenever the URL is
+    rewritten.
+    """
+    memory = get_manager().memory
+    key = (url, snapshot_id, decode)
+    hit = memory.get(key)
+    if hit is not None:
+        if max_age_seconds is None or age_seconds(hit[1]["retrieved_at"]) <= max_age_seconds:
+            return hit
+
+    return reload_cached_entry(
+        url, decode, max_age_seconds=max_age_seconds, snapshot_id=snapshot_id
+    )
+
+
+def reload_cached_entry(
+    url: str,
+    decode: Callable[[Any], Any],
+    max_age_seconds: Optional[int] = None,
+    snapshot_id: Optional[str] = None,
+) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    """Like :func:`get_cached_entry`, but always read from the database.
+
+    The memory tier only learns about rewrites made by this process; use
+    this to pick up a body another process has just stored. The decoded
+    entry replaces whatever the memory tier held.
+    """
+    cached = get_cached_content(url, max_age_seconds=max_age_seconds, snapshot_id=snapshot_id)
+    if cached is None:
+        return None
+    raw = cached.pop("raw")
+    entry = (decode(raw), cached)
+    get_manager().memory.put((url, snapshot_id, decode), entry, len(raw))
+    return entry
+
 
-        if max_age_seconds is not None:
-            age = conn.execute(
-                "SELECT strftime('%s','now') - strftime('%s', ?)",
-                (row["retrieved_at"],),
-            ).fetchone()[0]
-            if age > max_age_seconds:
-                return None
+def get_cached_payload(
+    url: str,
+    decode: Callable[[Any], Any],
+    max_age_seconds: Optional[int] = None,
+    snapshot_id: Optional[str] = None,
+) -> Optional[Any]:
+    """Like :func:`get_cached_entry`, returning only the decoded payload."""
+    entry = get_cached_entry(url, decode, max_age_seconds=max_age_seconds, snapshot_id=snapshot_id)
+    return None if entry is None else entry[0]
 
-        return dict(row)
+
+def touch_content(
+    url: str,
+    headers: Optional[Mapping[str, str]] = None,
+    snapshot_id: Optional[str] = None,
+) -> None:
+    """Mark the cached body of ``url`` as freshly validated (HTTP 304).
+
+    Bumps ``retrieved_at`` and takes any new validators from ``headers``
+    without rewriting the body or dropping decoded payloads from memory.
+    """
+    etag, last_modified, cache_control = _validators(headers)
+    with get_connection() as conn:
+        conn.execute(
+            """
+            UPDATE content SET
+                retrieved_at=datetime('now'),
+                etag=COALESCE(?, etag),
+                last_modified=COALESCE(?, last_modified),
+                cache_control=COALESCE(?, cache_control),
+                snapshot_id=COALESCE(?, snapshot_id)
+            WHERE url = ?
+            """,
+            (etag, last_modified, cache_control, snapshot_id, url),
+        )
+        if snapshot_id:
+            conn.execute(_UPSERT_ENTRY_SQL, (snapshot_id, url))
+        row = conn.execute(
+            """
+            SELECT id, url, sha256, retrieved_at, snapshot_id, etag, last_modified, cache_control
+            FROM content WHERE url = ?
+            """,
+            (url,),
+        ).fetchone()
+    if row is not None:
+        get_manager().memory.refresh(url, lambda entry: (entry[0], dict(row)))
 
 
 def record_fact(
@@ -94,28 +577,246 @@ def record_fact(
     source_type: str,
     payload: Dict[str, Any],
     snapshot_id: Optional[str] = None,
+    product: Optional[str] = None,
 ) -> int:
+    with get_connection() as conn:
+        cur = conn.execute(
+            _INSERT_FACT_SQL,
+            (content_id, claim, parser_id, source_type, json.dumps(payload), snapshot_id, product),
+        )
+        return cur.lastrowid
+
+
+def record_facts(facts: Iterable[Dict[str, Any]]) -> List[int]:
+    """Bulk version of :func:`record_fact`.
+
+    Each item is a dict of :func:`record_fact` keyword arguments. Facts are
+    inserted with ``executemany`` in chunked transactions; returns the new
+    fact IDs in input order.
+    """
+    ids: List[int] = []
+    for chunk in _chunks(facts):
+        rows = [
+            (
+                fact["content_id"],
+                fact["claim"],
+                fact["parser_id"],
+                fact["source_type"],
+                json.dumps(fact["payload"]),
+                fact.get("snapshot_id"),
+                fact.get("product"),
+            )
+            for fact in chunk
+        ]
+        with get_connection() as conn:
+            conn.executemany(_INSERT_FACT_SQL, rows)
+            # The write lock is held for the whole transaction, so the
+            # AUTOINCREMENT ids of this batch are contiguous.
+            last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        ids.extend(range(last - len(rows) + 1, last + 1))
+    return ids
+
+
+_FACT_FILTERS = ("claim", "snapshot_id", "cve_id", "severity", "control")
+
+
+def facts_for(
+    product: Optional[str] = None,
+    claim: Optional[str] = None,
+    snapshot: Optional[str] = None,
+    cve_id: Optional[str] = None,
+    severity: Optional[str] = None,
+    control: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Return facts matching every given filter, newest first.
+
+    Each fact carries its decoded ``payload`` plus the ``url`` and
+    ``retrieved_at`` of the content it was parsed from, ready for citing.
+    Product, claim, snapshot, severity, CVE and control filters are all
+    served from indexes on ``facts``; ``cve_id``, ``severity`` and
+    ``control`` are virtual columns over the JSON payload. For a
+    ``snapshot`` imported from a bundle, the bundle's facts follow the
+    database's.
+    """
+    values = (claim, snapshot, cve_id, severity.upper() if severity else None, control)
+    clauses: List[str] = []
+    params: List[Any] = []
+    if product is not None:
+        clauses.append("facts.product = ?")
+        params.append(product)
+    for column, value in zip(_FACT_FILTERS, values):
+        if value is not None:
+            # Without ANALYZE stats the planner prefers the one-column
+            # snapshot index over the (product, claim, snapshot_id) one;
+            # unary + keeps it on the composite index when a product is given.
+            prefix = "+" if column == "snapshot_id" and product is not None else ""
+            clauses.append(f"{prefix}facts.{column} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    limit_sql = "LIMIT ?" if limit is not None else ""
+    if limit is not None:
+        params.append(limit)
+
+    with get_connection(readonly=True) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT facts.id, facts.content_id, facts.claim, facts.parser_id,
+                   facts.source_type, facts.payload, facts.snapshot_id, facts.product,
+                   content.url AS url, content.retrieved_at AS retrieved_at
+            FROM facts LEFT JOIN content ON content.id = facts.content_id
+            {where}
+            ORDER BY facts.id DESC
+            {limit_sql}
+            """,
+            params,
+        ).fetchall()
+
+    facts = []
+    for row in rows:
+        fact = dict(row)
+        fact["payload"] = json.loads(fact["payload"])
+        facts.append(fact)
+    bundle = get_bundle(snapshot) if snapshot is not None else None
+    if bundle is not None and (limit is None or len(facts) < limit):
+        wanted = dict(zip(_FACT_FILTERS, values))
+        wanted.pop("snapshot_id")
+        found = _bundle_facts(bundle, product, wanted)
+        facts.extend(found if limit is None else found[:limit - len(facts)])
+    return facts
+
+
+def _bundle_facts(
+    bundle: Bundle, product: Optional[str], wanted: Dict[str, Optional[str]]
+) -> List[Dict[str, Any]]:
+    """The facts exported into ``bundle`` that match, newest first, shaped like ``facts_for`` rows."""
+    facts = []
+    for exported in sorted(bundle.facts, key=lambda fact: fact["id"], reverse=True):
+        if product is not None and exported.get("product") != product:
+            continue
+        if any(value is not None and exported.get(column) != value for column, value in wanted.items()):
+            continue
+        entry = bundle.entries.get(exported.get("url") or "")
+        facts.append({
+            "id": exported["id"],
+            # Row IDs of the exporting database mean nothing here.
+            "content_id": None,
+            "claim": exported["claim"],
+            "parser_id": exported["parser_id"],
+            "source_type": exported["source_type"],
+            "payload": json.loads(exported["payload"]),
+            "snapshot_id": bundle.snapshot_id,
+            "product": exported.get("product"),
+            "url": exported.get("url"),
+            "retrieved_at": entry["retrieved_at"] if entry else None,
+        })
+    return facts
+
+
+def record_assessment(
+    product: str,
+    data: Dict[str, Any],
+    vendor: Optional[str] = None,
+    score: Optional[float] = None,
+    snapshot_id: Optional[str] = None,
+    source: str = "cli",
+) -> int:
+    """Store a finished assessment for the history view; returns its ID.
+
+    ``source`` names the front end that produced ``data`` (``"cli"`` or
+    ``"web"``), since each stores its own payload shape.
+    """
     with get_connection() as conn:
         cur = conn.execute(
             """
-            INSERT INTO facts (content_id, claim, parser_id, source_type, payload, snapshot_id)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO assessments (product, vendor, score, snapshot_id, source, created_at, data)
+            VALUES (?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now'), ?)
             """,
-            (content_id, claim, parser_id, source_type, json.dumps(payload), snapshot_id),
+            (product, vendor, score, snapshot_id, source, json.dumps(data, default=str)),
         )
         return cur.lastrowid
-    
-def get_assessment_history(limit=10):
-    """Retrieve recent assessments for UI history"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT assessment_data, created_at 
-        FROM snapshots 
-        ORDER BY created_at DESC 
-        LIMIT ?
-    """, (limit,))
-    
-    rows = cursor.fetchall()
-    return [json.loads(row[0]) for row in rows]
\ No newline at end of file
+
+
+def get_assessment(assessment_id: int) -> Optional[Dict[str, Any]]:
+    """One recorded assessment with its decoded ``data``, or ``None``."""
+    with get_connection(readonly=True) as conn:
+        row = conn.execute(
+            """
+            SELECT id, product, vendor, score, snapshot_id, source, created_at, data
+            FROM assessments WHERE id = ?
+            """,
+            (assessment_id,),
+        ).fetchone()
+    if row is None:
+        return None
+    item = dict(row)
+    item["data"] = json.loads(item["data"])
+    return item
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    created_at, _, assessment_id = cursor.rpartition("|")
+    if not created_at or not assessment_id.isdigit():
+        raise ValueError(f"invalid history cursor: {cursor!r}")
+    return created_at, int(assessment_id)
+
+
+def get_assessment_history(
+    limit: int = 10,
+    before: Optional[str] = None,
+    product: Optional[str] = None,
+    vendor: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    source: Optional[str] = None,
+    include_data: bool = False,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return one page of assessments, newest first, and the next cursor.
+
+    Pages are keyed on ``(created_at, id)`` rather than OFFSET, so each page
+    is an index range scan whatever its depth. Pass the returned cursor as
+    ``before`` to fetch the following page; it is ``None`` on the last page.
+    Product and vendor filters are exact, case-insensitive matches.
+    Items carry the indexed columns only; ``include_data`` adds the decoded
+    payload, which :func:`get_assessment` also returns for a single row.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    if before:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(_decode_cursor(before))
+    for column, value in (("product", product), ("vendor", vendor), ("source", source)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if min_score is not None:
+        clauses.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append("score <= ?")
+        params.append(max_score)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    data = ", data" if include_data else ""
+
+    with get_connection(readonly=True) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT id, product, vendor, score, snapshot_id, source, created_at{data}
+            FROM assessments {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """,
+            (*params, limit + 1),
+        ).fetchall()
+
+    items = []
+    for row in rows[:limit]:
+        item = dict(row)
+        if include_data:
+            item["data"] = json.loads(item["data"])
+        items.append(item)
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = f"{last['created_at']}|{last['id']}"
+    return items, next_cursor
@@ -0,0 +1,257 @@
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from ..config.settings import Config
+from .db import age_seconds, get_connection, get_manager, snapshot_chain
+
+_EVICTION_BATCH = 100
+
+
+def _pinned_snapshots(conn: sqlite3.Connection) -> Set[str]:
+    """Pinned snapshots plus every ancestor their delta chains read through."""
+    pinned: Set[str] = set()
+    for row in conn.execute("SELECT snapshot_id FROM snapshots WHERE pinned = 1").fetchall():
+        pinned.update(snapshot_chain(conn, row[0]))
+    return pinned
+
+
+def _database_bytes(conn: sqlite3.Connection) -> int:
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+def _blob_bytes(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(SUM(length(data)), 0) FROM blobs").fetchone()[0]
+
+
+def _delete_content(conn: sqlite3.Connection, ids) -> int:
+    ids = list(ids)
+    conn.executemany("DELETE FROM content WHERE id = ?", [(content_id,) for content_id in ids])
+    return len(ids)
+
+
+def _delete_orphan_facts(conn: sqlite3.Connection, pinned: Set[str]) -> int:
+    placeholders = ",".join("?" * len(pinned))
+    return conn.execute(
+        f"""
+        DELETE FROM facts
+        WHERE NOT EXISTS (SELECT 1 FROM content WHERE content.id = facts.content_id)
+          AND (snapshot_id IS NULL OR snapshot_id NOT IN ({placeholders}))
+        """,
+        list(pinned),
+    ).rowcount
+
+
+def _delete_entries(conn: sqlite3.Connection, keys) -> int:
+    return conn.executemany(
+        "DELETE FROM snapshot_entries WHERE snapshot_id = ? AND url = ?", list(keys)
+    ).rowcount
+
+
+def _in(pinned: Set[str]) -> str:
+    return ",".join("?" * len(pinned))
+
+
+def _unprotected(pinned: Set[str]) -> str:
+    """SQL condition on ``blobs``: used by no content row and no pinned snapshot."""
+    return f"""
+        NOT EXISTS (SELECT 1 FROM content WHERE content.sha256 = blobs.sha256)
+        AND NOT EXISTS (
+            SELECT 1 FROM snapshot_entries
+            WHERE snapshot_entries.sha256 = blobs.sha256
+              AND snapshot_entries.snapshot_id IN ({_in(pinned)})
+        )
+    """
+
+
+def _delete_unreferenced_blobs(conn: sqlite3.Connection, pinned: Set[str]) -> Tuple[int, int]:
+    """Drop unprotected blobs with the unpinned snapshot entries still pointing at them.
+
+    Returns ``(blobs, entries)`` removed.
+    """
+    entries = conn.execute(
+        f"""
+        DELETE FROM snapshot_entries
+        WHERE snapshot_id NOT IN ({_in(pinned)})
+          AND sha256 IN (SELECT sha256 FROM blobs WHERE {_unprotected(pinned)})
+        """,
+        (*pinned, *pinned),
+    ).rowcount
+    blobs = conn.execute(f"DELETE FROM blobs WHERE {_unprotected(pinned)}", list(pinned)).rowcount
+    return blobs, entries
+
+
+def _release_blob(conn: sqlite3.Connection, sha256: str, pinned: Set[str]) -> Tuple[int, int]:
+    """Drop blob ``sha256`` if nothing protects it any more.
+
+    Returns ``(bytes freed, unpinned snapshot entries removed with it)``.
+    """
+    row = conn.execute(
+        f"SELECT length(data) FROM blobs WHERE sha256 = ? AND {_unprotected(pinned)}",
+        (sha256, *pinned),
+    ).fetchone()
+    if row is None:
+        return 0, 0
+    entries = conn.execute(
+        f"DELETE FROM snapshot_entries WHERE sha256 = ? AND snapshot_id NOT IN ({_in(pinned)})",
+        (sha256, *pinned),
+    ).rowcount
+    conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+    return row[0], entries
+
+
+def _pinned_blob_bytes(conn: sqlite3.Connection, pinned: Set[str]) -> int:
+    """Bytes of blobs that pinned snapshots keep alive, which eviction cannot free."""
+    return conn.execute(
+        f"""
+        SELECT COALESCE(SUM(length(data)), 0) FROM blobs
+        WHERE sha256 IN (
+            SELECT sha256 FROM snapshot_entries WHERE snapshot_id IN ({_in(pinned)})
+            UNION
+            SELECT sha256 FROM content WHERE snapshot_id IN ({_in(pinned)})
+        )
+        """,
+        (*pinned, *pinned),
+    ).fetchone()[0]
+
+
+def _delete_empty_snapshots(conn: sqlite3.Connection, pinned: Set[str]) -> int:
+    """Unpinned snapshots left with no entries, children, bundle or tagged rows."""
+    return conn.execute(
+        f"""
+        DELETE FROM snapshots
+        WHERE snapshot_id NOT IN ({_in(pinned)})
+          AND NOT EXISTS (SELECT 1 FROM snapshot_entries e WHERE e.snapshot_id = snapshots.snapshot_id)
+          AND NOT EXISTS (SELECT 1 FROM snapshots c WHERE c.parent_id = snapshots.snapshot_id)
+          AND NOT EXISTS (SELECT 1 FROM bundles b WHERE b.snapshot_id = snapshots.snapshot_id)
+          AND NOT EXISTS (SELECT 1 FROM content WHERE content.snapshot_id = snapshots.snapshot_id)
+          AND NOT EXISTS (SELECT 1 FROM facts WHERE facts.snapshot_id = snapshots.snapshot_id)
+        """,
+        list(pinned),
+    ).rowcount
+
+
+def _expired(rows, source_ttls: Dict[str, int], default_ttl: Optional[int]):
+    for row in rows:
+        ttl = source_ttls.get(urlsplit(row["url"]).hostname or "", default_ttl)
+        if ttl is not None and age_seconds(row["retrieved_at"]) > ttl:
+            yield row
+
+
+def collect_garbage(
+    max_bytes: Optional[int] = None,
+    source_ttls: Optional[Dict[str, int]] = None,
+    default_ttl: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Enforce per-source TTLs and a byte budget on the cache, then vacuum.
+
+    1. Content and unpinned snapshot entries older than their host's TTL
+       are removed.
+    2. Facts whose content row is gone are removed.
+    3. While blob storage exceeds ``max_bytes``, the least recently
+       retrieved content rows and unpinned snapshot entries are evicted
+       in batches, until only bytes held by pinned snapshots remain or
+       nothing unpinned is left to evict.
+    4. Blobs referenced by neither content nor a pinned snapshot are
+       removed together with the unpinned snapshot entries pointing at
+       them, unpinned snapshots left empty are dropped, and freed pages
+       are returned with ``PRAGMA incremental_vacuum`` (after a one-off
+       ``VACUUM`` on files created without ``auto_vacuum``).
+
+    Content, facts and snapshot entries of a pinned snapshot (or an
+    ancestor of one) are never removed, so pinned snapshots stay
+    readable; unpinned ones may lose entries. Returns a report with
+    bytes reclaimed, the bytes pinned snapshots hold and elapsed time.
+    """
+    started = time.perf_counter()
+    max_bytes = Config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    source_ttls = Config.CACHE_SOURCE_TTLS if source_ttls is None else source_ttls
+    default_ttl = Config.CACHE_DEFAULT_SOURCE_TTL if default_ttl is None else default_ttl
+    report = {
+        "content_removed": 0,
+        "entries_removed": 0,
+        "snapshots_removed": 0,
+        "facts_removed": 0,
+        "blobs_removed": 0,
+    }
+
+    with get_connection() as conn:
+        bytes_before = _database_bytes(conn)
+        pinned = _pinned_snapshots(conn)
+
+        content = conn.execute(
+            "SELECT id, url, retrieved_at, snapshot_id FROM content"
+        ).fetchall()
+        report["content_removed"] += _delete_content(
+            conn,
+            (row["id"] for row in _expired(content, source_ttls, default_ttl)
+             if row["snapshot_id"] not in pinned),
+        )
+        entry_rows = conn.execute(
+            f"""
+            SELECT snapshot_id, url, retrieved_at FROM snapshot_entries
+            WHERE snapshot_id NOT IN ({_in(pinned)})
+            """,
+            list(pinned),
+        ).fetchall()
+        report["entries_removed"] += _delete_entries(
+            conn,
+            ((row["snapshot_id"], row["url"])
+             for row in _expired(entry_rows, source_ttls, default_ttl)),
+        )
+
+        report["facts_removed"] += _delete_orphan_facts(conn, pinned)
+        blobs, entries = _delete_unreferenced_blobs(conn, pinned)
+        report["blobs_removed"] += blobs
+        report["entries_removed"] += entries
+
+        pinned_bytes = _pinned_blob_bytes(conn, pinned)
+        blob_bytes = _blob_bytes(conn)
+        while blob_bytes > max_bytes and blob_bytes > pinned_bytes:
+            oldest = conn.execute(
+                f"""
+                SELECT id, NULL AS snapshot_id, url, sha256, retrieved_at FROM content
+                WHERE snapshot_id IS NULL OR snapshot_id NOT IN ({_in(pinned)})
+                UNION ALL
+                SELECT NULL, snapshot_id, url, sha256, retrieved_at FROM snapshot_entries
+                WHERE snapshot_id NOT IN ({_in(pinned)})
+                ORDER BY retrieved_at LIMIT ?
+                """,
+                (*pinned, *pinned, _EVICTION_BATCH),
+            ).fetchall()
+            for row in oldest:
+                if row["id"] is not None:
+                    report["content_removed"] += _delete_content(conn, [row["id"]])
+                else:
+                    report["entries_removed"] += _delete_entries(
+                        conn, [(row["snapshot_id"], row["url"])]
+                    )
+                released, entries = _release_blob(conn, row["sha256"], pinned)
+                report["blobs_removed"] += bool(released)
+                report["entries_removed"] += entries
+                blob_bytes -= released
+                if blob_bytes <= max_bytes:
+                    break
+            # Rows whose blobs something else keeps free nothing, but they are
+            # gone now, so the next batch reaches further; stop only when no
+            # candidates are left.
+            if not oldest:
+                break
+
+        report["facts_removed"] += _delete_orphan_facts(conn, pinned)
+        report["snapshots_removed"] += _delete_empty_snapshots(conn, pinned)
+        report["blob_bytes"] = blob_bytes
+        report["pinned_bytes"] = pinned_bytes
+        report["over_budget"] = blob_bytes > max_bytes
+
+    get_manager().vacuum()
+    with get_connection(readonly=True) as conn:
+        bytes_after = _database_bytes(conn)
+
+    get_manager().memory.clear()
+    report["bytes_reclaimed"] = max(0, bytes_before - bytes_after)
+    report["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+
+from .db import get_connection
+
+
+def acquire(key: str, owner: str, ttl: float, now: Optional[float] = None) -> bool:
+    """Take the lease on ``key`` for ``ttl`` seconds; ``False`` if someone else holds it.
+
+    An expired lease is taken over, so a crashed holder only delays the
+    others by ``ttl``.
+    """
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        cursor = conn.execute(
+            """
+            INSERT INTO fetch_leases (key, owner, expires_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                owner=excluded.owner,
+                expires_at=excluded.expires_at
+            WHERE fetch_leases.expires_at <= ? OR fetch_leases.owner = excluded.owner
+            """,
+            (key, owner, now + ttl, now),
+        )
+        return cursor.rowcount > 0
+
+
+def release(key: str, owner: str) -> None:
+    with get_connection() as conn:
+        conn.execute("DELETE FROM fetch_leases WHERE key = ? AND owner = ?", (key, owner))
+
+
+def holder(key: str, now: Optional[float] = None) -> Optional[str]:
+    """Owner of the live lease on ``key``, if any."""
+    now = time.time() if now is None else now
+    with get_connection(readonly=True) as conn:
+        row = conn.execute(
+            "SELECT owner FROM fetch_leases WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+    return None if row is None else row["owner"]
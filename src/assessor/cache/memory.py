@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+class MemoryCache:
+    """Bounded in-process LRU cache with TTL expiry.
+
+    Entries are weighted by a caller-supplied byte size; the least recently
+    used entries are evicted once the total exceeds ``max_bytes``. Keys are
+    tuples whose first element is the URL, so every entry derived from a
+    URL can be dropped with :meth:`invalidate`.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int, float]]" = OrderedDict()
+        self._by_url: Dict[str, Set[Tuple]] = {}
+        self._bytes = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, _, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[Hashable, ...], value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+            self._by_url.setdefault(key[0], set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def refresh(self, url: str, update: Callable[[Any], Any]) -> None:
+        """Replace every entry for ``url`` with ``update(value)`` and reset its TTL."""
+        with self._lock:
+            expires_at = time.monotonic() + self.ttl_seconds
+            for key in self._by_url.get(url, ()):
+                value, size, _ = self._entries[key]
+                self._entries[key] = (update(value), size, expires_at)
+
+    def invalidate(self, url: str) -> None:
+        with self._lock:
+            for key in list(self._by_url.get(url, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_url.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Tuple) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._by_url.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_url[key[0]]
@@ -1,14 +1,10 @@
-DROP TABLE IF EXISTS facts;
-DROP TABLE IF EXISTS content;
-DROP TABLE IF EXISTS snapshots;
-
-CREATE TABLE snapshots (
+CREATE TABLE IF NOT EXISTS snapshots (
     snapshot_id TEXT PRIMARY KEY,
     created_at TEXT NOT NULL,
     dependency_lock TEXT NOT NULL
 );
 
-CREATE TABLE content (
+CREATE TABLE IF NOT EXISTS content (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     url TEXT NOT NULL UNIQUE,
     sha256 TEXT NOT NULL,
@@ -18,7 +14,7 @@ CREATE TABLE content (
     FOREIGN KEY (snapshot_id) REFERENCES snapshots(snapshot_id)
 );
 
-CREATE TABLE facts (
+CREATE TABLE IF NOT EXISTS facts (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     content_id INTEGER NOT NULL,
     claim TEXT NOT NULL,
@@ -28,4 +24,4 @@ CREATE TABLE facts (
     snapshot_id TEXT,
     FOREIGN KEY (content_id) REFERENCES content(id),
     FOREIGN KEY (snapshot_id) REFERENCES snapshots(snapshot_id)
-);
\ No newline at end of file
+);
@@ -0,0 +1,30 @@
+-- Raw bodies move out of `content` into a content-addressed blob table, so
+-- identical payloads fetched from different URLs are stored once.
+CREATE TABLE blobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sha256 TEXT NOT NULL UNIQUE,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+
+INSERT OR IGNORE INTO blobs (sha256, codec, size, data)
+SELECT sha256, 'identity', length(raw), raw FROM content;
+
+CREATE TABLE content_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL,
+    retrieved_at TEXT NOT NULL,
+    snapshot_id TEXT,
+    FOREIGN KEY (sha256) REFERENCES blobs(sha256),
+    FOREIGN KEY (snapshot_id) REFERENCES snapshots(snapshot_id)
+);
+
+INSERT INTO content_new (id, url, sha256, retrieved_at, snapshot_id)
+SELECT id, url, sha256, retrieved_at, snapshot_id FROM content;
+
+DROP TABLE content;
+ALTER TABLE content_new RENAME TO content;
+
+CREATE INDEX idx_content_sha256 ON content(sha256);
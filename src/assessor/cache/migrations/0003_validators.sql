@@ -0,0 +1,4 @@
+-- HTTP validators and freshness directives for conditional revalidation.
+ALTER TABLE content ADD COLUMN etag TEXT;
+ALTER TABLE content ADD COLUMN last_modified TEXT;
+ALTER TABLE content ADD COLUMN cache_control TEXT;
@@ -0,0 +1,8 @@
+-- Snapshots imported from packed bundle files; reads for these snapshot IDs
+-- are served from the memory-mapped bundle instead of the content table.
+CREATE TABLE bundles (
+    snapshot_id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    imported_at TEXT NOT NULL,
+    FOREIGN KEY (snapshot_id) REFERENCES snapshots(snapshot_id)
+);
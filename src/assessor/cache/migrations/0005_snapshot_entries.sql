@@ -0,0 +1,23 @@
+-- Snapshot membership, stored as deltas: a snapshot records only the URLs
+-- whose body differs from what its parent chain resolves to.
+ALTER TABLE snapshots ADD COLUMN parent_id TEXT REFERENCES snapshots(snapshot_id);
+
+CREATE TABLE snapshot_entries (
+    snapshot_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    retrieved_at TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    cache_control TEXT,
+    PRIMARY KEY (snapshot_id, url),
+    FOREIGN KEY (snapshot_id) REFERENCES snapshots(snapshot_id),
+    FOREIGN KEY (sha256) REFERENCES blobs(sha256)
+) WITHOUT ROWID;
+
+CREATE INDEX idx_snapshot_entries_sha256 ON snapshot_entries(sha256);
+
+INSERT OR IGNORE INTO snapshot_entries
+    (snapshot_id, url, sha256, retrieved_at, etag, last_modified, cache_control)
+SELECT snapshot_id, url, sha256, retrieved_at, etag, last_modified, cache_control
+FROM content WHERE snapshot_id IS NOT NULL;
@@ -0,0 +1,5 @@
+-- Pinned snapshots (and everything they reference) survive garbage
+-- collection; retrieved_at orders eviction under the byte budget.
+ALTER TABLE snapshots ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX idx_content_retrieved_at ON content(retrieved_at);
@@ -0,0 +1,15 @@
+-- Assessment history, read newest-first with keyset pagination on
+-- (created_at, id). Product and vendor compare case-insensitively.
+CREATE TABLE assessments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product TEXT NOT NULL COLLATE NOCASE,
+    vendor TEXT COLLATE NOCASE,
+    score REAL,
+    snapshot_id TEXT,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE INDEX idx_assessments_created_at ON assessments(created_at, id);
+CREATE INDEX idx_assessments_product ON assessments(product, created_at, id);
+CREATE INDEX idx_assessments_vendor ON assessments(vendor, created_at, id);
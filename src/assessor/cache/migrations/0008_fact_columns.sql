@@ -0,0 +1,26 @@
+-- Queryable facts: the product a fact is about, plus virtual columns over
+-- common payload keys so lookups by CVE, severity or control can use an
+-- index instead of parsing every payload.
+ALTER TABLE facts ADD COLUMN product TEXT COLLATE NOCASE;
+
+ALTER TABLE facts ADD COLUMN cve_id TEXT GENERATED ALWAYS AS (
+    COALESCE(
+        json_extract(payload, '$.cve_id'),
+        CASE WHEN json_extract(payload, '$.id') LIKE 'CVE-%' THEN json_extract(payload, '$.id') END
+    )
+) VIRTUAL;
+
+ALTER TABLE facts ADD COLUMN severity TEXT GENERATED ALWAYS AS (
+    upper(json_extract(payload, '$.severity'))
+) VIRTUAL;
+
+ALTER TABLE facts ADD COLUMN control TEXT GENERATED ALWAYS AS (
+    json_extract(payload, '$.control')
+) VIRTUAL;
+
+CREATE INDEX idx_facts_content_id ON facts(content_id);
+CREATE INDEX idx_facts_snapshot_id ON facts(snapshot_id);
+CREATE INDEX idx_facts_product_claim ON facts(product, claim, snapshot_id, content_id);
+CREATE INDEX idx_facts_product_severity ON facts(product, severity, claim, snapshot_id);
+CREATE INDEX idx_facts_cve_id ON facts(cve_id, product) WHERE cve_id IS NOT NULL;
+CREATE INDEX idx_facts_control ON facts(control, product) WHERE control IS NOT NULL;
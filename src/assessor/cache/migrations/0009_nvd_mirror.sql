@@ -0,0 +1,47 @@
+-- Local NVD mirror, kept current by `assessor nvd-sync`. Records are the
+-- normalized CVE dicts the NVD fetcher returns; descriptions are indexed
+-- with FTS5 and affected products by their CPE vendor/product pair.
+CREATE TABLE nvd_cves (
+    id INTEGER PRIMARY KEY,
+    cve_id TEXT NOT NULL UNIQUE,
+    published TEXT,
+    last_modified TEXT,
+    description TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+
+CREATE VIRTUAL TABLE nvd_cves_fts USING fts5(
+    description,
+    content='nvd_cves',
+    content_rowid='id'
+);
+
+CREATE TRIGGER nvd_cves_ai AFTER INSERT ON nvd_cves BEGIN
+    INSERT INTO nvd_cves_fts(rowid, description) VALUES (new.id, new.description);
+END;
+
+CREATE TRIGGER nvd_cves_ad AFTER DELETE ON nvd_cves BEGIN
+    INSERT INTO nvd_cves_fts(nvd_cves_fts, rowid, description)
+    VALUES ('delete', old.id, old.description);
+END;
+
+CREATE TRIGGER nvd_cves_au AFTER UPDATE OF description ON nvd_cves BEGIN
+    INSERT INTO nvd_cves_fts(nvd_cves_fts, rowid, description)
+    VALUES ('delete', old.id, old.description);
+    INSERT INTO nvd_cves_fts(rowid, description) VALUES (new.id, new.description);
+END;
+
+CREATE TABLE nvd_cpes (
+    vendor TEXT NOT NULL COLLATE NOCASE,
+    product TEXT NOT NULL COLLATE NOCASE,
+    cve_id TEXT NOT NULL,
+    PRIMARY KEY (product, vendor, cve_id)
+) WITHOUT ROWID;
+
+CREATE INDEX idx_nvd_cpes_cve_id ON nvd_cpes(cve_id);
+
+CREATE TABLE nvd_sync_state (
+    feed TEXT PRIMARY KEY,
+    last_modified TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
@@ -0,0 +1,8 @@
+-- Token-bucket state per host, shared by every process using this cache.
+-- Times are Unix epoch seconds.
+CREATE TABLE rate_limits (
+    host TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+) WITHOUT ROWID;
@@ -0,0 +1,18 @@
+-- Local index of GitHub security advisories, filled as advisory pages are
+-- fetched and by `assessor ghsa-sync`. Aliases map each CVE to the GHSA
+-- advisories that cover it so assessments can join the two offline. The
+-- sync high-water mark lives in nvd_sync_state under its own feed key.
+CREATE TABLE ghsa_advisories (
+    id INTEGER PRIMARY KEY,
+    ghsa_id TEXT NOT NULL UNIQUE,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE ghsa_aliases (
+    cve_id TEXT NOT NULL,
+    ghsa_id TEXT NOT NULL,
+    PRIMARY KEY (cve_id, ghsa_id)
+) WITHOUT ROWID;
+
+CREATE INDEX idx_ghsa_aliases_ghsa_id ON ghsa_aliases(ghsa_id);
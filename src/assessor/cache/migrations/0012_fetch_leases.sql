@@ -0,0 +1,8 @@
+-- One row per upstream fetch in progress, so processes sharing this cache
+-- let a single one of them fetch a given URL while the others wait for the
+-- result to land in `content`. Times are Unix epoch seconds.
+CREATE TABLE fetch_leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
@@ -0,0 +1,7 @@
+-- Which front end recorded an assessment. The CLI and the web API store
+-- differently shaped `data`, so readers pick one instead of mixing them.
+ALTER TABLE assessments ADD COLUMN source TEXT NOT NULL DEFAULT 'cli';
+
+UPDATE assessments SET source = 'web' WHERE json_extract(data, '$.trust_score') IS NOT NULL;
+
+CREATE INDEX idx_assessments_source ON assessments(source, created_at, id);
@@ -0,0 +1,147 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .db import get_connection
+
+NVD_FEED = "nvd-cve"
+_WORD = re.compile(r"\w+")
+
+CveRecord = Tuple[Dict[str, Any], Sequence[Tuple[str, str]]]
+
+
+def store_cves(records: Iterable[CveRecord]) -> int:
+    """Insert or replace mirrored CVEs in one transaction.
+
+    Each record is ``(cve, cpes)``: the normalized CVE dict and the
+    ``(vendor, product)`` pairs from its vulnerable CPE matches. Returns
+    the number of CVEs written.
+    """
+    count = 0
+    with get_connection() as conn:
+        for cve, cpes in records:
+            conn.execute(
+                """
+                INSERT INTO nvd_cves (cve_id, published, last_modified, description, data)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cve_id) DO UPDATE SET
+                    published=excluded.published,
+                    last_modified=excluded.last_modified,
+                    description=excluded.description,
+                    data=excluded.data
+                """,
+                (
+                    cve["id"],
+                    cve.get("published"),
+                    cve.get("last_modified"),
+                    cve.get("description") or "",
+                    json.dumps(cve),
+                ),
+            )
+            conn.execute("DELETE FROM nvd_cpes WHERE cve_id = ?", (cve["id"],))
+            conn.executemany(
+                "INSERT OR IGNORE INTO nvd_cpes (vendor, product, cve_id) VALUES (?, ?, ?)",
+                [(vendor, product, cve["id"]) for vendor, product in cpes],
+            )
+            count += 1
+    return count
+
+
+def get_sync_state(feed: str = NVD_FEED) -> Optional[str]:
+    """``lastModified`` high-water mark of ``feed``'s last completed sync, if any."""
+    with get_connection(readonly=True) as conn:
+        row = conn.execute(
+            "SELECT last_modified FROM nvd_sync_state WHERE feed = ?", (feed,)
+        ).fetchone()
+    return None if row is None else row["last_modified"]
+
+
+def get_synced_at(feed: str = NVD_FEED) -> Optional[str]:
+    """UTC time (``YYYY-MM-DD HH:MM:SS``) ``feed`` last completed a sync window, if ever."""
+    with get_connection(readonly=True) as conn:
+        row = conn.execute(
+            "SELECT synced_at FROM nvd_sync_state WHERE feed = ?", (feed,)
+        ).fetchone()
+    return None if row is None else row["synced_at"]
+
+
+def set_sync_state(last_modified: str, feed: str = NVD_FEED) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO nvd_sync_state (feed, last_modified, synced_at)
+            VALUES (?, ?, datetime('now'))
+            ON CONFLICT(feed) DO UPDATE SET
+                last_modified=excluded.last_modified,
+                synced_at=excluded.synced_at
+            """,
+            (feed, last_modified),
+        )
+
+
+def mirror_stats() -> Dict[str, Any]:
+    with get_connection(readonly=True) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM nvd_cves").fetchone()[0]
+        state = conn.execute(
+            "SELECT last_modified, synced_at FROM nvd_sync_state WHERE feed = ?", (NVD_FEED,)
+        ).fetchone()
+    return {
+        "cves": count,
+        "last_modified": state["last_modified"] if state else None,
+        "synced_at": state["synced_at"] if state else None,
+    }
+
+
+def _cpe_name(value: str) -> str:
+    return "_".join(_WORD.findall(value.lower()))
+
+
+def _fts_phrase(value: str) -> Optional[str]:
+    words = _WORD.findall(value)
+    if not words:
+        return None
+    return '"' + " ".join(words) + '"'
+
+
+def search_cves(
+    product: str,
+    vendor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Mirrored CVEs for ``product``, newest first.
+
+    Matches CVEs whose CPE configurations name the product (and vendor,
+    when given) plus CVEs whose description contains the product name as
+    a phrase.
+    """
+    cpe_clause = "product = ?"
+    params: List[Any] = [_cpe_name(product)]
+    if vendor:
+        cpe_clause += " AND vendor = ?"
+        params.append(_cpe_name(vendor))
+
+    phrase = _fts_phrase(product)
+    fts_sql = ""
+    if phrase:
+        fts_sql = "UNION SELECT rowid FROM nvd_cves_fts WHERE nvd_cves_fts MATCH ?"
+        params.append(phrase)
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT ?"
+        params.append(limit)
+
+    with get_connection(readonly=True) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT data FROM nvd_cves
+            WHERE id IN (
+                SELECT nvd_cves.id FROM nvd_cpes JOIN nvd_cves USING (cve_id)
+                WHERE {cpe_clause}
+                {fts_sql}
+            )
+            ORDER BY published DESC, cve_id DESC
+            {limit_sql}
+            """,
+            params,
+        ).fetchall()
+    return [json.loads(row["data"]) for row in rows]
@@ -1,12 +1,15 @@
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Union
 
-from .db import get_connection
+from .bundle import Bundle, write_bundle
+from .db import get_bundle, get_connection, get_manager, snapshot_chain
 
 _SNAPSHOT_META = Path(__file__).resolve().parent / "snapshot.json"
 
+_ENTRY_COLUMNS = "url, sha256, retrieved_at, etag, last_modified, cache_control"
+
 
 def current_snapshot() -> Optional[str]:
     if not _SNAPSHOT_META.exists():
@@ -15,7 +18,51 @@ def current_snapshot() -> Optional[str]:
     return data.get("snapshot_id")
 
 
-def create_snapshot(snapshot_id: str, dependency_lock: dict) -> None:
+def _resolved_entries(conn, snapshot_id: str) -> Dict[str, dict]:
+    """Every URL visible in ``snapshot_id``, resolved along its parent chain."""
+    resolved: Dict[str, dict] = {}
+    for member in snapshot_chain(conn, snapshot_id):
+        for row in conn.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM snapshot_entries WHERE snapshot_id = ?", (member,)
+        ):
+            resolved.setdefault(row["url"], dict(row, snapshot_id=member))
+    return resolved
+
+
+def _resolved_facts(conn, snapshot_id: str) -> List[dict]:
+    """Facts visible in ``snapshot_id``, resolved along its parent chain.
+
+    Like content, each URL's facts come from the nearest snapshot in the
+    chain that has any; they are tagged with ``snapshot_id``.
+    """
+    resolved: Dict[Optional[str], List[dict]] = {}
+    for member in snapshot_chain(conn, snapshot_id):
+        found: Dict[Optional[str], List[dict]] = {}
+        for row in conn.execute(
+            """
+            SELECT facts.*, content.url AS url
+            FROM facts LEFT JOIN content ON content.id = facts.content_id
+            WHERE facts.snapshot_id = ?
+            """,
+            (member,),
+        ):
+            found.setdefault(row["url"], []).append(dict(row, snapshot_id=snapshot_id))
+        for url, facts in found.items():
+            resolved.setdefault(url, facts)
+    return [fact for facts in resolved.values() for fact in facts]
+
+
+def create_snapshot(
+    snapshot_id: str,
+    dependency_lock: dict,
+    parent_id: Optional[str] = None,
+) -> None:
+    """Record the current cache contents as ``snapshot_id``.
+
+    With ``parent_id`` only URLs whose sha256 differs from what the parent
+    chain resolves to are stored; everything else is read through the
+    parent.
+    """
     payload = {
         "snapshot_id": snapshot_id,
         "created_at": datetime.utcnow().isoformat(),
@@ -23,6 +70,120 @@ def create_snapshot(snapshot_id: str, dependency_lock: dict) -> None:
     }
     _SNAPSHOT_META.write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO snapshots (snapshot_id, created_at, dependency_lock, parent_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(snapshot_id) DO NOTHING
+            """,
+            (snapshot_id, payload["created_at"], json.dumps(dependency_lock), parent_id),
+        )
+        inherited = _resolved_entries(conn, parent_id) if parent_id else {}
+        changed = [
+            (snapshot_id, *row)
+            for row in conn.execute(f"SELECT {_ENTRY_COLUMNS} FROM content")
+            if inherited.get(row["url"], {}).get("sha256") != row["sha256"]
+        ]
+        conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO snapshot_entries (snapshot_id, {_ENTRY_COLUMNS})
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            changed,
+        )
+
+
+def pin_snapshot(snapshot_id: str, pinned: bool = True) -> None:
+    """Protect ``snapshot_id`` (and its ancestors) from garbage collection."""
+    with get_connection() as conn:
+        updated = conn.execute(
+            "UPDATE snapshots SET pinned = ? WHERE snapshot_id = ?", (int(pinned), snapshot_id)
+        ).rowcount
+    if not updated:
+        raise ValueError(f"unknown snapshot: {snapshot_id}")
+
+
+def compact_snapshot(snapshot_id: str) -> int:
+    """Flatten ``snapshot_id`` so it no longer depends on its parents.
+
+    Copies every inherited entry into the snapshot and clears its parent
+    pointer. Returns the number of entries copied.
+    """
+    with get_connection() as conn:
+        inherited = [
+            (snapshot_id, *(row[column] for column in _ENTRY_COLUMNS.split(", ")))
+            for row in _resolved_entries(conn, snapshot_id).values()
+            if row["snapshot_id"] != snapshot_id
+        ]
+        conn.executemany(
+            f"""
+            INSERT OR IGNORE INTO snapshot_entries (snapshot_id, {_ENTRY_COLUMNS})
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            inherited,
+        )
+        conn.execute("UPDATE snapshots SET parent_id = NULL WHERE snapshot_id = ?", (snapshot_id,))
+    get_manager().memory.clear()
+    return len(inherited)
+
+
+def compact_chains(max_depth: int) -> List[str]:
+    """Flatten every snapshot whose parent chain is longer than ``max_depth``."""
+    with get_connection(readonly=True) as conn:
+        snapshot_ids = [
+            row[0]
+            for row in conn.execute("SELECT snapshot_id FROM snapshots WHERE parent_id IS NOT NULL")
+        ]
+        deep = [
+            snapshot_id
+            for snapshot_id in snapshot_ids
+            if len(snapshot_chain(conn, snapshot_id)) - 1 > max_depth
+        ]
+    for snapshot_id in deep:
+        compact_snapshot(snapshot_id)
+    return deep
+
+
+def export_snapshot(snapshot_id: str, path: Union[str, Path]) -> Path:
+    """Pack every content body and fact of ``snapshot_id`` into one bundle file.
+
+    Delta snapshots, bodies and facts alike, are resolved along their
+    parent chain, so the bundle is self-contained and immutable; see
+    :func:`import_snapshot`. Its facts are served by ``facts_for``.
+    """
+    with get_connection(readonly=True) as conn:
+        snapshot = conn.execute(
+            "SELECT created_at, dependency_lock FROM snapshots WHERE snapshot_id = ?",
+            (snapshot_id,),
+        ).fetchone()
+        rows = list(_resolved_entries(conn, snapshot_id).values())
+        if snapshot is None and not rows:
+            raise ValueError(f"unknown snapshot: {snapshot_id}")
+        shas = sorted({row["sha256"] for row in rows})
+        blobs = (
+            conn.execute("SELECT sha256, codec, size, data FROM blobs WHERE sha256 = ?", (sha256,))
+            .fetchone()
+            for sha256 in shas
+        )
+        facts = _resolved_facts(conn, snapshot_id)
+        meta = {
+            "snapshot_id": snapshot_id,
+            "created_at": snapshot["created_at"] if snapshot else datetime.utcnow().isoformat(),
+            "dependency_lock": json.loads(snapshot["dependency_lock"]) if snapshot else {},
+        }
+        return write_bundle(Path(path), meta, rows, blobs, facts)
+
+
+def import_snapshot(path: Union[str, Path]) -> str:
+    """Register a bundle written by :func:`export_snapshot` and return its snapshot ID.
+
+    The file is used in place: reads for the snapshot are served from a
+    memory map of it, so it must stay where it is.
+    """
+    path = Path(path).resolve()
+    bundle = Bundle(path)
+    snapshot_id = bundle.snapshot_id
     with get_connection() as conn:
         conn.execute(
             """
@@ -30,5 +191,21 @@ def create_snapshot(snapshot_id: str, dependency_lock: dict) -> None:
             VALUES (?, ?, ?)
             ON CONFLICT(snapshot_id) DO NOTHING
             """,
-            (snapshot_id, payload["created_at"], json.dumps(dependency_lock)),
-        )
\ No newline at end of file
+            (snapshot_id, bundle.meta["created_at"], json.dumps(bundle.meta["dependency_lock"])),
+        )
+        conn.execute(
+            """
+            INSERT INTO bundles (snapshot_id, path, imported_at)
+            VALUES (?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+            ON CONFLICT(snapshot_id) DO UPDATE SET
+                path=excluded.path,
+                imported_at=excluded.imported_at
+            """,
+            (snapshot_id, str(path)),
+        )
+    bundle.close()
+    # Opens the new file and drops the previous one, here and (on their
+    # next read) in every other process sharing the cache.
+    get_bundle(snapshot_id)
+    get_manager().memory.clear()
+    return snapshot_id
@@ -0,0 +1,64 @@
+import time
+from typing import Optional
+
+from .db import get_connection
+
+
+def reserve(host: str, capacity: float, rate: float, now: Optional[float] = None) -> float:
+    """Take one token from ``host``'s bucket; returns seconds to wait before sending.
+
+    The bucket holds up to ``capacity`` tokens and refills at ``rate``
+    tokens per second. Tokens may go negative: each caller reserves its
+    slot in the queue and sleeps for its own delay, so the read-modify-write
+    happens once per request inside a single write transaction, which
+    serialises callers across threads and processes.
+    """
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT tokens, updated_at, blocked_until FROM rate_limits WHERE host = ?", (host,)
+        ).fetchone()
+        if row is None:
+            tokens, updated_at, blocked_until = capacity, now, 0.0
+        else:
+            tokens, updated_at, blocked_until = row["tokens"], row["updated_at"], row["blocked_until"]
+        # Nothing refills while the host has told us to back off.
+        refill_from = max(updated_at, blocked_until)
+        if now > refill_from:
+            tokens = min(capacity, tokens + (now - refill_from) * rate)
+            updated_at = now
+        tokens -= 1
+        wait = max(0.0, blocked_until - now) + (max(0.0, -tokens) / rate if tokens < 0 else 0.0)
+        conn.execute(
+            """
+            INSERT INTO rate_limits (host, tokens, updated_at, blocked_until)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(host) DO UPDATE SET
+                tokens=excluded.tokens,
+                updated_at=excluded.updated_at,
+                blocked_until=excluded.blocked_until
+            """,
+            (host, tokens, max(updated_at, now), blocked_until),
+        )
+    return wait
+
+
+def block(host: str, until: float, now: Optional[float] = None) -> None:
+    """Stop handing out tokens for ``host`` until the epoch time ``until``.
+
+    The bucket is reset to a single token, so requests resume one at a
+    time at ``until`` rather than in a burst.
+    """
+    now = time.time() if now is None else now
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO rate_limits (host, tokens, updated_at, blocked_until)
+            VALUES (?, 1, ?, ?)
+            ON CONFLICT(host) DO UPDATE SET
+                tokens=1,
+                updated_at=excluded.updated_at,
+                blocked_until=MAX(blocked_until, excluded.blocked_until)
+            """,
+            (host, now, until),
+        )
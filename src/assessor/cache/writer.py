@@ -0,0 +1,184 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from .db import record_facts, upsert_contents
+
+_MAX_BATCH = 500
+_FLUSH_INTERVAL = 1.0
+# Fetch-path writes are awaited by their callers, so the shared writer does
+# not linger: it commits whatever is queued at once.
+_SHARED_FLUSH_INTERVAL = 0.0
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Queue content and fact writes and flush them from a worker thread.
+
+    Writes are grouped into one :func:`upsert_contents` and one
+    :func:`record_facts` call per batch. A batch is flushed once it holds
+    ``max_batch`` items or ``flush_interval`` seconds after its first item,
+    whichever comes first; writes already waiting in the queue always join
+    the current batch, so with no interval concurrent writes still share
+    a transaction. Every ``queue_*`` call returns a future that
+    resolves to the assigned row ID. A fact may pass the future of a queued
+    content row as its ``content_id``.
+    """
+
+    def __init__(self, max_batch: int = _MAX_BATCH, flush_interval: float = _FLUSH_INTERVAL):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="cache-writer", daemon=True)
+        self._thread.start()
+
+    def queue_content(
+        self,
+        url: str,
+        raw: bytes,
+        snapshot_id: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Future:
+        future: Future = Future()
+        self._queue.put(("content", (url, raw, snapshot_id, headers), future))
+        return future
+
+    def queue_fact(
+        self,
+        content_id: Union[int, Future],
+        claim: str,
+        parser_id: str,
+        source_type: str,
+        payload: Dict[str, Any],
+        snapshot_id: Optional[str] = None,
+        product: Optional[str] = None,
+    ) -> Future:
+        future: Future = Future()
+        fact = {
+            "content_id": content_id,
+            "claim": claim,
+            "parser_id": parser_id,
+            "source_type": source_type,
+            "payload": payload,
+            "snapshot_id": snapshot_id,
+            "product": product,
+        }
+        self._queue.put(("fact", fact, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until everything queued before this call is written."""
+        done = threading.Event()
+        self._queue.put(("flush", done, None))
+        done.wait(timeout)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self) -> None:
+        batch: List[Tuple[str, Any, Any]] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+            while items and len(batch) + len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in items:
+                if item is _STOP:
+                    self._write(batch)
+                    return
+                if item[0] == "flush":
+                    self._write(batch)
+                    batch, deadline = [], None
+                    item[1].set()
+                    continue
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) >= self.max_batch:
+                    self._write(batch)
+                    batch, deadline = [], None
+            if deadline is not None and time.monotonic() >= deadline:
+                self._write(batch)
+                batch, deadline = [], None
+
+    @staticmethod
+    def _write(batch: List[Tuple[str, Any, Any]]) -> None:
+        # A caller that stopped waiting (an awaiting task was cancelled)
+        # still has its row written; only its future is left alone.
+        claimed = [
+            (kind, payload, future if future.set_running_or_notify_cancel() else None)
+            for kind, payload, future in batch
+        ]
+        contents = [(payload, future) for kind, payload, future in claimed if kind == "content"]
+        facts = [(payload, future) for kind, payload, future in claimed if kind == "fact"]
+        _resolve(upsert_contents, contents)
+        ready = []
+        for fact, future in facts:
+            if isinstance(fact["content_id"], Future):
+                try:
+                    fact["content_id"] = fact["content_id"].result(timeout=0)
+                except Exception as exc:
+                    if future is not None:
+                        future.set_exception(exc)
+                    continue
+            ready.append((fact, future))
+        _resolve(record_facts, ready)
+
+
+def _resolve(write, pending: List[Tuple[Any, Optional[Future]]]) -> None:
+    if not pending:
+        return
+    try:
+        ids = write(item for item, _ in pending)
+    except Exception as exc:
+        for _, future in pending:
+            if future is not None:
+                future.set_exception(exc)
+        return
+    for (_, future), row_id in zip(pending, ids):
+        if future is not None:
+            future.set_result(row_id)
+
+
+_WRITER: Optional[BackgroundWriter] = None
+_WRITER_LOCK = threading.Lock()
+_WRITER_PID = os.getpid()
+
+
+def get_writer() -> BackgroundWriter:
+    """Return the process-wide background writer, starting it on first use.
+
+    This is the writer :func:`assessor.cache.aio.upsert_content` queues
+    fetched bodies on.
+    """
+    global _WRITER, _WRITER_PID
+    with _WRITER_LOCK:
+        if _WRITER_PID != os.getpid():
+            # The worker thread does not survive fork; start a fresh one.
+            _WRITER, _WRITER_PID = None, os.getpid()
+        if _WRITER is None:
+            _WRITER = BackgroundWriter(flush_interval=_SHARED_FLUSH_INTERVAL)
+        return _WRITER
+
+
+def _close_writer() -> None:
+    if _WRITER is not None and _WRITER_PID == os.getpid():
+        _WRITER.close()
+
+
+atexit.register(_close_writer)
@@ -2,17 +2,34 @@ import json as json_module
 from typing import Optional
 import typer
 
-from assessor.fetchers.cisa_kev import fetch_cisa_kev_sync
-from assessor.fetchers.nvd import fetch_cves_sync
-from assessor.fetchers.vendor_psirt import fetch_vendor_posture_sync  # NEW
+from assessor.fetchers.gather import assessment_sources, gather_sources_sync
+from assessor.fetchers.github_advisories import annotate_cves, sync_advisories_sync
+from assessor.fetchers.nvd import sync_mirror_sync
 from assessor.parsers.controls import parse_controls_from_text  # NEW
 from assessor.parsers.compliance import parse_compliance_from_text  # NEW
 from assessor.resolver.resolver import resolve_entity
 from assessor.scoring.engine import calculate_trust_score
 from assessor.summarize.summarize import generate_brief
 from assessor.alternatives.suggest import suggest_alternatives, generate_alternatives_brief
+from assessor.cache.db import get_assessment_history, record_assessment
+from assessor.cache.gc import collect_garbage
+from assessor.cache.snapshot import (
+    compact_chains,
+    compact_snapshot,
+    export_snapshot,
+    import_snapshot,
+    pin_snapshot,
+)
+
+_SOURCE_LABELS = {
+    "nvd_cves": "NVD",
+    "cisa_kev": "CISA KEV",
+    "vendor_posture": "Vendor posture",
+}
 
 app = typer.Typer(help="WithSecure Assessor CLI")
+snapshot_app = typer.Typer(help="Manage evidence snapshots.")
+app.add_typer(snapshot_app, name="snapshot")
 
 
 @app.command()
@@ -36,30 +53,49 @@ def assess(
         typer.secho("Unable to resolve entity with provided inputs.", fg=typer.colors.RED, err=True)
         raise typer.Exit(code=1)
 
+    # Fetch every source concurrently; a failing source leaves its signal empty
+    results = gather_sources_sync(
+        assessment_sources(
+            result.product,
+            vendor=result.vendor,
+            homepage=result.homepage,
+            offline=offline,
+            snapshot_id=snapshot_opt,
+        )
+    )
+    for name, outcome in results.items():
+        if not outcome.ok:
+            typer.secho(
+                f"{_SOURCE_LABELS[name]} fetch failed: {outcome.error}",
+                fg=typer.colors.YELLOW,
+                err=True,
+            )
+        elif outcome.stale:
+            oldest = min(item["retrieved_at"] for item in outcome.stale)
+            typer.secho(
+                f"{_SOURCE_LABELS[name]} unreachable; using cached data from {oldest}",
+                fg=typer.colors.YELLOW,
+                err=True,
+            )
+
     signals = {}
-    
-    # Fetch CVE data
-    try:
-        signals["nvd_cves"] = fetch_cves_sync(result.product, offline=offline, snapshot_id=snapshot_opt)
-    except Exception as exc:
-        typer.secho(f"NVD fetch failed: {exc}", fg=typer.colors.YELLOW, err=True)
-        signals["nvd_cves"] = []
+    signals["nvd_cves"] = results["nvd_cves"].value or []
 
-    # Fetch CISA KEV data
-    try:
-        signals["cisa_kev"] = fetch_cisa_kev_sync(offline=offline, snapshot_id=snapshot_opt)
-    except Exception as exc:
-        typer.secho(f"CISA KEV fetch failed: {exc}", fg=typer.colors.YELLOW, err=True)
-        signals["cisa_kev"] = []
+    # Flag the product's CVEs that appear in CISA KEV; only their catalog
+    # entries are kept, not the whole catalog
+    kev_index = results["cisa_kev"].value
+    signals["cisa_kev"] = []
+    if kev_index is not None:
+        signals["cisa_kev"] = kev_index.entries_for(cve.get("id") for cve in signals["nvd_cves"])
+        signals["nvd_cves"] = kev_index.annotate(signals["nvd_cves"])
 
-    # Fetch vendor posture (NEW)
+    # Join GitHub advisories from the local alias index (no network)
     try:
-        signals["vendor_posture"] = fetch_vendor_posture_sync(
-            result.homepage, result.vendor, offline=offline, snapshot_id=snapshot_opt
-        )
+        signals["nvd_cves"] = annotate_cves(signals["nvd_cves"])
     except Exception as exc:
-        typer.secho(f"Vendor posture fetch failed: {exc}", fg=typer.colors.YELLOW, err=True)
-        signals["vendor_posture"] = {}
+        typer.secho(f"GitHub advisory lookup failed: {exc}", fg=typer.colors.YELLOW, err=True)
+
+    signals["vendor_posture"] = results["vendor_posture"].value or {}
 
     # Parse controls/compliance from known data (NEW)
     # In a real system, this would fetch ToS/security pages
@@ -77,14 +113,29 @@ def assess(
         count=2
     )
 
+    payload = {
+        "entity": result.dict(),
+        "signals": signals,
+        "score": score,
+        "alternatives": alternatives,
+        "context": {
+            "offline": offline,
+            "snapshot": snapshot_opt,
+            "sources": {name: outcome.to_dict() for name, outcome in results.items()},
+        },
+    }
+    try:
+        record_assessment(
+            result.product,
+            payload,
+            vendor=result.vendor,
+            score=score["total_score"],
+            snapshot_id=snapshot_opt,
+        )
+    except Exception as exc:
+        typer.secho(f"Recording assessment failed: {exc}", fg=typer.colors.YELLOW, err=True)
+
     if json_output:
-        payload = {
-            "entity": result.dict(),
-            "signals": signals,
-            "score": score,
-            "alternatives": alternatives,
-            "context": {"offline": offline, "snapshot": snapshot_opt},
-        }
         typer.echo(json_module.dumps(payload, indent=2, ensure_ascii=False))
     else:
         brief = generate_brief(result.dict(), signals, score)
@@ -114,6 +165,132 @@ def _get_known_compliance(product_name: str) -> dict:
     return known_compliance.get(product_name.lower(), {})
 
 
+@app.command()
+def history(
+    limit: int = 10,
+    before: str = "",
+    product: str = "",
+    vendor: str = "",
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+):
+    """List recorded assessments, newest first."""
+    try:
+        items, next_cursor = get_assessment_history(
+            limit=max(limit, 1),
+            before=before or None,
+            product=product or None,
+            vendor=vendor or None,
+            min_score=min_score,
+            max_score=max_score,
+        )
+    except ValueError as exc:
+        typer.secho(str(exc), fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    for item in items:
+        score = "-" if item["score"] is None else f"{item['score']:.0f}"
+        typer.echo(f"{item['created_at']}  {score:>3}  {item['product']} ({item['vendor'] or 'unknown'})")
+    if next_cursor:
+        typer.echo(f"More: --before '{next_cursor}'")
+
+
+@app.command("nvd-sync")
+def nvd_sync(full: bool = False):
+    """Update the local NVD mirror used for CVE lookups.
+
+    The first run downloads every CVE and can take a while; later runs
+    fetch only what changed since the previous sync.
+    """
+    try:
+        report = sync_mirror_sync(full=full)
+    except Exception as exc:
+        typer.secho(f"NVD sync failed: {exc}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    kind = "Full" if report["full"] else "Incremental"
+    typer.echo(
+        f"{kind} sync stored {report['cves']} CVEs in {report['windows']} window(s); "
+        f"mirror current to {report['last_modified']}"
+    )
+
+
+@app.command("ghsa-sync")
+def ghsa_sync(full: bool = False):
+    """Update the local GitHub advisory index joined against CVEs."""
+    try:
+        report = sync_advisories_sync(full=full)
+    except Exception as exc:
+        typer.secho(f"GitHub advisory sync failed: {exc}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    kind = "Full" if report["full"] else "Incremental"
+    typer.echo(
+        f"{kind} sync indexed {report['advisories']} advisories from {report['pages']} page(s); "
+        f"index current to {report['updated_at']}"
+    )
+
+
+@snapshot_app.command("export")
+def snapshot_export(snapshot_id: str, path: str):
+    """Pack a snapshot's evidence into one immutable bundle file."""
+    try:
+        written = export_snapshot(snapshot_id, path)
+    except ValueError as exc:
+        typer.secho(str(exc), fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"Exported {snapshot_id} to {written}")
+
+
+@snapshot_app.command("import")
+def snapshot_import(path: str):
+    """Register a snapshot bundle for offline use."""
+    snapshot_id = import_snapshot(path)
+    typer.echo(f"Imported snapshot {snapshot_id}")
+
+
+@snapshot_app.command("compact")
+def snapshot_compact(snapshot_id: str = "", max_depth: int = 7):
+    """Flatten delta snapshot chains.
+
+    With SNAPSHOT_ID flattens that snapshot; otherwise flattens every
+    snapshot whose parent chain is deeper than --max-depth.
+    """
+    if snapshot_id:
+        copied = compact_snapshot(snapshot_id)
+        typer.echo(f"Compacted {snapshot_id} ({copied} inherited entries copied)")
+        return
+    for compacted in compact_chains(max_depth):
+        typer.echo(f"Compacted {compacted}")
+
+
+@snapshot_app.command("pin")
+def snapshot_pin(snapshot_id: str, unpin: bool = False):
+    """Protect a snapshot from garbage collection (or release it with --unpin)."""
+    try:
+        pin_snapshot(snapshot_id, pinned=not unpin)
+    except ValueError as exc:
+        typer.secho(str(exc), fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"{'Unpinned' if unpin else 'Pinned'} {snapshot_id}")
+
+
+@app.command()
+def gc(max_bytes: int = 0):
+    """Evict expired and over-budget cache entries, then vacuum."""
+    report = collect_garbage(max_bytes=max_bytes or None)
+    typer.echo(
+        f"Reclaimed {report['bytes_reclaimed']} bytes in {report['duration_seconds']}s "
+        f"({report['content_removed']} content, {report['entries_removed']} snapshot entries, "
+        f"{report['snapshots_removed']} snapshots, {report['facts_removed']} facts, "
+        f"{report['blobs_removed']} blobs removed)"
+    )
+    if report["over_budget"]:
+        typer.secho(
+            f"Cache is still over budget: {report['pinned_bytes']} of "
+            f"{report['blob_bytes']} blob bytes are held by pinned snapshots.",
+            fg=typer.colors.YELLOW,
+            err=True,
+        )
+
+
 @app.command()
 def version():
     """Show version information."""
@@ -2,6 +2,8 @@
 
 # Configuration settings for the application
 
+import os
+
 class Config:
     DEBUG = False
     TESTING = False
@@ -10,8 +12,57 @@ class Config:
     CACHE_DEFAULT_TIMEOUT = 300
     TIMEOUT = 10
     RETRIES = 3
+    # Per-source budget for one assessment; a source still running is reported as timed out.
+    SOURCE_TIMEOUTS = {
+        'nvd_cves': 60.0,
+        'cisa_kev': 30.0,
+        'vendor_posture': 20.0,
+    }
     RATE_LIMIT = '100/hour'
+    # Shared HTTP client pools (one per host); HTTP/2 is used when `h2` is installed
+    HTTP_MAX_CONNECTIONS_PER_HOST = 10
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = 5
+    HTTP_KEEPALIVE_EXPIRY = 30.0
+    HTTP_USER_AGENT = 'withsecure-assessor/0.1.0'
+    # Reproducible runs without the network: replay upstream exchanges from a
+    # cassette file (or record them into it with mode 'record'), or send every
+    # request to a stand-in server (scripts/standin_server.py).
+    HTTP_CASSETTE = os.environ.get('ASSESSOR_HTTP_CASSETTE')
+    HTTP_CASSETTE_MODE = os.environ.get('ASSESSOR_HTTP_CASSETTE_MODE', 'replay')
+    HTTP_STANDIN_URL = os.environ.get('ASSESSOR_HTTP_STANDIN')
+    # Per-host request budgets as (requests, per seconds), shared across processes
+    # through the cache database. Hosts not listed are not throttled.
+    HOST_RATE_LIMITS = {
+        'services.nvd.nist.gov': (5, 30.0),
+        'api.github.com': (60, 3600.0),
+    }
+    NVD_API_KEY = os.environ.get('NVD_API_KEY')
+    NVD_KEYED_RATE_LIMIT = (50, 30.0)
+    # A local NVD mirror not synced for this long is bypassed for live lookups.
+    NVD_MIRROR_MAX_AGE = 2 * 86400
+    GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+    GITHUB_KEYED_RATE_LIMIT = (5000, 3600.0)
+    RETRY_BACKOFF_BASE = 0.5
+    RETRY_BACKOFF_MAX = 60.0
+    # Consecutive failed requests that open a host's circuit breaker, and
+    # how long it stays open before a half-open probe is let through.
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RESET_TIMEOUT = 30.0
+    # Cross-process single-flight: how long a fetch lease is honoured before
+    # another process may take over, and how often waiters check on it.
+    FETCH_LEASE_TTL = 60.0
+    FETCH_LEASE_POLL = 0.25
     EVIDENCE_CACHE_TTL = 86400  # 1 day
+    STALE_WHILE_REVALIDATE = 3600  # serve stale for up to 1h past TTL while refreshing
+    MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    CACHE_MAX_BYTES = 512 * 1024 * 1024
+    # Cached content older than this (per host) is dropped by `assessor gc`
+    CACHE_SOURCE_TTLS = {
+        "services.nvd.nist.gov": 30 * 86400,
+        "www.cisa.gov": 7 * 86400,
+        "api.github.com": 30 * 86400,
+    }
+    CACHE_DEFAULT_SOURCE_TTL = 90 * 86400
     SNAPSHOT_MODE = False
 
 class DevelopmentConfig(Config):
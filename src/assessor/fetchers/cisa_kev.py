@@ -1,85 +1,254 @@
-import asyncio
+import functools
 import json
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional
 
 import httpx
 
-from assessor.cache.db import get_cached_content, upsert_content
+from assessor.cache.blobs import LazyBlob
+from assessor.cache.aio import get_cached_payload
+from assessor.fetchers.revalidate import fetch_revalidated
+from assessor.parsers.json_stream import ArrayStream, iter_array, iter_bytes
+from assessor.utils.http import get_with_retries, run_sync
 
 _API_URL = "https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json"
 _FIXTURE = Path(__file__).resolve().parents[3] / "tests/fixtures/api/cisa_kev_sample.json"
 _MAX_RETRIES = 3
-_BACKOFF = 0.5
 _TIMEOUT = 15.0
+_INDEX_VERSIONS_KEPT = 4
+# The catalog array; older snapshots of the feed used "cisa_kev".
+_ARRAY_KEYS = ("vulnerabilities", "cisa_kev")
 
 
 def _load_fixture() -> Dict[str, Any]:
     return json.loads(_FIXTURE.read_text(encoding="utf-8"))
 
 
-def _decode_raw(raw: Any) -> Dict[str, Any]:
-    if isinstance(raw, (bytes, bytearray, memoryview)):
-        raw = bytes(raw)
-    return json.loads(raw)
+def _body_chunks(raw: Any) -> Iterator[Any]:
+    if isinstance(raw, LazyBlob):
+        return raw.iter_chunks()
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    return iter_bytes(raw)
+
+
+def _normalize_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": item.get("id") or item.get("cveID"),
+        "name": item.get("name"),
+        "description": item.get("description"),
+        "cvss": item.get("cvss", {}),
+        "published": item.get("publishedDate") or item.get("dateAdded"),
+        "last_modified": item.get("lastModifiedDate") or item.get("dueDate"),
+        "references": item.get("references", []),
+    }
 
 
 def _normalize(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    kev_entries = payload.get("cisa_kev") or payload.get("vulnerabilities") or []
-    normalized: List[Dict[str, Any]] = []
-    for item in kev_entries:
-        normalized.append(
-            {
-                "id": item.get("id") or item.get("cveID"),
-                "name": item.get("name"),
-                "description": item.get("description"),
-                "cvss": item.get("cvss", {}),
-                "published": item.get("publishedDate") or item.get("dateAdded"),
-                "last_modified": item.get("lastModifiedDate") or item.get("dueDate"),
-                "references": item.get("references", []),
-            }
-        )
-    return normalized
-
-
-async def _http_get(url: str) -> httpx.Response:
-    attempt = 0
-    while True:
-        try:
-            async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-                response = await client.get(url)
-            response.raise_for_status()
-            return response
-        except httpx.HTTPError:
-            attempt += 1
-            if attempt >= _MAX_RETRIES:
-                raise
-            await asyncio.sleep(_BACKOFF * attempt)
+    return [_normalize_entry(item) for item in _vulnerabilities(payload)]
+
+
+def _ordinal(value: Optional[str]) -> int:
+    try:
+        return date.fromisoformat(value[:10]).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+
+def _iso(ordinal: int) -> Optional[str]:
+    return date.fromordinal(ordinal).isoformat() if ordinal else None
+
+
+class KevIndex:
+    """The KEV catalog indexed for joins against CVE lists.
+
+    ``ids`` is a frozen set of catalog CVE IDs. Per-entry attributes are
+    kept column-wise in typed arrays (dates as proleptic ordinals, 0 when
+    missing), addressed through one ``cve_id -> row`` dict, so annotating
+    a product's CVEs is a single pass of hash lookups. Build it through
+    :meth:`from_body` or :meth:`from_payload`, which reuse the index for a
+    catalog version they have already seen.
+    """
+
+    _by_version: "OrderedDict[str, KevIndex]" = OrderedDict()
+    _by_version_lock = threading.Lock()
+
+    def __init__(
+        self,
+        version: Optional[str],
+        vulnerabilities: Iterable[Dict[str, Any]],
+        reread: Optional[Callable[[], Iterable[Dict[str, Any]]]] = None,
+    ):
+        """Index ``vulnerabilities`` in one pass.
+
+        ``reread`` produces the catalog again for :attr:`entries`; when
+        given, ``vulnerabilities`` may be a one-shot stream and is not
+        kept. Otherwise it is held as a list.
+        """
+        if reread is None:
+            vulnerabilities = list(vulnerabilities)
+            reread = functools.partial(iter, vulnerabilities)
+        self.version = version
+        self._reread = reread
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._rows: Dict[str, int] = {}
+        self.date_added = array("l")
+        self.due_date = array("l")
+        self.ransomware = array("b")
+        for item in vulnerabilities:
+            cve_id = item.get("cveID") or item.get("id")
+            if not cve_id or cve_id in self._rows:
+                continue
+            self._rows[cve_id] = len(self.date_added)
+            self.date_added.append(_ordinal(item.get("dateAdded") or item.get("publishedDate")))
+            self.due_date.append(_ordinal(item.get("dueDate")))
+            self.ransomware.append(
+                1 if str(item.get("knownRansomwareCampaignUse", "")).lower() == "known" else 0
+            )
+        self.ids: FrozenSet[str] = frozenset(self._rows)
+
+    @classmethod
+    def _memoized(cls, version: Optional[str], build: Callable[[], "KevIndex"]) -> "KevIndex":
+        if version is None:
+            return build()
+        with cls._by_version_lock:
+            index = cls._by_version.get(version)
+            if index is not None:
+                cls._by_version.move_to_end(version)
+                return index
+        index = build()
+        with cls._by_version_lock:
+            cls._by_version[version] = index
+            while len(cls._by_version) > _INDEX_VERSIONS_KEPT:
+                cls._by_version.popitem(last=False)
+        return index
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "KevIndex":
+        version = payload.get("catalogVersion")
+        return cls._memoized(version, lambda: cls(version, _vulnerabilities(payload)))
+
+    @classmethod
+    def from_body(cls, raw: Any) -> "KevIndex":
+        """Index a catalog body (bytes or a cached blob) without decoding it whole.
+
+        Entries are parsed one at a time from the stream; ``catalogVersion``
+        precedes them in the feed, so a version already indexed is returned
+        without reading further.
+        """
+        stream = ArrayStream(_body_chunks(raw), _ARRAY_KEYS)
+        version = stream.read_header().get("catalogVersion")
+
+        def reread() -> Iterator[Dict[str, Any]]:
+            return iter_array(_body_chunks(raw), _ARRAY_KEYS)
+
+        return cls._memoized(version, lambda: cls(version, stream, reread))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, cve_id: object) -> bool:
+        return cve_id in self._rows
+
+    @property
+    def entries(self) -> List[Dict[str, Any]]:
+        """The catalog in the normalized shape of :func:`fetch_cisa_kev`, built once."""
+        if self._entries is None:
+            self._entries = [_normalize_entry(item) for item in self._reread()]
+        return self._entries
+
+    def entries_for(self, cve_ids: Iterable[Optional[str]]) -> List[Dict[str, Any]]:
+        """Normalized catalog entries for those of ``cve_ids`` in KEV, in catalog order."""
+        wanted = {cve_id for cve_id in cve_ids if cve_id in self._rows}
+        if not wanted:
+            return []
+        if self._entries is not None:
+            return [entry for entry in self._entries if entry["id"] in wanted]
+        return [
+            _normalize_entry(item)
+            for item in self._reread()
+            if (item.get("cveID") or item.get("id")) in wanted
+        ]
+
+    def annotate(self, cves: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copy ``cves`` with ``in_kev`` set, plus KEV dates and ransomware use for hits."""
+        rows = self._rows
+        annotated = []
+        for cve in cves:
+            row = rows.get(cve.get("id"))
+            if row is None:
+                annotated.append({**cve, "in_kev": False})
+                continue
+            annotated.append(
+                {
+                    **cve,
+                    "in_kev": True,
+                    "kev_date_added": _iso(self.date_added[row]),
+                    "kev_due_date": _iso(self.due_date[row]),
+                    "kev_ransomware": bool(self.ransomware[row]),
+                }
+            )
+        return annotated
+
+
+def _vulnerabilities(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return payload.get("cisa_kev") or payload.get("vulnerabilities") or []
+
+
+def _decode_index(raw: Any) -> KevIndex:
+    return KevIndex.from_body(raw)
+
+
+async def _http_get(url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    return await get_with_retries(url, headers=headers, timeout=_TIMEOUT, max_retries=_MAX_RETRIES)
+
+
+async def fetch_kev_index(
+    offline: bool = False,
+    snapshot_id: Optional[str] = None,
+) -> KevIndex:
+    """The KEV catalog as a :class:`KevIndex`.
+
+    The index is what the cache's memory tier holds for the catalog URL,
+    so it is built once per downloaded catalog rather than per call.
+    """
+    if offline or snapshot_id:
+        index = await get_cached_payload(_API_URL, _decode_index, snapshot_id=snapshot_id)
+        if index is not None:
+            return index
+
+    if offline:
+        return KevIndex.from_payload(_load_fixture())
+
+    return await fetch_revalidated(
+        _API_URL,
+        _decode_index,
+        lambda headers: _http_get(_API_URL, headers=headers),
+        snapshot_id=snapshot_id,
+    )
 
 
 async def fetch_cisa_kev(
     offline: bool = False,
     snapshot_id: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    cached = None
-    if offline or snapshot_id:
-        cached = get_cached_content(_API_URL, snapshot_id=snapshot_id)
+    index = await fetch_kev_index(offline=offline, snapshot_id=snapshot_id)
+    return list(index.entries)
 
-    if cached:
-        payload = _decode_raw(cached["raw"])
-        return _normalize(payload)
 
-    if offline:
-        return _normalize(_load_fixture())
-
-    response = await _http_get(_API_URL)
-    payload = response.json()
-    upsert_content(_API_URL, response.content, snapshot_id=snapshot_id)
-    return _normalize(payload)
+def fetch_kev_index_sync(
+    offline: bool = False,
+    snapshot_id: Optional[str] = None,
+) -> KevIndex:
+    return run_sync(fetch_kev_index(offline=offline, snapshot_id=snapshot_id))
 
 
 def fetch_cisa_kev_sync(
     offline: bool = False,
     snapshot_id: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    return asyncio.run(fetch_cisa_kev(offline=offline, snapshot_id=snapshot_id))
\ No newline at end of file
+    return run_sync(fetch_cisa_kev(offline=offline, snapshot_id=snapshot_id))
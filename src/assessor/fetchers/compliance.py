@@ -1,12 +1,14 @@
 from typing import Any, Dict
-import httpx
+
+from assessor.utils.http import get_client
 
 class ComplianceFetcher:
     def __init__(self, base_url: str):
         self.base_url = base_url
 
     def fetch_compliance_data(self, product_name: str) -> Dict[str, Any]:
-        response = httpx.get(f"{self.base_url}/compliance/{product_name}")
+        url = f"{self.base_url}/compliance/{product_name}"
+        response = get_client(url).get(url)
         response.raise_for_status()
         return response.json()
 
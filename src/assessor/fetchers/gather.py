@@ -0,0 +1,119 @@
+"""Run an assessment's evidence sources concurrently on one event loop."""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+from assessor.config.settings import Config
+from assessor.fetchers.cisa_kev import fetch_kev_index
+from assessor.fetchers.nvd import fetch_cves
+from assessor.fetchers.revalidate import collect_stale
+from assessor.fetchers.vendor_psirt import fetch_vendor_posture
+from assessor.utils.http import run_sync
+
+SourceFactory = Callable[[], Awaitable[Any]]
+
+
+class SourceResult:
+    """Outcome of one source: its value, or the error that replaced it.
+
+    ``stale`` lists the cached copies (url, retrieved_at, reason) the value
+    was built from because their upstream could not be reached.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        value: Any = None,
+        error: Optional[str] = None,
+        elapsed: float = 0.0,
+        stale: Optional[List[Dict[str, Any]]] = None,
+    ):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+        self.stale = stale or []
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        state = "ok" if self.ok else f"error={self.error!r}"
+        if self.stale:
+            state += " stale"
+        return f"<SourceResult {self.name} {state} elapsed={self.elapsed:.2f}s>"
+
+    def to_dict(self):
+        """Status for reports; the value itself is left out."""
+        return {
+            "ok": self.ok,
+            "error": self.error,
+            "elapsed_ms": round(self.elapsed * 1000),
+            "stale": bool(self.stale),
+            "stale_evidence": self.stale,
+        }
+
+
+async def _run_source(name: str, factory: SourceFactory, timeout: Optional[float]) -> SourceResult:
+    started = time.monotonic()
+    with collect_stale() as stale:
+        try:
+            value = await asyncio.wait_for(factory(), timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {timeout:g}s"
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+        else:
+            return SourceResult(name, value, elapsed=time.monotonic() - started, stale=stale)
+    return SourceResult(name, error=error, elapsed=time.monotonic() - started, stale=stale)
+
+
+async def gather_sources(
+    sources: Mapping[str, SourceFactory],
+    timeouts: Optional[Mapping[str, float]] = None,
+) -> Dict[str, SourceResult]:
+    """Run every source concurrently and collect partial results.
+
+    Each factory is called on the running loop and given its entry in
+    ``timeouts`` (default ``Config.SOURCE_TIMEOUTS``; no limit when
+    absent). A source that fails or times out yields a result carrying
+    the error instead of raising, so the others are still returned. When
+    an upstream is down (or its circuit breaker open) fetchers fall back
+    to cached copies, which are listed in the result's ``stale``.
+    """
+    timeouts = Config.SOURCE_TIMEOUTS if timeouts is None else timeouts
+    results = await asyncio.gather(
+        *(_run_source(name, factory, timeouts.get(name)) for name, factory in sources.items())
+    )
+    return {result.name: result for result in results}
+
+
+def assessment_sources(
+    product: str,
+    vendor: Optional[str] = None,
+    homepage: Optional[str] = None,
+    offline: bool = False,
+    snapshot_id: Optional[str] = None,
+) -> Dict[str, SourceFactory]:
+    """The network-backed sources of one assessment, keyed by signal name.
+
+    ``cisa_kev`` yields a :class:`~assessor.fetchers.cisa_kev.KevIndex`.
+    Without a ``homepage`` no posture pages are probed and
+    ``vendor_posture`` comes back with every signal unset.
+    """
+    return {
+        "nvd_cves": lambda: fetch_cves(product, offline=offline, snapshot_id=snapshot_id),
+        "cisa_kev": lambda: fetch_kev_index(offline=offline, snapshot_id=snapshot_id),
+        "vendor_posture": lambda: fetch_vendor_posture(
+            homepage or "", vendor or "", offline=offline, snapshot_id=snapshot_id
+        ),
+    }
+
+
+def gather_sources_sync(
+    sources: Mapping[str, SourceFactory],
+    timeouts: Optional[Mapping[str, float]] = None,
+) -> Dict[str, SourceResult]:
+    """:func:`gather_sources` from synchronous code, in a single event loop."""
+    return run_sync(gather_sources(sources, timeouts))
@@ -1,25 +1,278 @@
-from typing import List, Dict
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlencode
+
 import httpx
 
+from assessor.cache import aio
+from assessor.cache.advisories import advisories_for_cves
+from assessor.cache.aio import get_cached_payload
+from assessor.cache.blobs import LazyBlob
+from assessor.config.settings import Config
+from assessor.fetchers.revalidate import fetch_revalidated
+from assessor.utils.http import get_with_retries, run_sync
+
+_API_URL = "https://api.github.com/advisories"
+_API_VERSION = "2022-11-28"
+_FEED = "github-advisories"
+_MAX_RETRIES = 3
+_TIMEOUT = 15.0
+# GitHub caps per_page at 100 for the global advisories endpoint.
+_PER_PAGE = 100
+# Pages an advisory lookup follows by default; only ``ghsa-sync`` walks the
+# whole database (unfiltered, that is thousands of pages).
+_MAX_PAGES = 10
+_VALIDATORS = ("etag", "last-modified", "cache-control")
+
+
+def _query_params(
+    ecosystem: Optional[str] = None,
+    affects: Optional[str] = None,
+    cve_id: Optional[str] = None,
+    per_page: int = _PER_PAGE,
+) -> Dict[str, str]:
+    params = {"type": "reviewed", "per_page": str(per_page)}
+    if ecosystem:
+        params["ecosystem"] = ecosystem.lower()
+    if affects:
+        params["affects"] = affects
+    if cve_id:
+        params["cve_id"] = cve_id
+    return params
+
+
+def _build_query_url(params: Dict[str, str]) -> str:
+    return f"{_API_URL}?{urlencode(sorted(params.items()))}"
+
+
+def _headers(extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": _API_VERSION}
+    if Config.GITHUB_TOKEN:
+        headers["Authorization"] = f"Bearer {Config.GITHUB_TOKEN}"
+    return {**headers, **(extra or {})}
+
+
+async def _http_get(url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    return await get_with_retries(
+        url, headers=_headers(headers), timeout=_TIMEOUT, max_retries=_MAX_RETRIES
+    )
+
+
+async def _http_get_page(url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """GET one page, rewrapped as ``{"advisories": [...], "next": url}``.
+
+    GitHub paginates with opaque cursors in the ``Link`` header, which
+    the content cache does not keep; folding the next-page URL into the
+    stored body lets cached and snapshot pages be walked like live ones.
+    Only the validators are carried over, so conditional requests still
+    work against the stored copy.
+    """
+    response = await _http_get(url, headers)
+    if response.status_code == 304:
+        return response
+    envelope = {
+        "advisories": response.json(),
+        "next": response.links.get("next", {}).get("url"),
+    }
+    return httpx.Response(
+        response.status_code,
+        headers={name: response.headers[name] for name in _VALIDATORS if name in response.headers},
+        content=json.dumps(envelope).encode("utf-8"),
+        request=response.request,
+    )
+
+
+def _decode_raw(raw: Any) -> Dict[str, Any]:
+    if isinstance(raw, LazyBlob):
+        raw = raw.read()
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        raw = bytes(raw)
+    return json.loads(raw)
+
+
+async def _fetch_page(
+    url: str,
+    offline: bool,
+    snapshot_id: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    """One page envelope, cached under its own URL; ``None`` if unavailable offline."""
+    if offline or snapshot_id:
+        page = await get_cached_payload(url, _decode_raw, snapshot_id=snapshot_id)
+        if page is not None:
+            return page
+    if offline:
+        return None
+
+    page = await fetch_revalidated(
+        url,
+        _decode_raw,
+        lambda headers: _http_get_page(url, headers),
+        snapshot_id=snapshot_id,
+    )
+    await aio.store_advisories(page["advisories"])
+    return page
+
+
+async def iter_advisories(
+    ecosystem: Optional[str] = None,
+    affects: Optional[str] = None,
+    cve_id: Optional[str] = None,
+    offline: bool = False,
+    snapshot_id: Optional[str] = None,
+    per_page: int = _PER_PAGE,
+    max_pages: Optional[int] = _MAX_PAGES,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield reviewed GitHub advisories, raw, following ``Link`` pagination.
+
+    ``ecosystem`` (e.g. ``"pip"``, ``"npm"``) and ``affects`` (a package
+    name, or several comma-separated) are applied by the API. Each page is
+    cached under its own URL and revalidated with conditional requests;
+    offline and snapshot runs replay the cached pages. Every page fetched
+    online also feeds the local CVE alias index (see :func:`annotate_cves`).
+    At most ``max_pages`` pages are followed; pass ``None`` to walk every
+    match, or use :func:`sync_advisories` to index the whole database.
+    """
+    url: Optional[str] = _build_query_url(_query_params(ecosystem, affects, cve_id, per_page))
+    pages = 0
+    while url and (max_pages is None or pages < max_pages):
+        pages += 1
+        page = await _fetch_page(url, offline, snapshot_id)
+        if page is None:
+            return
+        for advisory in page["advisories"]:
+            yield advisory
+        url = page.get("next")
+
+
+def parse_advisory(advisory: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": advisory.get("ghsa_id") or advisory.get("id"),
+        "cve_id": advisory.get("cve_id"),
+        "summary": advisory.get("summary"),
+        "description": advisory.get("description"),
+        "severity": advisory.get("severity"),
+        "published_at": advisory.get("published_at"),
+        "updated_at": advisory.get("updated_at"),
+        "references": advisory.get("references"),
+        "url": advisory.get("html_url"),
+        "packages": [
+            {
+                "ecosystem": (vuln.get("package") or {}).get("ecosystem"),
+                "name": (vuln.get("package") or {}).get("name"),
+                "vulnerable_version_range": vuln.get("vulnerable_version_range"),
+                "first_patched_version": vuln.get("first_patched_version"),
+            }
+            for vuln in advisory.get("vulnerabilities") or []
+        ],
+    }
+
+
+async def fetch_advisories(
+    ecosystem: Optional[str] = None,
+    affects: Optional[str] = None,
+    offline: bool = False,
+    snapshot_id: Optional[str] = None,
+    max_pages: Optional[int] = _MAX_PAGES,
+) -> List[Dict[str, Any]]:
+    return [
+        parse_advisory(advisory)
+        async for advisory in iter_advisories(
+            ecosystem, affects, offline=offline, snapshot_id=snapshot_id, max_pages=max_pages
+        )
+    ]
+
+
+def fetch_advisories_sync(
+    ecosystem: Optional[str] = None,
+    affects: Optional[str] = None,
+    offline: bool = False,
+    snapshot_id: Optional[str] = None,
+    max_pages: Optional[int] = _MAX_PAGES,
+) -> List[Dict[str, Any]]:
+    return run_sync(
+        fetch_advisories(
+            ecosystem, affects, offline=offline, snapshot_id=snapshot_id, max_pages=max_pages
+        )
+    )
+
+
+async def sync_advisories(full: bool = False, per_page: int = _PER_PAGE) -> Dict[str, Any]:
+    """Bring the local CVE alias index up to date.
+
+    Pages through reviewed advisories in ``updated`` order, starting from
+    the previous sync's high-water mark unless ``full``. The mark advances
+    after every page, so an interrupted sync resumes where it stopped.
+    """
+    since = None if full else await aio.get_sync_state(_FEED)
+    report = {"full": since is None, "pages": 0, "advisories": 0}
+    params = {**_query_params(per_page=per_page), "sort": "updated", "direction": "asc"}
+    if since:
+        params["updated"] = f">={since}"
+
+    url: Optional[str] = _build_query_url(params)
+    while url:
+        response = await _http_get(url)
+        advisories = response.json()
+        report["advisories"] += await aio.store_advisories(advisories)
+        report["pages"] += 1
+        marks = [advisory["updated_at"] for advisory in advisories if advisory.get("updated_at")]
+        if marks:
+            await aio.set_sync_state(max(marks), _FEED)
+        url = response.links.get("next", {}).get("url")
+
+    report["updated_at"] = await aio.get_sync_state(_FEED)
+    return report
+
+
+def sync_advisories_sync(full: bool = False) -> Dict[str, Any]:
+    return run_sync(sync_advisories(full=full))
+
+
+def annotate_cves(cves: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy ``cves`` with the GHSA IDs and affected packages indexed for each.
+
+    Answered from the local alias index only; no network calls.
+    """
+    found = advisories_for_cves(cve.get("id") for cve in cves)
+    annotated = []
+    for cve in cves:
+        advisories = [parse_advisory(item) for item in found.get(cve.get("id"), [])]
+        annotated.append(
+            {
+                **cve,
+                "ghsa_ids": [advisory["id"] for advisory in advisories],
+                "packages": [package for advisory in advisories for package in advisory["packages"]],
+            }
+        )
+    return annotated
+
+
 class GitHubAdvisoriesFetcher:
-    BASE_URL = "https://api.github.com/advisories"
+    """Class interface kept for callers of the original fetcher."""
+
+    BASE_URL = _API_URL
 
-    def fetch_advisories(self) -> List[Dict]:
-        response = httpx.get(self.BASE_URL)
-        response.raise_for_status()
-        return response.json()
+    def fetch_advisories(
+        self,
+        ecosystem: Optional[str] = None,
+        affects: Optional[str] = None,
+        max_pages: Optional[int] = _MAX_PAGES,
+    ) -> List[Dict]:
+        async def collect() -> List[Dict]:
+            return [
+                advisory
+                async for advisory in iter_advisories(ecosystem, affects, max_pages=max_pages)
+            ]
+
+        return run_sync(collect())
 
     def parse_advisory(self, advisory: Dict) -> Dict:
-        return {
-            "id": advisory.get("id"),
-            "summary": advisory.get("summary"),
-            "description": advisory.get("description"),
-            "severity": advisory.get("severity"),
-            "published_at": advisory.get("published_at"),
-            "updated_at": advisory.get("updated_at"),
-            "references": advisory.get("references"),
-        }
-
-    def get_advisories(self) -> List[Dict]:
-        advisories = self.fetch_advisories()
-        return [self.parse_advisory(advisory) for advisory in advisories]
\ No newline at end of file
+        return parse_advisory(advisory)
+
+    def get_advisories(
+        self,
+        ecosystem: Optional[str] = None,
+        affects: Optional[str] = None,
+        max_pages: Optional[int] = _MAX_PAGES,
+    ) -> List[Dict]:
+        return fetch_advisories_sync(ecosystem, affects, max_pages=max_pages)
@@ -1,22 +1,57 @@
 import asyncio
 import json
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlencode
 
 import httpx
 
-from assessor.cache.db import get_cached_content, upsert_content
+from assessor.cache import aio
+from assessor.cache.blobs import LazyBlob
+from assessor.cache.aio import get_cached_payload
+from assessor.config.settings import Config
+from assessor.fetchers.revalidate import fetch_revalidated, mark_stale, upstream_unavailable
+from assessor.parsers.json_stream import ArrayStream, iter_bytes
+from assessor.utils.http import get_with_retries, run_sync
 
 _API_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
 _FIXTURE = Path(__file__).resolve().parents[3] / "tests/fixtures/api/nvd_cve_sample.json"
 _MAX_RETRIES = 3
-_BACKOFF = 0.5
 _TIMEOUT = 15.0
+# NVD caps resultsPerPage at 2000 for the CVE API.
+_RESULTS_PER_PAGE = 2000
+_PAGE_CONCURRENCY = 2
+# lastModStartDate/lastModEndDate may span at most 120 days.
+_MAX_SYNC_WINDOW = timedelta(days=120)
+# Result arrays of the 2.0 API and of the retired 1.1 feeds.
+_ARRAY_KEYS = ("vulnerabilities", "CVE_Items")
+# Pages with bodies up to this size keep their normalized CVEs in memory.
+_MATERIALIZE_MAX_BYTES = 4 * 1024 * 1024
 
 
-def _build_query_url(product: str) -> str:
-    params = urlencode({"keywordSearch": product})
+def _query_params(
+    product: str,
+    start_index: int = 0,
+    results_per_page: int = _RESULTS_PER_PAGE,
+) -> Dict[str, str]:
+    params = {"keywordSearch": product}
+    # The first page at the default size keeps the bare keyword URL, so
+    # caches and snapshots recorded before paging still resolve.
+    if start_index or results_per_page != _RESULTS_PER_PAGE:
+        params["startIndex"] = str(start_index)
+        params["resultsPerPage"] = str(results_per_page)
+    return params
+
+
+def _build_query_url(
+    product: str,
+    start_index: int = 0,
+    results_per_page: int = _RESULTS_PER_PAGE,
+) -> str:
+    params = urlencode(_query_params(product, start_index, results_per_page))
     return f"{_API_URL}?{params}"
 
 
@@ -24,58 +59,329 @@ def _load_fixture() -> Dict[str, Any]:
     return json.loads(_FIXTURE.read_text(encoding="utf-8"))
 
 
-def _decode_raw(raw: Any) -> Dict[str, Any]:
-    if isinstance(raw, (bytes, bytearray, memoryview)):
-        raw = bytes(raw)
-    return json.loads(raw)
+def _body_chunks(raw: Any) -> Iterator[Any]:
+    if isinstance(raw, LazyBlob):
+        return raw.iter_chunks()
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    return iter_bytes(raw)
+
+
+def _english(entries: List[Dict[str, Any]]) -> str:
+    for entry in entries:
+        if entry.get("lang") == "en":
+            return entry.get("value", "")
+    return entries[0].get("value", "") if entries else ""
+
+
+def _cvss(metrics: Dict[str, Any]) -> Tuple[Optional[str], Optional[float]]:
+    """``(severity, base score)`` from the newest CVSS version present."""
+    for key in ("cvssMetricV40", "cvssMetricV31", "cvssMetricV30", "cvssMetricV2"):
+        entries = metrics.get(key) or []
+        if not entries:
+            continue
+        # Prefer NVD's own ("Primary") score over CNA-supplied ones.
+        metric = next((m for m in entries if m.get("type") == "Primary"), entries[0])
+        data = metric.get("cvssData", {})
+        return data.get("baseSeverity") or metric.get("baseSeverity"), data.get("baseScore")
+    return None, None
+
+
+def _normalize_cve(cve: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one ``vulnerabilities[].cve`` record of the 2.0 API."""
+    severity, score = _cvss(cve.get("metrics", {}))
+    return {
+        "id": cve.get("id"),
+        "description": _english(cve.get("descriptions", [])),
+        "severity": severity,
+        "score": score,
+        "references": [ref["url"] for ref in cve.get("references", []) if ref.get("url")],
+        "published": cve.get("published"),
+        "last_modified": cve.get("lastModified"),
+    }
+
+
+def _cpe_pairs(cve: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """``(vendor, product)`` for every vulnerable CPE match of a 2.0 record."""
+    pairs = set()
+    for config in cve.get("configurations", []):
+        for node in config.get("nodes", []):
+            for match in node.get("cpeMatch", []):
+                if not match.get("vulnerable", True):
+                    continue
+                # cpe:2.3:part:vendor:product:version:...
+                fields = match.get("criteria", "").split(":")
+                if len(fields) > 4 and fields[3] not in ("*", "-"):
+                    pairs.add((fields[3], fields[4]))
+    return sorted(pairs)
+
+
+def _normalize_legacy_item(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one ``CVE_Items`` record of the retired 1.1 feed format."""
+    cve_block = entry.get("cve", {})
+    description = ""
+    desc_list = cve_block.get("description", {}).get("description_data", [])
+    if desc_list:
+        description = desc_list[0].get("value", "")
+
+    meta = cve_block.get("CVE_data_meta", {})
+    cve_id = meta.get("ID") or cve_block.get("id")
+
+    impact = entry.get("impact", {}).get("baseMetricV3", {})
+    references = [
+        ref.get("url")
+        for ref in cve_block.get("references", {}).get("reference_data", [])
+        if ref.get("url")
+    ]
+    return {
+        "id": cve_id,
+        "description": description,
+        "severity": impact.get("severity"),
+        "score": impact.get("baseScore"),
+        "references": references,
+        "published": entry.get("publishedDate") or entry.get("published"),
+        "last_modified": entry.get("lastModifiedDate") or entry.get("lastModified"),
+    }
 
 
 def _normalize_items(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    items: List[Dict[str, Any]] = []
-    for entry in payload.get("CVE_Items", []):
-        cve_block = entry.get("cve", {})
-        description = ""
-        desc_list = cve_block.get("description", {}).get("description_data", [])
-        if desc_list:
-            description = desc_list[0].get("value", "")
-
-        meta = cve_block.get("CVE_data_meta", {})
-        cve_id = meta.get("ID") or cve_block.get("id")
-
-        impact = entry.get("impact", {}).get("baseMetricV3", {})
-        references = [
-            ref.get("url")
-            for ref in cve_block.get("references", {}).get("reference_data", [])
-            if ref.get("url")
-        ]
-
-        items.append(
-            {
-                "id": cve_id,
-                "description": description,
-                "severity": impact.get("severity"),
-                "score": impact.get("baseScore"),
-                "references": references,
-                "published": entry.get("publishedDate") or entry.get("published"),
-                "last_modified": entry.get("lastModifiedDate") or entry.get("lastModified"),
-            }
+    if "vulnerabilities" in payload:
+        return [_normalize_cve(item.get("cve", {})) for item in payload["vulnerabilities"]]
+    return [_normalize_legacy_item(entry) for entry in payload.get("CVE_Items", [])]
+
+
+def iter_normalized(raw: Any) -> Iterator[Dict[str, Any]]:
+    """Yield normalized CVEs from a response body or cached blob as it is parsed.
+
+    Equivalent to ``_normalize_items(json.loads(raw))`` without building
+    the decoded document: records are decoded and normalized one at a time.
+    """
+    return _normalize_stream(ArrayStream(_body_chunks(raw), _ARRAY_KEYS))
+
+
+def _normalize_stream(stream: ArrayStream) -> Iterator[Dict[str, Any]]:
+    for item in stream:
+        if stream.key == "vulnerabilities":
+            yield _normalize_cve(item.get("cve", {}))
+        else:
+            yield _normalize_legacy_item(item)
+
+
+class _Page:
+    """One result page: its header fields and its CVEs.
+
+    This is what the cache's memory tier keeps per page URL. A page whose
+    body is at most ``_MATERIALIZE_MAX_BYTES`` is normalized once here and
+    keeps the list, so repeated hits cost nothing; a larger one holds the
+    (possibly still compressed) body and streams its CVEs on each call.
+    """
+
+    __slots__ = ("header", "_raw", "_cves")
+
+    def __init__(self, raw: Any):
+        stream = ArrayStream(_body_chunks(raw), _ARRAY_KEYS)
+        self.header = stream.read_header()
+        self._raw: Any = None
+        self._cves: Optional[List[Dict[str, Any]]] = None
+        if len(raw) > _MATERIALIZE_MAX_BYTES:
+            self._raw = raw
+            return
+        self._cves = list(_normalize_stream(stream))
+
+    def cves(self) -> Iterator[Dict[str, Any]]:
+        """The page's normalized CVEs; kept ones are shared, so copy before changing them."""
+        if self._cves is not None:
+            return iter(self._cves)
+        return iter_normalized(self._raw)
+
+
+async def _http_get(
+    url: str,
+    params: Dict[str, str],
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.Response:
+    if Config.NVD_API_KEY:
+        headers = {**(headers or {}), "apiKey": Config.NVD_API_KEY}
+    return await get_with_retries(
+        url, params=params, headers=headers, timeout=_TIMEOUT, max_retries=_MAX_RETRIES
+    )
+
+
+async def _fetch_page(
+    product: str,
+    start_index: int,
+    results_per_page: int,
+    offline: bool,
+    snapshot_id: Optional[str],
+) -> Optional[_Page]:
+    """One page of results, cached under its own URL; ``None`` if unavailable offline."""
+    page_url = _build_query_url(product, start_index, results_per_page)
+    if offline or snapshot_id:
+        page = await get_cached_payload(page_url, _Page, snapshot_id=snapshot_id)
+        if page is not None:
+            return page
+    if offline:
+        return None
+
+    params = _query_params(product, start_index, results_per_page)
+    return await fetch_revalidated(
+        page_url,
+        _Page,
+        lambda headers: _http_get(_API_URL, params, headers=headers),
+        snapshot_id=snapshot_id,
+    )
+
+
+async def _iter_pages(
+    product: str,
+    offline: bool,
+    snapshot_id: Optional[str],
+    results_per_page: int,
+    concurrency: int,
+) -> AsyncIterator[_Page]:
+    first = await _fetch_page(product, 0, results_per_page, offline, snapshot_id)
+    if first is None:
+        return
+    yield first
+    total = first.header.get("totalResults") or 0
+    starts = iter(range(results_per_page, total, results_per_page))
+
+    def schedule(start: int) -> "asyncio.Task[Optional[_Page]]":
+        return asyncio.ensure_future(
+            _fetch_page(product, start, results_per_page, offline, snapshot_id)
         )
-    return items
+
+    # A sliding window of in-flight pages, consumed in order: at most
+    # ``concurrency`` pages are held in memory at once.
+    pending = deque(schedule(start) for start in islice(starts, concurrency))
+    try:
+        while pending:
+            page = await pending.popleft()
+            following = next(starts, None)
+            if following is not None:
+                pending.append(schedule(following))
+            if page is None:
+                return
+            yield page
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def iter_cves(
+    product: str,
+    offline: bool = False,
+    snapshot_id: Optional[str] = None,
+    results_per_page: int = _RESULTS_PER_PAGE,
+    concurrency: int = _PAGE_CONCURRENCY,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every CVE matching ``product``, normalized, page by page.
+
+    Pages are requested with ``startIndex``/``resultsPerPage``, up to
+    ``concurrency`` at a time, and each is cached under its own URL, so an
+    interrupted run resumes from the pages already stored. Offline, cached
+    pages are replayed (falling back to the bundled fixture when none are).
+    With a local mirror synced within ``Config.NVD_MIRROR_MAX_AGE`` (see
+    :func:`sync_mirror`) lookups are answered from it without touching the
+    network; offline, any mirror is used. An older mirror is skipped for
+    the live API, and stands in (recorded with ``mark_stale``) only when
+    the upstream is unavailable before any page arrives.
+    """
+    synced_at = None if snapshot_id is not None else await aio.get_synced_at()
+    if synced_at is not None and (offline or not _mirror_expired(synced_at)):
+        for item in await aio.search_cves(product):
+            yield item
+        return
+
+    seen_page = False
+    try:
+        async for page in _iter_pages(product, offline, snapshot_id, results_per_page, concurrency):
+            seen_page = True
+            for item in page.cves():
+                yield item
+    except Exception as exc:
+        if synced_at is None or seen_page or not upstream_unavailable(exc):
+            raise
+        mark_stale(_API_URL, synced_at, str(exc) or type(exc).__name__)
+        for item in await aio.search_cves(product):
+            yield item
+        return
+    if offline and not seen_page:
+        for item in _normalize_items(_load_fixture()):
+            yield item
 
 
-async def _http_get(url: str, params: Dict[str, str]) -> httpx.Response:
-    attempt = 0
+def _mirror_expired(synced_at: str, now: Optional[datetime] = None) -> bool:
+    synced = datetime.fromisoformat(synced_at).replace(tzinfo=timezone.utc)
+    age = (now or datetime.now(timezone.utc)) - synced
+    return age.total_seconds() > Config.NVD_MIRROR_MAX_AGE
+
+
+def _nvd_timestamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).isoformat(timespec="milliseconds")
+
+
+async def _sync_range(params: Dict[str, str], results_per_page: int) -> int:
+    """Page through one query into the mirror; returns the CVEs stored."""
+    stored = 0
+    start = 0
     while True:
-        try:
-            async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-                response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response
-        except httpx.HTTPError:
-            attempt += 1
-            if attempt >= _MAX_RETRIES:
-                raise
-            await asyncio.sleep(_BACKOFF * attempt)
+        page_params = {**params, "startIndex": str(start), "resultsPerPage": str(results_per_page)}
+        response = await _http_get(_API_URL, page_params)
+        stream = ArrayStream(iter_bytes(response.content), _ARRAY_KEYS)
+        stored += await aio.store_cves(
+            [
+                (_normalize_cve(item["cve"]), _cpe_pairs(item["cve"]))
+                for item in stream
+                if item.get("cve", {}).get("id")
+            ]
+        )
+        start += results_per_page
+        if start >= stream.header.get("totalResults", 0):
+            return stored
+
+
+async def sync_mirror(
+    full: bool = False,
+    results_per_page: int = _RESULTS_PER_PAGE,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Bring the local NVD mirror up to date.
+
+    The first sync (or ``full=True``) pages through the whole CVE
+    collection. Later syncs only request CVEs modified since the previous
+    high-water mark, in ``lastModStartDate``/``lastModEndDate`` windows of
+    at most 120 days. The mark advances after each window, so an
+    interrupted sync resumes where it stopped. Requests are paced by the
+    shared NVD rate limit.
+    """
+    now = now or datetime.now(timezone.utc)
+    since = None if full else await aio.get_sync_state()
+    report = {"full": since is None, "windows": 0, "cves": 0}
+
+    if since is None:
+        report["cves"] += await _sync_range({}, results_per_page)
+        report["windows"] += 1
+        await aio.set_sync_state(_nvd_timestamp(now))
+    else:
+        window_start = datetime.fromisoformat(since)
+        while window_start < now:
+            window_end = min(window_start + _MAX_SYNC_WINDOW, now)
+            params = {
+                "lastModStartDate": _nvd_timestamp(window_start),
+                "lastModEndDate": _nvd_timestamp(window_end),
+            }
+            report["cves"] += await _sync_range(params, results_per_page)
+            report["windows"] += 1
+            await aio.set_sync_state(_nvd_timestamp(window_end))
+            window_start = window_end
+
+    report["last_modified"] = await aio.get_sync_state()
+    return report
+
+
+def sync_mirror_sync(full: bool = False) -> Dict[str, Any]:
+    return run_sync(sync_mirror(full=full))
 
 
 async def fetch_cves(
@@ -83,25 +389,12 @@ async def fetch_cves(
     offline: bool = False,
     snapshot_id: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    query_url = _build_query_url(product)
-    
-    if offline or snapshot_id:
-        cached = get_cached_content(query_url, snapshot_id=snapshot_id)
-        if cached:
-            payload = _decode_raw(cached["raw"])
-            return _normalize_items(payload)
-    
-    if offline:
-        return _normalize_items(_load_fixture())
-    
-    response = await _http_get(_API_URL, {"keywordSearch": product})
-    payload = response.json()
-    upsert_content(query_url, response.content, snapshot_id=snapshot_id)
-    return _normalize_items(payload)
+    return [cve async for cve in iter_cves(product, offline=offline, snapshot_id=snapshot_id)]
+
 
 def fetch_cves_sync(
     product: str,
     offline: bool = False,
     snapshot_id: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    return asyncio.run(fetch_cves(product, offline=offline, snapshot_id=snapshot_id))
\ No newline at end of file
+    return run_sync(fetch_cves(product, offline=offline, snapshot_id=snapshot_id))
@@ -0,0 +1,212 @@
+import asyncio
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+
+from assessor.cache import aio
+from assessor.cache.db import age_seconds
+from assessor.config.settings import Config
+from assessor.utils.background import background
+from assessor.utils.breaker import CircuitOpenError
+from assessor.utils.http import normalize_url
+from assessor.utils.singleflight import flights
+
+HttpGet = Callable[[Dict[str, str]], Awaitable[httpx.Response]]
+
+_DIRECTIVE = re.compile(r"([a-z-]+)\s*(?:=\s*\"?(\d+)\"?)?")
+
+# Cached copies served in place of an unreachable upstream, collected per
+# source by :func:`collect_stale`.
+_stale: "ContextVar[Optional[List[Dict[str, Any]]]]" = ContextVar("stale_evidence", default=None)
+
+
+@contextmanager
+def collect_stale() -> Iterator[List[Dict[str, Any]]]:
+    """Collect the stale copies served by fetches run inside the block.
+
+    The list is shared with tasks started inside the block, since they
+    copy the current context.
+    """
+    served: List[Dict[str, Any]] = []
+    token = _stale.set(served)
+    try:
+        yield served
+    finally:
+        _stale.reset(token)
+
+
+def mark_stale(url: str, retrieved_at: str, reason: str) -> None:
+    """Record that the cached copy of ``url`` was served because the upstream failed."""
+    served = _stale.get()
+    if served is not None:
+        served.append({"url": url, "retrieved_at": retrieved_at, "reason": reason})
+
+
+def _directives(cache_control: Optional[str]) -> Dict[str, Optional[int]]:
+    directives: Dict[str, Optional[int]] = {}
+    for name, value in _DIRECTIVE.findall((cache_control or "").lower()):
+        directives[name] = int(value) if value else None
+    return directives
+
+
+def freshness_lifetime(cache_control: Optional[str], default: int) -> int:
+    """Seconds a cached response stays fresh, per ``Cache-Control``."""
+    directives = _directives(cache_control)
+    if "no-cache" in directives or "no-store" in directives:
+        return 0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name) is not None:
+            return directives[name]
+    return default
+
+
+def stale_window(cache_control: Optional[str], default: int) -> int:
+    """Seconds past freshness during which a stale copy may be served."""
+    value = _directives(cache_control).get("stale-while-revalidate")
+    return default if value is None else value
+
+
+def conditional_headers(row: Optional[Mapping[str, Any]]) -> Dict[str, str]:
+    """``If-None-Match`` / ``If-Modified-Since`` for a cached content row."""
+    headers: Dict[str, str] = {}
+    if row:
+        if row.get("etag"):
+            headers["If-None-Match"] = row["etag"]
+        if row.get("last_modified"):
+            headers["If-Modified-Since"] = row["last_modified"]
+    return headers
+
+
+def upstream_unavailable(exc: BaseException) -> bool:
+    """Whether ``exc`` means the upstream could not answer, so a cached copy may stand in.
+
+    Transport failures, open breakers and 5xx responses qualify; a 4xx is
+    the upstream's answer and is not papered over with old data.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (CircuitOpenError, httpx.TransportError))
+
+
+async def _revalidate(
+    url: str,
+    decode: Callable[[Any], Any],
+    http_get: HttpGet,
+    row: Optional[Mapping[str, Any]],
+    snapshot_id: Optional[str],
+) -> Any:
+    response = await http_get(conditional_headers(row))
+    if response.status_code == 304 and row is not None:
+        await aio.touch_content(url, response.headers, snapshot_id=snapshot_id)
+        return None
+    await aio.upsert_content(
+        url, response.content, snapshot_id=snapshot_id, headers=response.headers
+    )
+    return decode(response.content)
+
+
+async def fetch_revalidated(
+    url: str,
+    decode: Callable[[Any], Any],
+    http_get: HttpGet,
+    snapshot_id: Optional[str] = None,
+) -> Any:
+    """Return the decoded body of ``url``, revalidating the cached copy.
+
+    A fresh cached copy is returned without touching the network. A copy
+    that is stale but inside its stale-while-revalidate window is returned
+    immediately while a conditional request refreshes it in the background.
+    Otherwise a conditional request is made and a 304 only bumps
+    ``retrieved_at``. Snapshot fetches always revalidate so the row gets
+    tagged with the snapshot. If the upstream is unreachable, answers
+    with a 5xx or its breaker is open, the cached copy is returned regardless of age and reported
+    through :func:`mark_stale`.
+
+    Concurrent calls for the same URL share one request: within the
+    process through single-flight (per decoder), across processes through
+    a lease row in the cache database.
+    """
+    cached = await aio.get_cached_entry(url, decode)
+    payload, row = cached if cached is not None else (None, None)
+
+    if row is not None and snapshot_id is None:
+        age = age_seconds(row["retrieved_at"])
+        lifetime = freshness_lifetime(row["cache_control"], Config.EVIDENCE_CACHE_TTL)
+        if age <= lifetime:
+            return payload
+        if age <= lifetime + stale_window(row["cache_control"], Config.STALE_WHILE_REVALIDATE):
+            background.submit(
+                ("revalidate", url),
+                lambda: _revalidate(url, decode, http_get, row, None),
+            )
+            return payload
+
+    key = f"{normalize_url(url)}#{snapshot_id or ''}"
+    # Callers only share a result decoded the way they asked for; the
+    # lease stays per URL, since other processes decode what it stores.
+    result, stale = await flights.run(
+        (key, decode), lambda: _fetch_once(key, url, decode, http_get, payload, row, snapshot_id)
+    )
+    if stale is not None:
+        mark_stale(url, stale["retrieved_at"], stale["reason"])
+    return result
+
+
+async def _wait_for_holder(
+    key: str,
+    url: str,
+    decode: Callable[[Any], Any],
+    row: Optional[Mapping[str, Any]],
+    snapshot_id: Optional[str],
+) -> Optional[Tuple[Any, Mapping[str, Any]]]:
+    """Wait out another process's lease on ``key``; its result if it stored one."""
+    give_up_at = time.monotonic() + Config.FETCH_LEASE_TTL
+    while time.monotonic() < give_up_at and await aio.lease_holder(key) is not None:
+        await asyncio.sleep(Config.FETCH_LEASE_POLL)
+    entry = await aio.reload_cached_entry(url, decode, snapshot_id=snapshot_id)
+    if entry is None:
+        return None
+    if row is not None and entry[1]["retrieved_at"] == row["retrieved_at"]:
+        return None
+    return entry
+
+
+async def _fetch_once(
+    key: str,
+    url: str,
+    decode: Callable[[Any], Any],
+    http_get: HttpGet,
+    payload: Any,
+    row: Optional[Mapping[str, Any]],
+    snapshot_id: Optional[str],
+) -> Tuple[Any, Optional[Dict[str, str]]]:
+    """Revalidate ``url`` under the cross-process lease for ``key``.
+
+    Returns ``(payload, stale)``; ``stale`` describes the cached copy
+    served when the upstream failed, so every coalesced caller can report
+    it. A process that finds the lease taken waits for the holder and
+    uses what it stored, fetching itself only if nothing new landed.
+    """
+    owner = uuid.uuid4().hex
+    leased = await aio.acquire_lease(key, owner, Config.FETCH_LEASE_TTL)
+    if not leased:
+        landed = await _wait_for_holder(key, url, decode, row, snapshot_id)
+        if landed is not None:
+            return landed[0], None
+        leased = await aio.acquire_lease(key, owner, Config.FETCH_LEASE_TTL)
+    try:
+        fetched = await _revalidate(url, decode, http_get, row, snapshot_id)
+    except (CircuitOpenError, httpx.HTTPError) as exc:
+        if row is None or not upstream_unavailable(exc):
+            raise
+        # The upstream is down: serve the last copy, however old, flagged stale.
+        return payload, {"retrieved_at": row["retrieved_at"], "reason": str(exc)}
+    finally:
+        if leased:
+            await aio.release_lease(key, owner)
+    return (payload if fetched is None else fetched), None
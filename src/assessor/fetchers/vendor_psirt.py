@@ -1,90 +1,270 @@
-import re
-from typing import Dict, Optional
+import asyncio
+import codecs
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
 import httpx
-from bs4 import BeautifulSoup
+
+from assessor.cache import aio
+from assessor.config.settings import Config
+from assessor.fetchers.revalidate import mark_stale, upstream_unavailable
+from assessor.parsers.html_text import KeywordMatcher, TextExtractor
+from assessor.utils.breaker import breakers
+from assessor.utils.http import get_async_client, normalize_url, run_sync
+from assessor.utils.ratelimit import limiter
+from assessor.utils.singleflight import flights
+
+# Common security page paths
+_SECURITY_PATHS = [
+    "/security",
+    "/trust",
+    "/psirt",
+    "/responsible-disclosure",
+    "/bug-bounty",
+    "/security-advisories",
+    "/.well-known/security.txt",
+]
+_TIMEOUT = 10.0
+# Overall budget for one vendor; probes still running then are cancelled.
+_DEADLINE = 15.0
+# Only the head of each page is read; posture keywords sit near the top.
+_MAX_BYTES = 512 * 1024
+
+
+def _empty_signals() -> Dict[str, bool]:
+    return {
+        "psirt_page": False,
+        "bug_bounty": False,
+        "security_advisories": False,
+        "transparency_report": False
+    }
+
+
+_HOMEPAGE_KEYWORDS = {
+    "psirt_page": ["security", "psirt", "vulnerability", "responsible disclosure"],
+    "bug_bounty": ["bug bounty", "hackerone", "bugcrowd", "vulnerability reward"],
+    "security_advisories": ["security advisory", "security bulletin", "cve-"],
+    "transparency_report": ["transparency report"],
+}
+
+
+def _apply_homepage(signals: Dict[str, bool], matched: Set[str]) -> None:
+    # Security keywords found in the homepage's visible text
+    for signal in matched:
+        signals[signal] = True
+
+
+def _apply_security_page(signals: Dict[str, bool], text: str) -> None:
+    sec_text = text.lower()
+    if "security" in sec_text or "vulnerability" in sec_text:
+        signals["psirt_page"] = True
+    if "bug bounty" in sec_text:
+        signals["bug_bounty"] = True
+
+
+def _first_page(
+    pages: List[Tuple[str, "asyncio.Future[Optional[str]]"]], final: bool
+) -> Tuple[bool, Optional[str]]:
+    """The text of the first security path, in list order, that returned a page.
+
+    Returns ``(settled, text)``. A probe still running leaves the answer
+    open, unless ``final``, when it counts as failed.
+    """
+    for _, task in pages:
+        if not task.done():
+            if final:
+                continue
+            return False, None
+        text = task.result()
+        if text is not None:
+            return True, text
+    return True, None
+
+
+async def _read_capped(
+    url: str,
+    timeout: float,
+    snapshot_id: Optional[str],
+    extractor: Optional[TextExtractor] = None,
+) -> Optional[str]:
+    """Read up to ``_MAX_BYTES`` of ``url`` and cache what was read.
+
+    With ``extractor`` the body is decoded and fed to it as it arrives,
+    and reading stops as soon as its matcher has found every keyword; the
+    extractor is closed either way, and a body cut short is not cached.
+    """
+    breaker = breakers.for_url(url)
+    breaker.before()
+    try:
+        await limiter.acquire(url)
+        client = get_async_client(url)
+        async with client.stream("GET", url, timeout=timeout, follow_redirects=True) as response:
+            if response.status_code >= 500:
+                breaker.record_failure()
+                response.raise_for_status()
+            if response.status_code != 200:
+                breaker.record_success()
+                return None
+            body = bytearray()
+            cut_short = False
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            try:
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if extractor is not None:
+                        extractor.feed(decoder.decode(chunk))
+                        if extractor.matcher.done:
+                            cut_short = True
+                            break
+                    if len(body) >= _MAX_BYTES:
+                        break
+                else:
+                    if extractor is not None:
+                        extractor.feed(decoder.decode(b"", final=True))
+            finally:
+                if extractor is not None:
+                    extractor.close()
+            headers = response.headers
+    except httpx.TransportError:
+        breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+    body = bytes(body[:_MAX_BYTES])
+    if not cut_short:
+        # A read stopped early holds an arbitrary prefix of the page, which
+        # must not be replayed later as the page itself.
+        await aio.upsert_content(url, body, snapshot_id=snapshot_id, headers=headers)
+    return body.decode("utf-8", errors="replace")
+
+
+def _scan(extractor: Optional[TextExtractor], text: Optional[str]) -> Optional[str]:
+    if extractor is not None and text is not None:
+        extractor.feed(text)
+        extractor.close()
+    return text
+
+
+async def _probe(
+    url: str,
+    offline: bool,
+    snapshot_id: Optional[str],
+    timeout: float,
+    extractor: Optional[TextExtractor] = None,
+) -> Optional[str]:
+    """Page text from the cache when usable, else from the network (online only).
+
+    ``extractor`` (if any) has seen the page by the time this returns:
+    streamed while it downloads, or fed whole when it comes from the
+    cache or from a concurrent read of the same page.
+    """
+    max_age = None if offline or snapshot_id else Config.EVIDENCE_CACHE_TTL
+    cached = await aio.get_cached_content(url, max_age_seconds=max_age, snapshot_id=snapshot_id)
+    if cached is not None:
+        return _scan(extractor, bytes(cached["raw"]).decode("utf-8", errors="replace"))
+    if offline:
+        return None
+    streamed = False
+
+    async def read() -> Optional[str]:
+        nonlocal streamed
+        streamed = True
+        return await _read_capped(url, timeout, snapshot_id, extractor)
+
+    try:
+        # Posture probes of the same vendor from concurrent requests share a read.
+        text = await flights.run(f"{normalize_url(url)}#{snapshot_id or ''}#page", read)
+    except Exception as exc:
+        # An unreachable page falls back to its last cached copy, flagged
+        # stale, or just contributes no signal
+        if max_age is None or not upstream_unavailable(exc):
+            return None
+        cached = await aio.get_cached_content(url)
+        if cached is None:
+            return None
+        mark_stale(url, cached["retrieved_at"], str(exc) or type(exc).__name__)
+        return _scan(extractor, bytes(cached["raw"]).decode("utf-8", errors="replace"))
+    return text if streamed else _scan(extractor, text)
 
 
-def fetch_vendor_posture(homepage: str, vendor: str, timeout: int = 10) -> Dict[str, bool]:
+async def fetch_vendor_posture(
+    homepage: str,
+    vendor: str,
+    offline: bool = False,
+    snapshot_id: Optional[str] = None,
+    timeout: float = _TIMEOUT,
+    deadline: float = _DEADLINE,
+) -> Dict[str, bool]:
     """
     Fetch vendor security posture signals from homepage and common paths.
-    
+
+    The homepage and every security path are probed concurrently. A
+    homepage that does not answer yields no signals, and only the first
+    security path (in ``_SECURITY_PATHS`` order) that answers is scored.
+    Probes still running once the outcome is known or ``deadline``
+    seconds have passed are cancelled and count as failed. Pages are
+    stored in the content cache, so offline and snapshot runs replay the
+    pages seen when they were cached.
+
     Returns dict with boolean flags:
     - psirt_page: Has dedicated security/PSIRT page
     - bug_bounty: Has bug bounty program
     - security_advisories: Publishes security advisories
     - transparency_report: Has transparency report
     """
-    signals = {
-        "psirt_page": False,
-        "bug_bounty": False,
-        "security_advisories": False,
-        "transparency_report": False
-    }
-    
-    # Common security page paths
-    security_paths = [
-        "/security",
-        "/trust",
-        "/psirt",
-        "/responsible-disclosure",
-        "/bug-bounty",
-        "/security-advisories"
+    signals = _empty_signals()
+    if not homepage:
+        return signals
+
+    base_url = homepage.rstrip("/")
+    homepage_matcher = KeywordMatcher(_HOMEPAGE_KEYWORDS)
+    home = asyncio.ensure_future(
+        _probe(homepage, offline, snapshot_id, timeout,
+               TextExtractor(homepage_matcher, keep_text=False))
+    )
+    pages = [
+        (path, asyncio.ensure_future(_probe(f"{base_url}{path}", offline, snapshot_id, timeout)))
+        for path in _SECURITY_PATHS
     ]
-    
+
+    give_up_at = time.monotonic() + deadline
+    pending = {home, *(task for _, task in pages)}
     try:
-        # Fetch homepage
-        with httpx.Client(timeout=timeout, follow_redirects=True) as client:
-            response = client.get(homepage)
-            if response.status_code != 200:
-                return signals
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            text_content = soup.get_text().lower()
-            
-            # Check for security keywords
-            if any(kw in text_content for kw in ["security", "psirt", "vulnerability", "responsible disclosure"]):
-                signals["psirt_page"] = True
-            
-            if any(kw in text_content for kw in ["bug bounty", "hackerone", "bugcrowd", "vulnerability reward"]):
-                signals["bug_bounty"] = True
-            
-            if any(kw in text_content for kw in ["security advisory", "security bulletin", "cve-"]):
-                signals["security_advisories"] = True
-            
-            if "transparency report" in text_content:
-                signals["transparency_report"] = True
-            
-            # Try fetching dedicated security pages
-            base_url = homepage.rstrip("/")
-            for path in security_paths:
-                try:
-                    sec_response = client.get(f"{base_url}{path}")
-                    if sec_response.status_code == 200:
-                        sec_text = sec_response.text.lower()
-                        if "security" in sec_text or "vulnerability" in sec_text:
-                            signals["psirt_page"] = True
-                        if "bug bounty" in sec_text:
-                            signals["bug_bounty"] = True
-                        break
-                except:
-                    continue
-    
-    except Exception as e:
-        # Fail gracefully - return empty signals
-        pass
-    
+        while pending:
+            if home.done():
+                # No homepage means no signals; otherwise stop once the
+                # homepage set them all or the first security page is known.
+                if home.result() is None or len(homepage_matcher.matched) == len(signals):
+                    break
+                if _first_page(pages, final=False)[0]:
+                    break
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                break
+            _, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+        if not home.done() or home.result() is None:
+            return signals
+        _apply_homepage(signals, homepage_matcher.matched)
+        # Only the first security path that answers counts, as when they
+        # were probed one after another.
+        _, text = _first_page(pages, final=True)
+        if text is not None:
+            _apply_security_page(signals, text)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
     return signals
 
 
 def fetch_vendor_posture_sync(homepage: str, vendor: str, offline: bool = False, snapshot_id: Optional[str] = None) -> Dict[str, bool]:
     """Synchronous wrapper with offline/snapshot support"""
-    if offline or snapshot_id:
-        # Return empty signals in offline mode
-        return {
-            "psirt_page": False,
-            "bug_bounty": False,
-            "security_advisories": False,
-            "transparency_report": False
-        }
-    
-    return fetch_vendor_posture(homepage, vendor)
\ No newline at end of file
+    return run_sync(
+        fetch_vendor_posture(homepage, vendor, offline=offline, snapshot_id=snapshot_id)
+    )
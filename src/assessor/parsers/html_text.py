@@ -0,0 +1,113 @@
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Set
+
+# Elements whose content is never visible text. ``head`` itself is not
+# listed: ``</head>`` is optional, and everything it may hold that carries
+# text (title, script, style, noscript, template) is skipped on its own.
+_SKIPPED = frozenset({"script", "style", "noscript", "template", "svg", "title"})
+# Elements that separate words when rendered; a space is emitted at their
+# boundaries so "<li>SOC 2</li><li>ISO</li>" does not read "soc 2iso".
+_BLOCKS = frozenset({
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+    "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li",
+    "main", "nav", "ol", "p", "section", "table", "td", "th", "tr", "ul",
+})
+
+
+class KeywordMatcher:
+    """Substring matcher over text that arrives in pieces.
+
+    ``keywords`` maps a signal name to the phrases that set it. Each piece
+    is searched together with the tail of the previous one, so phrases
+    split across chunk boundaries are still found. Matching is on the
+    lower-cased text.
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        self.keywords = {
+            name: tuple(phrase.lower() for phrase in phrases) for name, phrases in keywords.items()
+        }
+        self.matched: Set[str] = set()
+        longest = max((len(p) for phrases in self.keywords.values() for p in phrases), default=1)
+        self._overlap = max(longest - 1, 0)
+        self._tail = ""
+
+    def feed(self, text: str) -> None:
+        window = self._tail + text
+        for name, phrases in self.keywords.items():
+            if name not in self.matched and any(phrase in window for phrase in phrases):
+                self.matched.add(name)
+        self._tail = window[-self._overlap:] if self._overlap else ""
+
+    @property
+    def done(self) -> bool:
+        return len(self.matched) == len(self.keywords)
+
+
+class TextExtractor(HTMLParser):
+    """Streaming visible-text extractor built on :mod:`html.parser`.
+
+    Feed HTML in chunks as it arrives; text outside ``script``/``style``
+    and similar elements is lower-cased and passed to ``matcher`` (if any)
+    as it is parsed, and kept for :meth:`text` unless ``keep_text`` is
+    false. No tree is built.
+    """
+
+    def __init__(self, matcher: Optional[KeywordMatcher] = None, keep_text: bool = True):
+        super().__init__(convert_charrefs=True)
+        self.matcher = matcher
+        self.keep_text = keep_text
+        self._skip_depth = 0
+        self._parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED:
+            self._skip_depth += 1
+        elif tag in _BLOCKS:
+            self._emit(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCKS:
+            self._emit(" ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCKS:
+            self._emit(" ")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._emit(data.lower())
+
+    def _emit(self, text: str) -> None:
+        if self.matcher is not None:
+            self.matcher.feed(text)
+        if self.keep_text:
+            self._parts.append(text)
+
+    def text(self) -> str:
+        return "".join(self._parts)
+
+
+def extract_text(html: str) -> str:
+    """Lower-cased visible text of ``html``."""
+    extractor = TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
+
+
+def match_keywords(chunks: Iterable[str], keywords: Dict[str, Iterable[str]]) -> Set[str]:
+    """Names from ``keywords`` whose phrases occur in the visible text of ``chunks``.
+
+    Parsing stops as soon as every name has matched.
+    """
+    matcher = KeywordMatcher(keywords)
+    extractor = TextExtractor(matcher, keep_text=False)
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if matcher.done:
+            return matcher.matched
+    extractor.close()
+    return matcher.matched
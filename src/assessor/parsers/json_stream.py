@@ -0,0 +1,155 @@
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+Chunk = Union[bytes, bytearray, memoryview, str]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Consumed text is dropped from the buffer once this much has piled up.
+_COMPACT_AT = 1 << 16
+
+
+class ArrayStream:
+    """Iterate one array member of a top-level JSON object as it is parsed.
+
+    ``chunks`` is any iterable of bytes (UTF-8) or text pieces, e.g. a
+    response's ``iter_bytes()`` or :meth:`LazyBlob.iter_chunks`. Iterating
+    yields the elements of the first member named in ``keys`` one at a
+    time; only the element being decoded and the unread part of the
+    current chunk are held in memory. The other top-level members are
+    collected in :attr:`header` (those after the array once iteration has
+    finished) and :attr:`key` names the member that was streamed, or is
+    ``None`` if the object had none of ``keys``.
+    """
+
+    def __init__(self, chunks: Iterable[Chunk], keys: Sequence[str]):
+        self.keys = tuple(keys)
+        self.key: Optional[str] = None
+        self.header: Dict[str, Any] = {}
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._state = "start"
+        self._array_pending = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        for chunk in self._chunks:
+            text = chunk if isinstance(chunk, str) else self._utf8.decode(chunk)
+            if text:
+                if self._pos > _COMPACT_AT:
+                    self._buf = self._buf[self._pos:]
+                    self._pos = 0
+                self._buf += text
+                return True
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError("unexpected end of JSON document")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"expected {char!r} at offset {self._pos}, found {found!r}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _next_member(self) -> Optional[str]:
+        """Key of the next top-level member (colon consumed), or ``None`` at ``}``."""
+        if self._state == "start":
+            self._expect("{")
+            self._state = "members"
+            if self._peek() == "}":
+                self._pos += 1
+                return None
+        else:
+            if self._peek() == "}":
+                self._pos += 1
+                return None
+            self._expect(",")
+        key = self._value()
+        self._expect(":")
+        return key
+
+    def __iter__(self) -> Iterator[Any]:
+        self.read_header()
+        if self._state == "done":
+            return
+        if self._array_pending:
+            self._array_pending = False
+            yield from self._elements()
+        while True:
+            key = self._next_member()
+            if key is None:
+                self._state = "done"
+                return
+            self.header[key] = self._value()
+
+    def _elements(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._peek() == "]":
+                self._pos += 1
+                return
+            self._expect(",")
+
+    def read_header(self) -> Dict[str, Any]:
+        """Parse up to the start of the streamed array and return :attr:`header`.
+
+        Members that follow the array are not included yet; the array is
+        left for iteration.
+        """
+        while self.key is None and self._state != "done":
+            key = self._next_member()
+            if key is None:
+                self._state = "done"
+            elif key in self.keys and self._peek() == "[":
+                self.key = key
+                self._array_pending = True
+            else:
+                self.header[key] = self._value()
+        return self.header
+
+
+def iter_array(chunks: Iterable[Chunk], keys: Sequence[str]) -> Iterator[Any]:
+    """Yield the elements of the first of ``keys`` in a streamed JSON object."""
+    return iter(ArrayStream(chunks, keys))
+
+
+def iter_bytes(
+    raw: Union[bytes, bytearray, memoryview], size: int = 1 << 16
+) -> Iterator[memoryview]:
+    """Zero-copy ``size``-byte slices of an in-memory body."""
+    view = memoryview(raw)
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
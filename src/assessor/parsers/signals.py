@@ -0,0 +1,156 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+# A pattern is treated as a plain phrase when, once leading/trailing ``\b``
+# are removed, it has no regex syntax besides escaped punctuation.
+_LITERAL = re.compile(r"(?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])+")
+_BOUNDARY = r"\b"
+
+
+def _literal(pattern: str) -> Optional[str]:
+    """The phrase ``pattern`` matches, ignoring word boundaries; ``None`` if not a phrase."""
+    core = pattern
+    if core.startswith(_BOUNDARY):
+        core = core[len(_BOUNDARY):]
+    if core.endswith(_BOUNDARY) and not core.endswith("\\" + _BOUNDARY):
+        core = core[:-len(_BOUNDARY)]
+    if not _LITERAL.fullmatch(core):
+        return None
+    return re.sub(r"\\(.)", r"\1", core)
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """One regex matching any of ``phrases``, factored on shared prefixes.
+
+    ``sso|saml|single sign-on`` becomes ``s(?:aml|ingle\\ sign\\-on|so)``,
+    so the engine tests each character against one branch per distinct
+    next character instead of against every phrase.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class SignalMatch:
+    """Where a signal's pattern matched in the scanned text."""
+
+    __slots__ = ("signal", "start", "end", "phrase")
+
+    def __init__(self, signal: str, start: int, end: int, phrase: str):
+        self.signal = signal
+        self.start = start
+        self.end = end
+        self.phrase = phrase
+
+    def excerpt(self, text: str, width: int = 80) -> str:
+        """The match with up to ``width`` characters of context each side, whitespace collapsed."""
+        start = max(0, self.start - width)
+        end = min(len(text), self.end + width)
+        snippet = " ".join(text[start:end].split())
+        return f"{'…' if start else ''}{snippet}{'…' if end < len(text) else ''}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"signal": self.signal, "start": self.start, "end": self.end, "phrase": self.phrase}
+
+    def __repr__(self) -> str:
+        return f"SignalMatch({self.signal!r}, {self.start}, {self.end}, {self.phrase!r})"
+
+
+class _Scanner:
+    """The compiled scan regex plus per-pattern verifiers, for one case mode."""
+
+    def __init__(self, source: str, patterns: Sequence[Tuple[str, str, Optional[str]]], flags: int):
+        self.regex = re.compile(source, flags)
+        # Verifiers keyed by the first character of their phrase; patterns
+        # that are not plain phrases are tried at every hit.
+        self.by_first: Dict[str, List[Tuple[str, Pattern]]] = {}
+        self.always: List[Tuple[str, Pattern]] = []
+        for signal, pattern, phrase in patterns:
+            verifier = (signal, re.compile(pattern, flags))
+            if phrase:
+                self.by_first.setdefault(phrase[0], []).append(verifier)
+            else:
+                self.always.append(verifier)
+
+
+class SignalMatcher:
+    """All of a parser's signal patterns, found in one pass over the text.
+
+    ``signals`` maps a signal name to its lower-case regex patterns. The
+    plain phrases among them (``\\b`` allowed at either end) are compiled
+    into a single prefix-factored alternation, with any other patterns as
+    extra branches, and the lower-cased text is scanned once with it. At
+    each hit every pattern starting with that character is checked in
+    full, which applies the word boundaries and finds overlapping or
+    same-position matches of other signals. Text whose length changes
+    when lower-cased is scanned case-insensitively instead, so offsets
+    always index the original text.
+    """
+
+    def __init__(self, signals: Dict[str, Sequence[str]]):
+        self.signals = tuple(signals)
+        patterns = [
+            (signal, pattern, _literal(pattern))
+            for signal, signal_patterns in signals.items()
+            for pattern in signal_patterns
+        ]
+        branches = [_trie_pattern(phrase for _, _, phrase in patterns if phrase)]
+        branches += [f"(?:{pattern})" for _, pattern, phrase in patterns if not phrase]
+        source = "|".join(branch for branch in branches if branch)
+        self._lowered = _Scanner(source, patterns, 0)
+        self._caseless = _Scanner(source, patterns, re.IGNORECASE)
+
+    def _scan(self, text: str, pending: Iterable[str]) -> Iterator[SignalMatch]:
+        haystack = text.lower()
+        scanner = self._lowered
+        if len(haystack) != len(text):
+            haystack, scanner = text, self._caseless
+        search = scanner.regex.search
+        pos = 0
+        while pending:
+            hit = search(haystack, pos)
+            if hit is None:
+                return
+            start = hit.start()
+            candidates = scanner.by_first.get(haystack[start].lower(), [])
+            matched_here = set()
+            for signal, verifier in candidates + scanner.always:
+                if signal in pending and signal not in matched_here:
+                    found = verifier.match(haystack, start)
+                    if found is not None:
+                        matched_here.add(signal)
+                        yield SignalMatch(signal, start, found.end(), text[start:found.end()])
+            pos = start + 1
+
+    def finditer(self, text: str) -> Iterator[SignalMatch]:
+        """Every match in ``text``, in order of position."""
+        return self._scan(text, frozenset(self.signals))
+
+    def first_matches(self, text: str) -> Dict[str, SignalMatch]:
+        """The earliest match of each signal, scanning only until all are found."""
+        found: Dict[str, SignalMatch] = {}
+        pending = set(self.signals)
+        for match in self._scan(text, pending):
+            if match.signal in pending:
+                found[match.signal] = match
+                pending.discard(match.signal)
+        return found
+
+    def flags(self, text: str) -> Dict[str, bool]:
+        """``{signal: matched}`` for every signal, in declaration order."""
+        found = self.first_matches(text)
+        return {name: name in found for name in self.signals}
@@ -0,0 +1,58 @@
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+
+class BackgroundLoop:
+    """An event loop on a daemon thread for work that outlives the caller.
+
+    The sync fetch wrappers run each call in its own short-lived
+    ``asyncio.run`` loop, so tasks such as stale-while-revalidate refreshes
+    are submitted here instead. Submissions are deduplicated by key while
+    one is in flight.
+    """
+
+    def __init__(self, name: str = "assessor-background"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Dict[Hashable, Future] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+            self._thread.start()
+            self._loop = loop
+        return self._loop
+
+    def submit(self, key: Hashable, factory: Callable[[], Awaitable]) -> Future:
+        """Run ``factory()`` on the background loop unless ``key`` is already running."""
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and not pending.done():
+                return pending
+            future = asyncio.run_coroutine_threadsafe(factory(), self._ensure_loop())
+            self._pending[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+
+
+background = BackgroundLoop()
+atexit.register(background.stop)
@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from assessor.config.settings import Config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"circuit open for {name}; next probe in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one upstream.
+
+    After ``failure_threshold`` failures in a row the breaker opens and
+    :meth:`before` fails fast for ``reset_timeout`` seconds. The first
+    call after that is let through as a half-open probe (others keep
+    failing fast meanwhile); its success closes the breaker, its failure
+    opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = Config.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = Config.BREAKER_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before(self) -> None:
+        """Admit a call, or raise :class:`CircuitOpenError`."""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            retry_in = self._opened_at + self.reset_timeout - self._clock()
+            if self._state == OPEN and retry_in <= 0:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(self.name, max(retry_in, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """Give up an admitted call without an outcome (e.g. it was cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self._state != CLOSED:
+                retry_in = max(self._opened_at + self.reset_timeout - self._clock(), 0.0)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "failures": self._failures,
+                "retry_in": retry_in,
+            }
+
+
+class BreakerRegistry:
+    """One :class:`CircuitBreaker` per host, created on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        return self.get(urlsplit(url).hostname or "")
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name)
+            return breaker
+
+    def states(self) -> List[Dict[str, Any]]:
+        """State of every breaker, for monitoring."""
+        with self._lock:
+            breakers = sorted(self._breakers.values(), key=lambda breaker: breaker.name)
+        return [breaker.snapshot() for breaker in breakers]
+
+    def reset(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._breakers.clear()
+            else:
+                self._breakers.pop(name, None)
+
+
+breakers = BreakerRegistry()
@@ -0,0 +1,302 @@
+import atexit
+import base64
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from assessor.config.settings import Config
+from assessor.utils.http import normalize_url
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Query parameters that change from run to run (sync windows) and are
+# ignored when matching a request to a recording.
+VOLATILE_PARAMS = frozenset({"lastModStartDate", "lastModEndDate", "pubStartDate", "pubEndDate"})
+# Headers describing the wire encoding or the session rather than the body.
+_DROPPED_HEADERS = frozenset({
+    "connection", "content-encoding", "content-length", "keep-alive", "set-cookie",
+    "transfer-encoding",
+})
+_VALIDATOR_HEADERS = ("etag", "last-modified", "cache-control", "expires", "date")
+
+
+class CassetteMiss(LookupError):
+    """Raised when a replayed request has no recorded exchange."""
+
+
+def exchange_key(method: str, url: str, ignore: Iterable[str] = VOLATILE_PARAMS) -> str:
+    """``METHOD url`` with the URL normalized and ``ignore``-d parameters dropped."""
+    parts = urlsplit(normalize_url(url))
+    ignored = frozenset(ignore)
+    query = urlencode([
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name not in ignored
+    ])
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))}"
+
+
+def _encode_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(body).decode("ascii"), "encoding": "base64"}
+
+
+def _decode_body(exchange: Dict[str, Any]) -> bytes:
+    if exchange.get("encoding") == "base64":
+        return base64.b64decode(exchange["body"])
+    return exchange["body"].encode("utf-8")
+
+
+class Cassette:
+    """Recorded upstream exchanges, kept in one JSON file.
+
+    Requests are matched on method and normalized URL, ignoring
+    :data:`VOLATILE_PARAMS`. A URL recorded more than once is replayed in
+    order and then keeps returning its last recording. Only successful
+    and client-error responses are recorded: 304s, throttling and server
+    errors depend on the caller's state and the upstream's mood, so
+    :meth:`respond` answers conditional requests itself and
+    :class:`~assessor.utils.standin.StandInServer` simulates the rest.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, exchanges: Iterable[Dict[str, Any]] = ()):
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._exchanges: Dict[str, List[Dict[str, Any]]] = {}
+        self._played: Dict[str, int] = {}
+        self._dirty = False
+        for exchange in exchanges:
+            self._add(exchange)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Cassette":
+        """The cassette stored at ``path``; empty if the file does not exist yet."""
+        path = Path(path)
+        exchanges = json.loads(path.read_text("utf-8"))["exchanges"] if path.exists() else []
+        return cls(path, exchanges)
+
+    def _add(self, exchange: Dict[str, Any]) -> None:
+        key = exchange_key(exchange["method"], exchange["url"])
+        self._exchanges.setdefault(key, []).append(exchange)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(recorded) for recorded in self._exchanges.values())
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        status: int,
+        headers: Iterable[Any],
+        body: bytes,
+    ) -> bool:
+        """Add an exchange; ``False`` if its status is not worth replaying."""
+        if status == 304 or status == 429 or status >= 500:
+            return False
+        exchange = {
+            "method": method.upper(),
+            "url": url,
+            "status": status,
+            "headers": [
+                [name, value] for name, value in headers if name.lower() not in _DROPPED_HEADERS
+            ],
+            **_encode_body(body),
+        }
+        with self._lock:
+            self._add(exchange)
+            self._dirty = True
+        return True
+
+    def match(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        """The next recording for the request, or ``None``."""
+        key = exchange_key(method, url)
+        with self._lock:
+            recorded = self._exchanges.get(key)
+            if not recorded:
+                return None
+            played = self._played.get(key, 0)
+            self._played[key] = played + 1
+            return recorded[min(played, len(recorded) - 1)]
+
+    def respond(self, request: httpx.Request) -> httpx.Response:
+        """Replay the recording for ``request``, as a 304 when its validators match."""
+        exchange = self.match(request.method, str(request.url))
+        if exchange is None:
+            raise CassetteMiss(f"no recorded exchange for {request.method} {request.url}")
+        headers = httpx.Headers(exchange["headers"])
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if exchange["status"] == 200 and (
+            (etag and request.headers.get("if-none-match") == etag)
+            or (last_modified and request.headers.get("if-modified-since") == last_modified)
+        ):
+            validators = [(name, headers[name]) for name in _VALIDATOR_HEADERS if name in headers]
+            return httpx.Response(304, headers=validators, request=request)
+        return httpx.Response(
+            exchange["status"], headers=headers, content=_decode_body(exchange), request=request
+        )
+
+    def save(self) -> None:
+        """Write the cassette back to :attr:`path` if anything was recorded."""
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return
+            exchanges = [exchange for recorded in self._exchanges.values() for exchange in recorded]
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        partial.write_text(json.dumps({"exchanges": exchanges}, indent=1), "utf-8")
+        os.replace(partial, self.path)
+
+
+_cassettes_lock = threading.Lock()
+_cassettes: Dict[Path, Cassette] = {}
+
+
+def open_cassette(path: Union[str, Path]) -> Cassette:
+    """The process-wide :class:`Cassette` for ``path``, shared by every client."""
+    path = Path(path).resolve()
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette.load(path)
+        return cassette
+
+
+def save_cassettes() -> None:
+    with _cassettes_lock:
+        cassettes = list(_cassettes.values())
+    for cassette in cassettes:
+        cassette.save()
+
+
+atexit.register(save_cassettes)
+
+
+class RecordingTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Pass requests to ``inner`` and record the responses into ``cassette``.
+
+    Bodies are read in full and handed on decoded, so a capped streaming
+    read still records the whole page.
+    """
+
+    def __init__(self, cassette: Cassette, inner: Union[httpx.BaseTransport, httpx.AsyncBaseTransport]):
+        self.cassette = cassette
+        self._inner = inner
+
+    def _keep(self, request: httpx.Request, response: httpx.Response) -> httpx.Response:
+        self.cassette.record(
+            request.method, str(request.url), response.status_code,
+            response.headers.multi_items(), response.content,
+        )
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name.lower() not in _DROPPED_HEADERS
+        ]
+        return httpx.Response(
+            response.status_code, headers=headers, content=response.content, request=request
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self._inner.handle_request(request)
+        try:
+            response.read()
+        finally:
+            response.close()
+        return self._keep(request, response)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._inner.handle_async_request(request)
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        return self._keep(request, response)
+
+    def close(self) -> None:
+        self._inner.close()
+        self.cassette.save()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+        self.cassette.save()
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Answer every request from ``cassette`` without touching the network."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.cassette.respond(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return self.cassette.respond(request)
+
+
+# Header carrying the real upstream URL to a stand-in server.
+UPSTREAM_HEADER = "X-Upstream-Url"
+
+
+class StandInTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Send every request to the stand-in server at ``base_url``.
+
+    The original URL travels in :data:`UPSTREAM_HEADER`; the client
+    registry, rate limiter and breakers still see the real hosts.
+    """
+
+    def __init__(self, base_url: str, inner: Union[httpx.BaseTransport, httpx.AsyncBaseTransport]):
+        self._base = httpx.URL(base_url)
+        self._inner = inner
+
+    def _redirect(self, request: httpx.Request) -> httpx.Request:
+        headers = request.headers.copy()
+        headers[UPSTREAM_HEADER] = str(request.url)
+        headers["Host"] = self._base.netloc.decode("ascii")
+        url = request.url.copy_with(
+            scheme=self._base.scheme, host=self._base.host, port=self._base.port
+        )
+        return httpx.Request(
+            request.method, url, headers=headers, content=request.content,
+            extensions=request.extensions,
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self._inner.handle_request(self._redirect(request))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._inner.handle_async_request(self._redirect(request))
+
+    def close(self) -> None:
+        self._inner.close()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def configured_transport(sync: bool, limits: httpx.Limits, http2: bool) -> Optional[Any]:
+    """The transport ``Config.HTTP_STANDIN_URL`` / ``Config.HTTP_CASSETTE`` ask for.
+
+    ``None`` means the client's default network transport.
+    """
+    network = httpx.HTTPTransport if sync else httpx.AsyncHTTPTransport
+    if Config.HTTP_STANDIN_URL:
+        return StandInTransport(Config.HTTP_STANDIN_URL, network(limits=limits))
+    if not Config.HTTP_CASSETTE:
+        return None
+    cassette = open_cassette(Config.HTTP_CASSETTE)
+    if Config.HTTP_CASSETTE_MODE == RECORD:
+        return RecordingTransport(cassette, network(limits=limits, http2=http2))
+    if Config.HTTP_CASSETTE_MODE == REPLAY:
+        return ReplayTransport(cassette)
+    raise ValueError(f"unknown cassette mode {Config.HTTP_CASSETTE_MODE!r}")
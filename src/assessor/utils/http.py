@@ -1,11 +1,259 @@
-from httpx import AsyncClient, Response, HTTPStatusError
+import asyncio
+import atexit
+import os
+import threading
+import weakref
+from typing import Any, Awaitable, Dict, Mapping, MutableMapping, Optional, TypeVar
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-async def fetch(url: str) -> Response:
-    async with AsyncClient() as client:
-        response = await client.get(url)
-        response.raise_for_status()
+from httpx import AsyncClient, Client, Limits, Response, HTTPStatusError, TransportError
+
+from assessor.config.settings import Config
+from assessor.utils.breaker import breakers
+from assessor.utils.ratelimit import backoff, limiter
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+except ImportError:  # optional dependency
+    h2 = None
+
+T = TypeVar("T")
+
+# Statuses worth retrying; 429 and 503 also push back every caller of the host.
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+_THROTTLE_STATUSES = {429, 503}
+
+_lock = threading.Lock()
+_pid = os.getpid()
+# Async clients are bound to the event loop that opened their connections,
+# so they are kept per loop and dropped with it.
+_async_clients: "MutableMapping[asyncio.AbstractEventLoop, Dict[str, AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_sync_clients: Dict[str, Client] = {}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def normalize_url(url: str) -> str:
+    """``url`` with a lower-cased origin, default port dropped and query sorted.
+
+    Used as the identity of a fetch, so spellings of the same request
+    compare equal.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def _client_options(sync: bool) -> Dict[str, Any]:
+    limits = Limits(
+        max_connections=Config.HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+    )
+    options: Dict[str, Any] = {
+        "limits": limits,
+        "http2": h2 is not None,
+        "timeout": Config.TIMEOUT,
+        "headers": {"User-Agent": Config.HTTP_USER_AGENT},
+    }
+    # Imported here: the cassette module builds on this one.
+    from assessor.utils.cassette import configured_transport
+
+    transport = configured_transport(sync, limits, h2 is not None)
+    if transport is not None:
+        options["transport"] = transport
+    return options
+
+
+def _check_fork() -> None:
+    global _pid, _background
+    if _pid != os.getpid():
+        # Pooled sockets are shared with the parent after fork; start over.
+        _async_clients.clear()
+        _sync_clients.clear()
+        # Its thread did not survive fork either.
+        _background = None
+        _pid = os.getpid()
+
+
+def get_async_client(url: str) -> AsyncClient:
+    """Return the pooled async client for ``url``'s origin on the running loop.
+
+    Each origin gets its own connection pool, so ``HTTP_MAX_CONNECTIONS_PER_HOST``
+    applies per host and TLS sessions are reused across requests.
+    """
+    loop = asyncio.get_running_loop()
+    origin = _origin(url)
+    with _lock:
+        _check_fork()
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(origin)
+        if client is None or client.is_closed:
+            client = clients[origin] = AsyncClient(**_client_options(sync=False))
+        return client
+
+
+def get_client(url: str) -> Client:
+    """Return the pooled, thread-safe sync client for ``url``'s origin."""
+    origin = _origin(url)
+    with _lock:
+        _check_fork()
+        client = _sync_clients.get(origin)
+        if client is None or client.is_closed:
+            client = _sync_clients[origin] = Client(**_client_options(sync=True))
+        return client
+
+
+async def aclose_clients() -> None:
+    """Close the async clients opened on the running loop."""
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+class _BackgroundLoop:
+    """An event loop running forever on a daemon thread.
+
+    :func:`run_sync` runs its coroutines here, so the pooled async clients
+    opened on this loop, and their keep-alive connections, outlive each call.
+    """
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="http-loop", daemon=True)
+        self.thread.start()
+
+    def run(self, coro: Awaitable[T]) -> T:
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("run_sync cannot be called from a coroutine it is running")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result()
+        except BaseException:
+            # Interrupted (e.g. KeyboardInterrupt): stop the coroutine too.
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        if self.thread.is_alive():
+            asyncio.run_coroutine_threadsafe(aclose_clients(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        self.loop.close()
+
+
+_background: Optional[_BackgroundLoop] = None
+
+
+def _background_loop() -> _BackgroundLoop:
+    global _background
+    with _lock:
+        _check_fork()
+        if _background is None:
+            _background = _BackgroundLoop()
+        return _background
+
+
+def close_clients() -> None:
+    """Close the sync clients and the async clients of :func:`run_sync`'s loop.
+
+    The next request opens fresh clients, picking up configuration changes
+    such as a new cassette.
+    """
+    global _background
+    with _lock:
+        clients = list(_sync_clients.values())
+        _sync_clients.clear()
+        background, _background = _background, None
+    for client in clients:
+        client.close()
+    if background is not None:
+        background.close()
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run ``coro`` to completion on the shared background event loop.
+
+    Unlike ``asyncio.run`` the loop and its pooled clients are kept between
+    calls, so sync entry points reuse keep-alive connections and TLS
+    sessions. Must not be called from a coroutine running on that loop.
+    """
+    return _background_loop().run(coro)
+
+
+atexit.register(close_clients)
+
+
+async def get_with_retries(
+    url: str,
+    params: Optional[Mapping[str, str]] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    timeout: Optional[float] = None,
+    max_retries: int = Config.RETRIES,
+) -> Response:
+    """GET ``url`` through the pooled client, within the host's rate limit.
+
+    Transport errors and 429/5xx responses are retried up to
+    ``max_retries`` attempts in total with jittered exponential backoff;
+    429 and 503 honour ``Retry-After`` and hold back every caller of the
+    host, in this process and others sharing the cache. A 304 is returned
+    as is; other error statuses raise ``HTTPStatusError``. Transport
+    errors and 5xx responses count against the host's circuit breaker;
+    while it is open :class:`~assessor.utils.breaker.CircuitOpenError` is
+    raised without a request being made.
+    """
+    client = get_async_client(url)
+    breaker = breakers.for_url(url)
+    attempt = 0
+    while True:
+        breaker.before()
+        try:
+            await limiter.acquire(url)
+            attempt += 1
+            response = await client.get(
+                url, params=params, headers=headers, timeout=timeout or Config.TIMEOUT
+            )
+        except TransportError:
+            breaker.record_failure()
+            if attempt >= max_retries:
+                raise
+            await asyncio.sleep(backoff(attempt))
+            continue
+        except BaseException:
+            breaker.release()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if response.status_code in _RETRY_STATUSES and attempt < max_retries:
+            if response.status_code in _THROTTLE_STATUSES:
+                await limiter.penalize(url, response.headers.get("Retry-After"), attempt)
+            else:
+                await asyncio.sleep(backoff(attempt))
+            continue
+        if response.status_code != 304:
+            response.raise_for_status()
         return response
 
+
+async def fetch(url: str) -> Response:
+    response = await get_async_client(url).get(url)
+    response.raise_for_status()
+    return response
+
 def is_valid_response(response: Response) -> bool:
     return response.status_code == 200
 
@@ -13,4 +261,4 @@ def extract_json(response: Response) -> dict:
     return response.json() if is_valid_response(response) else {}
 
 def extract_text(response: Response) -> str:
-    return response.text if is_valid_response(response) else ''
\ No newline at end of file
+    return response.text if is_valid_response(response) else ''
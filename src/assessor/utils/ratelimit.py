@@ -0,0 +1,83 @@
+import asyncio
+import random
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+from assessor.cache import aio
+from assessor.config.settings import Config
+
+NVD_HOST = "services.nvd.nist.gov"
+GITHUB_HOST = "api.github.com"
+
+
+def host_limit(host: str) -> Optional[Tuple[int, float]]:
+    """``(requests, per_seconds)`` for ``host``, or ``None`` when unthrottled."""
+    if host == NVD_HOST and Config.NVD_API_KEY:
+        return Config.NVD_KEYED_RATE_LIMIT
+    if host == GITHUB_HOST and Config.GITHUB_TOKEN:
+        return Config.GITHUB_KEYED_RATE_LIMIT
+    return Config.HOST_RATE_LIMITS.get(host)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait per a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+def backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter for retry ``attempt`` (1-based)."""
+    ceiling = min(Config.RETRY_BACKOFF_MAX, Config.RETRY_BACKOFF_BASE * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+class RateLimiter:
+    """Per-host token buckets whose state lives in the cache database.
+
+    :meth:`acquire` reserves a slot and sleeps until it is due, so
+    coroutines, threads and worker processes sharing a cache file share
+    one budget per host. :meth:`penalize` pushes every caller back after a
+    429/503, honouring ``Retry-After`` when the server sends one.
+    """
+
+    async def acquire(self, url: str) -> float:
+        host = urlsplit(url).hostname or ""
+        limit = host_limit(host)
+        if limit is None:
+            return 0.0
+        requests, per_seconds = limit
+        wait = await aio.reserve_token(host, float(requests), requests / per_seconds)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    async def penalize(self, url: str, retry_after: Optional[str], attempt: int) -> float:
+        host = urlsplit(url).hostname or ""
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = backoff(attempt)
+        else:
+            # Spread the callers that were all told the same instant.
+            delay += random.uniform(0, Config.RETRY_BACKOFF_BASE)
+        await aio.block_host(host, time.time() + delay)
+        if host_limit(host) is None:
+            # Unthrottled hosts never consult the bucket, so wait here.
+            await asyncio.sleep(delay)
+        return delay
+
+
+limiter = RateLimiter()
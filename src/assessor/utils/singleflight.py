@@ -0,0 +1,75 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _LeaderGone(Exception):
+    """The call being waited on was cancelled before it produced a result."""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs ``factory()``; callers arriving while
+    it is in flight await its result (or exception) instead of starting
+    their own. Works across threads and event loops, since the sync
+    wrappers give each web request its own loop. If the running call is
+    cancelled, a waiting caller takes over and runs the factory itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, concurrent.futures.Future] = {}
+        self._pid = os.getpid()
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Calls in flight belong to the parent's threads.
+                    self._calls.clear()
+                    self._pid = os.getpid()
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = concurrent.futures.Future()
+            if leader:
+                return await self._lead(key, future, factory)
+            try:
+                # Shielded so a cancelled follower does not cancel the shared call.
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderGone:
+                continue
+
+    async def _lead(
+        self,
+        key: Hashable,
+        future: concurrent.futures.Future,
+        factory: Callable[[], Awaitable[T]],
+    ) -> T:
+        try:
+            result = await factory()
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        except BaseException:
+            future.set_exception(_LeaderGone())
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+flights = SingleFlight()
@@ -0,0 +1,172 @@
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from assessor.utils.cassette import UPSTREAM_HEADER, Cassette, CassetteMiss
+
+# Headers the server writes itself.
+_OWN_HEADERS = frozenset({"connection", "content-length", "date", "server", "transfer-encoding"})
+
+
+class UpstreamProfile:
+    """How the stand-in misbehaves: latency, failures and throttling.
+
+    Each response waits ``latency`` seconds, scaled by a log-normal
+    factor with shape ``sigma`` so a few requests take much longer (the
+    tail real upstreams have). ``error_rate`` of requests fail with a
+    502, and each upstream host admits ``rate_limit = (requests,
+    per_seconds)`` in any sliding window, answering the excess with 429
+    and ``Retry-After``.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        sigma: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[Tuple[int, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        if not self.latency:
+            return 0.0
+        with self._lock:
+            factor = self._random.lognormvariate(0.0, self.sigma) if self.sigma else 1.0
+        return self.latency * factor
+
+    def fails(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+class StandInServer:
+    """Serve a :class:`Cassette` over HTTP the way real upstreams behave.
+
+    Point the shared clients at :attr:`url` through ``Config.HTTP_STANDIN_URL``
+    (``ASSESSOR_HTTP_STANDIN``); requests are matched on the URL carried in
+    the ``X-Upstream-Url`` header, or on ``Host`` and path without it.
+    :attr:`statuses` counts the responses sent.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        profile: Optional[UpstreamProfile] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.cassette = cassette
+        self.profile = profile or UpstreamProfile()
+        self.statuses: Counter = Counter()
+        self._windows: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._serve(self)
+
+            def do_HEAD(self):
+                server._serve(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _retry_after(self, upstream: str) -> Optional[float]:
+        """Seconds until ``upstream`` has room again; ``None`` admits the request."""
+        if self.profile.rate_limit is None:
+            return None
+        requests, per_seconds = self.profile.rate_limit
+        host = urlsplit(upstream).hostname or ""
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(host, deque())
+            while window and window[0] <= now - per_seconds:
+                window.popleft()
+            if len(window) >= requests:
+                return window[0] + per_seconds - now
+            window.append(now)
+            return None
+
+    def _serve(self, handler: BaseHTTPRequestHandler) -> None:
+        upstream = handler.headers.get(UPSTREAM_HEADER) or (
+            f"https://{handler.headers.get('Host', '')}{handler.path}"
+        )
+        time.sleep(self.profile.delay())
+        retry_after = self._retry_after(upstream)
+        if retry_after is not None:
+            self._send(handler, 429, [("Retry-After", str(math.ceil(retry_after)))], b"")
+            return
+        if self.profile.fails():
+            self._send(handler, 502, [], b"bad gateway")
+            return
+        request = httpx.Request(handler.command, upstream, headers=list(handler.headers.items()))
+        try:
+            response = self.cassette.respond(request)
+        except CassetteMiss as exc:
+            self._send(handler, 404, [("Content-Type", "text/plain")], str(exc).encode())
+            return
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name.lower() not in _OWN_HEADERS
+        ]
+        self._send(handler, response.status_code, headers, response.content)
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, headers, body: bytes) -> None:
+        with self._lock:
+            self.statuses[status] += 1
+        handler.send_response(status)
+        for name, value in headers:
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if handler.command != "HEAD":
+            handler.wfile.write(body)
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -4,13 +4,14 @@ Merges withsecure-assessor's evidence engine with reputation-recon_Final's asses
 """
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-import json
 
 # Import from existing withsecure-assessor modules
 from assessor.resolver.resolver import resolve_entity
-from assessor.fetchers.nvd import fetch_cves_sync
-from assessor.fetchers.cisa_kev import fetch_cisa_kev_sync
+from assessor.fetchers.gather import assessment_sources, gather_sources_sync
+from assessor.fetchers.github_advisories import annotate_cves
 from assessor.alternatives.suggest import suggest_alternatives
+from assessor.cache.db import get_assessment, get_assessment_history, record_assessment
+from assessor.utils.breaker import breakers
 
 api = Blueprint('api', __name__)
 
@@ -44,10 +45,17 @@ def assess():
             'homepage': entity_result.homepage
         }
         
-        # 2. Fetch CVE data - USE MOCK IF EMPTY
+        # 2. Fetch all sources concurrently (posture pages are not scored here);
+        #    CVE data - USE MOCK IF EMPTY
+        results = gather_sources_sync(
+            assessment_sources(entity['product'], vendor=entity['vendor'])
+        )
+        source_status = {name: outcome.to_dict() for name, outcome in results.items()}
         cve_data = []
         try:
-            raw_cves = fetch_cves_sync(entity['product'], offline=False, snapshot_id=None)
+            if not results['nvd_cves'].ok:
+                raise RuntimeError(results['nvd_cves'].error)
+            raw_cves = results['nvd_cves'].value
             if isinstance(raw_cves, list) and len(raw_cves) > 0:
                 for cve in raw_cves:
                     cve_data.append({
@@ -68,10 +76,14 @@ def assess():
             print(f"⚠ CVE fetch failed: {e}")
             cve_data = get_mock_cve_data(entity['product'])
         
-        # 3. Fetch CISA KEV data - USE MOCK IF EMPTY
+        # 3. CISA KEV data
         cisa_data = []
         try:
-            raw_kev = fetch_cisa_kev_sync(offline=False, snapshot_id=None)
+            if not results['cisa_kev'].ok:
+                raise RuntimeError(results['cisa_kev'].error)
+            kev_index = results['cisa_kev'].value
+            cve_data = kev_index.annotate(cve_data)
+            raw_kev = kev_index.entries
             if isinstance(raw_kev, list) and len(raw_kev) > 0:
                 for item in raw_kev:
                     vendor_project = item.get('vendorProject', '').lower()
@@ -93,6 +105,12 @@ def assess():
             print(f"✓ Found {len(cisa_data)} CISA KEV entries for {entity['product']}")
         except Exception as e:
             print(f"⚠ CISA KEV fetch failed: {e}")
+
+        # Join GitHub advisories from the local alias index (no network)
+        try:
+            cve_data = annotate_cves(cve_data)
+        except Exception as e:
+            print(f"⚠ GitHub advisory lookup failed: {e}")
         
         # 4. Synthesize security brief
         brief = synthesize_security_brief(entity, cve_data, cisa_data)
@@ -119,18 +137,22 @@ def assess():
             'cve_data': cve_data[:10],
             'cisa_data': cisa_data,
             'timestamp': datetime.now().isoformat(),
-            'snapshot_mode': snapshot_mode
+            'snapshot_mode': snapshot_mode,
+            'source_status': source_status
         }
         
-        # 8. Cache the assessment
+        # 8. Record the assessment in the history store
         if snapshot_mode:
             try:
-                # Simple file-based caching (more reliable than DB)
-                cache_file = f"cache_{entity['product'].replace(' ', '_')}.json"
-                with open(cache_file, 'w') as f:
-                    json.dump(assessment, f)
+                record_assessment(
+                    entity['product'],
+                    assessment,
+                    vendor=entity['vendor'],
+                    score=trust_score['value'],
+                    source='web',
+                )
             except Exception as e:
-                print(f"⚠ Caching failed: {e}")
+                print(f"⚠ Recording assessment failed: {e}")
         
         return jsonify(assessment)
         
@@ -141,28 +163,52 @@ def assess():
         return jsonify({'error': str(e)}), 500
 
 
+@api.route('/api/breakers', methods=['GET'])
+def breaker_states():
+    """Circuit breaker state per upstream host, for monitoring."""
+    return jsonify(breakers.states())
+
+
 @api.route('/api/history', methods=['GET'])
 def history():
-    """Return recent assessments from file cache"""
+    """Return recent assessments, newest first.
+    
+    Each item holds the indexed columns (id, product, vendor, score,
+    snapshot_id, source, created_at); fetch the full assessment from
+    /api/history/<id>. Query parameters: limit (max 100), before (cursor
+    from the X-Next-Cursor header of the previous page), product, vendor,
+    source ("web" or "cli"), min_score and max_score.
+    """
     try:
-        import glob
-        import os
-        
-        history_items = []
-        cache_files = glob.glob("cache_*.json")
-        
-        for cache_file in sorted(cache_files, key=os.path.getmtime, reverse=True)[:10]:
-            try:
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                    history_items.append(data)
-            except:
-                continue
-        
-        return jsonify(history_items)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        items, next_cursor = get_assessment_history(
+            limit=limit,
+            before=request.args.get('before'),
+            product=request.args.get('product'),
+            vendor=request.args.get('vendor'),
+            min_score=request.args.get('min_score', type=float),
+            max_score=request.args.get('max_score', type=float),
+            source=request.args.get('source'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"⚠ History fetch failed: {e}")
         return jsonify([])
+    
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@api.route('/api/history/<int:assessment_id>', methods=['GET'])
+def history_item(assessment_id):
+    """Return one recorded assessment, with the payload its source stored."""
+    item = get_assessment(assessment_id)
+    if item is None:
+        return jsonify({'error': 'Assessment not found'}), 404
+    return jsonify(item)
 
 
 # ==================== SYNTHESIS LOGIC ====================
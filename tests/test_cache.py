@@ -1,3 +1,5 @@
+import os
+
 from src.assessor.cache.db import get_cached_content, upsert_content
 
 def test_cache_roundtrip(tmp_path, monkeypatch):
@@ -7,4 +9,432 @@ def test_cache_roundtrip(tmp_path, monkeypatch):
     content_id = upsert_content("https://example.com", b"payload")
     cached = get_cached_content("https://example.com")
     assert cached is not None
-    assert cached["id"] == content_id
\ No newline at end of file
+    assert cached["id"] == content_id
+
+def test_cache_survives_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache.db import get_connection, record_fact
+
+    first = upsert_content("https://example.com/a", b"a")
+    record_fact(first, "claim", "parser", "vendor", {"k": "v"})
+    upsert_content("https://example.com/b", b"b")
+
+    assert get_cached_content("https://example.com/a") is not None
+    with get_connection(readonly=True) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+        assert conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 1
+
+
+def test_identical_bodies_share_one_compressed_blob(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache.db import get_connection
+
+    body = b'{"vulnerabilities": []}' * 200
+    upsert_content("https://example.com/?page=1", body)
+    upsert_content("https://example.com/?page=2", body)
+
+    with get_connection(readonly=True) as conn:
+        blobs = conn.execute("SELECT codec, size, length(data) FROM blobs").fetchall()
+    assert len(blobs) == 1
+    assert blobs[0][0] != "identity"
+    assert blobs[0][2] < blobs[0][1]
+
+    cached = get_cached_content("https://example.com/?page=2")
+    assert bytes(cached["raw"]) == body
+
+
+def test_bulk_writes_return_ids_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache.db import record_facts, upsert_contents
+
+    content_ids = upsert_contents(
+        (f"https://example.com/{i}", f"body-{i % 3}".encode()) for i in range(1200)
+    )
+    assert len(set(content_ids)) == 1200
+    assert get_cached_content("https://example.com/42")["id"] == content_ids[42]
+
+    fact_ids = record_facts(
+        {
+            "content_id": content_id,
+            "claim": "cve",
+            "parser_id": "nvd",
+            "source_type": "api",
+            "payload": {"n": n},
+        }
+        for n, content_id in enumerate(content_ids[:700])
+    )
+    assert fact_ids == list(range(fact_ids[0], fact_ids[0] + 700))
+
+
+def test_background_writer_resolves_queued_content_for_facts(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache.writer import BackgroundWriter
+
+    writer = BackgroundWriter(max_batch=10, flush_interval=60)
+    content = writer.queue_content("https://example.com/kev", b"{}")
+    fact = writer.queue_fact(content, "kev", "cisa", "api", {"id": "CVE-2021-34527"})
+    writer.flush()
+    writer.close()
+
+    assert get_cached_content("https://example.com/kev")["id"] == content.result()
+    assert fact.result() > 0
+
+    # A cancelled future is still written and does not stop the worker.
+    writer = BackgroundWriter(max_batch=10, flush_interval=60)
+    abandoned = writer.queue_content("https://example.com/abandoned", b"a")
+    assert abandoned.cancel()
+    kept = writer.queue_content("https://example.com/kept", b"k")
+    writer.flush()
+    assert kept.result(timeout=5) > 0
+    assert get_cached_content("https://example.com/abandoned") is not None
+    writer.close()
+
+
+def test_async_content_writes_share_the_background_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    import asyncio
+
+    from src.assessor.cache import aio, writer
+
+    batches = []
+    original = writer.upsert_contents
+
+    def upsert_contents(items):
+        items = list(items)
+        batches.append(len(items))
+        return original(items)
+
+    monkeypatch.setattr(writer, "upsert_contents", upsert_contents)
+
+    async def store():
+        return await asyncio.gather(*(
+            aio.upsert_content(f"https://example.com/{n}", b"x" * n, headers={"ETag": f'"{n}"'})
+            for n in range(20)
+        ))
+
+    ids = asyncio.run(store())
+    assert len(set(ids)) == 20
+    assert sum(batches) == 20 and len(batches) < 20
+    assert get_cached_content("https://example.com/7")["etag"] == '"7"'
+
+
+def test_memory_tier_decodes_once_and_invalidates_on_write(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache.db import get_cached_payload
+
+    calls = []
+
+    def decode(raw):
+        calls.append(1)
+        return bytes(raw).decode()
+
+    upsert_content("https://example.com/kev", b"v1")
+    assert get_cached_payload("https://example.com/kev", decode) == "v1"
+    assert get_cached_payload("https://example.com/kev", decode) == "v1"
+    assert len(calls) == 1
+
+    upsert_content("https://example.com/kev", b"v2")
+    assert get_cached_payload("https://example.com/kev", decode) == "v2"
+    assert len(calls) == 2
+
+
+def test_memory_cache_evicts_by_size_and_ttl(monkeypatch):
+    from src.assessor.cache import memory
+
+    cache = memory.MemoryCache(max_bytes=10, ttl_seconds=5)
+    cache.put(("a", None), "A", 6)
+    cache.put(("b", None), "B", 6)
+    assert cache.get(("a", None)) is None
+    assert cache.get(("b", None)) == "B"
+
+    now = memory.time.monotonic()
+    monkeypatch.setattr(memory.time, "monotonic", lambda: now + 10)
+    assert cache.get(("b", None)) is None
+    assert cache.size_bytes == 0
+
+
+def test_snapshot_bundle_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "source.sqlite3")
+    from src.assessor.cache.db import record_fact
+    from src.assessor.cache.snapshot import export_snapshot, import_snapshot
+
+    body = b'{"vulnerabilities": [1, 2, 3]}' * 50
+    content_id = upsert_content("https://example.com/kev", body, snapshot_id="snap-1")
+    upsert_content("https://example.com/other", b"not in snapshot")
+    record_fact(content_id, "kev", "cisa", "api", {"n": 3}, snapshot_id="snap-1")
+    bundle_path = export_snapshot("snap-1", tmp_path / "snap-1.bundle")
+
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "offline.sqlite3")
+    from src.assessor.cache.db import get_bundle, get_connection
+    assert get_bundle("snap-1") is None
+    assert import_snapshot(bundle_path) == "snap-1"
+
+    cached = get_cached_content("https://example.com/kev", snapshot_id="snap-1")
+    assert bytes(cached["raw"]) == body
+    assert get_cached_content("https://example.com/other", snapshot_id="snap-1") is None
+    assert get_bundle("snap-1").facts[0]["url"] == "https://example.com/kev"
+
+    # Another process re-imports the snapshot from a new location.
+    moved = tmp_path / "moved.bundle"
+    moved.write_bytes(bundle_path.read_bytes())
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE bundles SET path = ?, imported_at = '2100-01-01 00:00:00' WHERE snapshot_id = 'snap-1'",
+            (str(moved),),
+        )
+    assert get_bundle("snap-1").path == moved
+    assert bytes(get_cached_content("https://example.com/kev", snapshot_id="snap-1")["raw"]) == body
+
+
+def test_bundle_facts_resolve_along_the_chain(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "source.sqlite3")
+    monkeypatch.setattr("src.assessor.cache.snapshot._SNAPSHOT_META", tmp_path / "snapshot.json")
+    from src.assessor.cache.db import facts_for, record_fact
+    from src.assessor.cache.snapshot import create_snapshot, export_snapshot, import_snapshot
+
+    kev_id = upsert_content("https://example.com/kev", b"kev-v1")
+    nvd_id = upsert_content("https://example.com/nvd", b"nvd-v1")
+    create_snapshot("day-1", {})
+    record_fact(kev_id, "kev", "cisa", "api", {"n": 1}, snapshot_id="day-1", product="Zoom")
+    record_fact(nvd_id, "cve", "nvd", "api", {"cve_id": "CVE-2024-1"}, snapshot_id="day-1", product="Zoom")
+    kev_id = upsert_content("https://example.com/kev", b"kev-v2")
+    create_snapshot("day-2", {}, parent_id="day-1")
+    record_fact(kev_id, "kev", "cisa", "api", {"n": 2}, snapshot_id="day-2", product="Zoom")
+    bundle_path = export_snapshot("day-2", tmp_path / "day-2.bundle")
+
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "offline.sqlite3")
+    import_snapshot(bundle_path)
+
+    facts = facts_for(product="Zoom", snapshot="day-2")
+    assert sorted((fact["claim"], fact["url"]) for fact in facts) == [
+        ("cve", "https://example.com/nvd"),
+        ("kev", "https://example.com/kev"),
+    ]
+    kev = facts_for(claim="kev", snapshot="day-2")
+    assert [fact["payload"] for fact in kev] == [{"n": 2}]
+    assert kev[0]["snapshot_id"] == "day-2" and kev[0]["retrieved_at"]
+    assert facts_for(cve_id="CVE-2024-1", snapshot="day-2")[0]["url"] == "https://example.com/nvd"
+    assert facts_for(product="Slack", snapshot="day-2") == []
+    assert len(facts_for(snapshot="day-2", limit=1)) == 1
+
+
+def test_delta_snapshot_reads_fall_back_to_parent(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache.db import get_connection
+    from src.assessor.cache.snapshot import compact_snapshot, create_snapshot
+    monkeypatch.setattr("src.assessor.cache.snapshot._SNAPSHOT_META", tmp_path / "snapshot.json")
+
+    upsert_content("https://example.com/kev", b"kev-v1")
+    upsert_content("https://example.com/nvd", b"nvd-v1")
+    create_snapshot("day-1", {})
+    upsert_content("https://example.com/kev", b"kev-v2")
+    create_snapshot("day-2", {}, parent_id="day-1")
+
+    with get_connection(readonly=True) as conn:
+        stored = conn.execute(
+            "SELECT url FROM snapshot_entries WHERE snapshot_id = 'day-2'"
+        ).fetchall()
+    assert [row[0] for row in stored] == ["https://example.com/kev"]
+
+    def body(url, snapshot_id):
+        return bytes(get_cached_content(url, snapshot_id=snapshot_id)["raw"])
+
+    assert body("https://example.com/kev", "day-1") == b"kev-v1"
+    assert body("https://example.com/kev", "day-2") == b"kev-v2"
+    assert body("https://example.com/nvd", "day-2") == b"nvd-v1"
+
+    assert compact_snapshot("day-2") == 1
+    with get_connection() as conn:
+        conn.execute("DELETE FROM snapshot_entries WHERE snapshot_id = 'day-1'")
+    assert body("https://example.com/nvd", "day-2") == b"nvd-v1"
+
+
+def test_gc_enforces_budget_and_keeps_pinned_snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    monkeypatch.setattr("src.assessor.cache.snapshot._SNAPSHOT_META", tmp_path / "snapshot.json")
+    from src.assessor.cache.db import get_connection, record_fact
+    from src.assessor.cache.gc import collect_garbage
+    from src.assessor.cache.snapshot import create_snapshot, pin_snapshot
+
+    create_snapshot("audit", {})
+    pin_snapshot("audit")
+    kept = upsert_content("https://example.com/kept", b"k" * 4000, snapshot_id="audit")
+    for i in range(5):
+        content_id = upsert_content(f"https://example.com/{i}", os.urandom(4000))
+        record_fact(content_id, "claim", "parser", "vendor", {})
+    upsert_content("https://example.com/0", b"refetched")  # orphans the old blob
+    with get_connection() as conn:
+        conn.execute("INSERT INTO facts (content_id, claim, parser_id, source_type, payload)"
+                     " VALUES (9999, 'gone', 'p', 's', '{}')")
+
+    report = collect_garbage(max_bytes=5000, source_ttls={}, default_ttl=None)
+
+    assert report["facts_removed"] >= 1
+    assert report["blobs_removed"] >= 5
+    assert report["duration_seconds"] >= 0
+    assert get_cached_content("https://example.com/kept")["id"] == kept
+    assert get_cached_content("https://example.com/3") is None
+    with get_connection(readonly=True) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM facts WHERE content_id = 9999").fetchone()[0] == 0
+
+
+
+def test_gc_reclaims_blobs_of_unpinned_snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    monkeypatch.setattr("src.assessor.cache.snapshot._SNAPSHOT_META", tmp_path / "snapshot.json")
+    from src.assessor.cache.db import get_connection
+    from src.assessor.cache.gc import collect_garbage
+    from src.assessor.cache.snapshot import create_snapshot
+
+    for i in range(20):
+        upsert_content(f"https://example.com/old/{i}", os.urandom(10000))
+    create_snapshot("scratch", {})
+    with get_connection() as conn:
+        conn.execute("UPDATE content SET retrieved_at = datetime('now', '-1 day')")
+        conn.execute("UPDATE snapshot_entries SET retrieved_at = datetime('now', '-1 day')")
+    for i in range(20):
+        upsert_content(f"https://example.com/new/{i}", os.urandom(10000))
+
+    report = collect_garbage(max_bytes=200000, source_ttls={}, default_ttl=None)
+
+    assert not report["over_budget"]
+    assert report["pinned_bytes"] == 0
+    assert report["blob_bytes"] <= 200000
+    assert report["bytes_reclaimed"] > 0
+    # The old pages, and the unpinned snapshot's entries for them, went first.
+    assert get_cached_content("https://example.com/new/19") is not None
+    assert get_cached_content("https://example.com/old/0") is None
+    assert report["entries_removed"] >= 19
+
+
+def test_gc_keeps_evicting_past_batches_that_free_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    monkeypatch.setattr("src.assessor.cache.gc._EVICTION_BATCH", 2)
+    from src.assessor.cache.db import get_connection
+    from src.assessor.cache.gc import collect_garbage
+
+    shared = os.urandom(10000)
+    for name in ("a", "b", "c"):
+        upsert_content(f"https://example.com/{name}", shared)
+    with get_connection() as conn:
+        conn.execute("UPDATE content SET retrieved_at = datetime('now', '-2 days')")
+        conn.execute("UPDATE content SET retrieved_at = datetime('now', '-1 day') WHERE url LIKE '%/c'")
+    for i in range(3):
+        upsert_content(f"https://example.com/new/{i}", os.urandom(10000))
+
+    # The first batch (a, b) frees nothing while c still holds their blob.
+    report = collect_garbage(max_bytes=30000, source_ttls={}, default_ttl=None)
+
+    assert not report["over_budget"]
+    assert get_cached_content("https://example.com/c") is None
+    assert get_cached_content("https://example.com/new/0") is not None
+
+
+def test_assessment_history_keyset_pagination(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache.db import get_assessment, get_assessment_history, record_assessment
+
+    for i in range(5):
+        record_assessment("Slack", {"n": i}, vendor="Salesforce", score=50 + i * 10)
+    record_assessment("Zoom", {"n": "zoom"}, vendor="Zoom", score=90, source="web")
+
+    first, cursor = get_assessment_history(limit=2, product="slack", include_data=True)
+    assert [item["data"]["n"] for item in first] == [4, 3]
+    second, cursor = get_assessment_history(limit=2, before=cursor, product="slack", include_data=True)
+    assert [item["data"]["n"] for item in second] == [2, 1]
+    last, cursor = get_assessment_history(limit=2, before=cursor, product="slack", include_data=True)
+    assert [item["data"]["n"] for item in last] == [0]
+    assert cursor is None
+
+    ranged, _ = get_assessment_history(limit=10, min_score=65, max_score=85)
+    assert [item["score"] for item in ranged] == [80, 70]
+    assert "data" not in ranged[0]
+    assert get_assessment_history(vendor="ZOOM")[0][0]["product"] == "Zoom"
+
+    web, _ = get_assessment_history(source="web")
+    assert [(item["product"], item["source"]) for item in web] == [("Zoom", "web")]
+    assert get_assessment(web[0]["id"])["data"] == {"n": "zoom"}
+    assert get_assessment(10_000) is None
+
+
+def test_async_cache_runs_off_the_event_loop(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache import aio
+
+    threads = []
+
+    def decode(raw):
+        threads.append(threading.current_thread().name)
+        return bytes(raw)
+
+    async def main():
+        loop_thread = threading.current_thread().name
+        await aio.upsert_content("https://example.com/a", b"body")
+        ticks = []
+
+        async def ticker():
+            for _ in range(3):
+                ticks.append(1)
+                await asyncio.sleep(0)
+
+        payload, _ = await asyncio.gather(
+            aio.get_cached_payload("https://example.com/a", decode), ticker()
+        )
+        return loop_thread, payload, ticks
+
+    loop_thread, payload, ticks = asyncio.run(main())
+    assert payload == b"body"
+    assert len(ticks) == 3
+    assert threads and threads[0] != loop_thread
+    assert threads[0].startswith("cache-read")
+
+
+def test_facts_for_filters_on_indexed_payload_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    from src.assessor.cache.db import facts_for, get_connection, record_facts
+
+    content_id = upsert_content("https://nvd.example/slack", b"evidence")
+    record_facts(
+        [
+            {"content_id": content_id, "claim": "cve", "parser_id": "nvd", "source_type": "nvd",
+             "payload": {"id": "CVE-2024-1234", "severity": "high"}, "product": "Slack"},
+            {"content_id": content_id, "claim": "cve", "parser_id": "nvd", "source_type": "nvd",
+             "payload": {"id": "CVE-2024-5678", "severity": "LOW"}, "product": "Slack"},
+            {"content_id": content_id, "claim": "control", "parser_id": "controls",
+             "source_type": "vendor", "payload": {"control": "mfa"}, "product": "Zoom"},
+        ]
+    )
+
+    high = facts_for("slack", claim="cve", severity="HIGH")
+    assert [fact["payload"]["id"] for fact in high] == ["CVE-2024-1234"]
+    assert high[0]["url"] == "https://nvd.example/slack"
+    assert facts_for(cve_id="CVE-2024-5678")[0]["product"] == "Slack"
+    assert [fact["product"] for fact in facts_for(control="mfa")] == ["Zoom"]
+
+    with get_connection(readonly=True) as conn:
+        plan = " ".join(
+            row["detail"]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM facts WHERE product = ? AND claim = ?",
+                ("Slack", "cve"),
+            )
+        )
+    assert "idx_facts_product_claim" in plan
+
+
+def test_reader_connections_close_when_their_thread_exits(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", tmp_path / "cache.sqlite3")
+    import threading
+
+    from src.assessor.cache.db import get_manager
+
+    upsert_content("https://example.com/a", b"a")
+    for _ in range(20):
+        thread = threading.Thread(target=get_cached_content, args=("https://example.com/a",))
+        thread.start()
+        thread.join()
+    assert len(get_manager()._readers) <= 1
@@ -1,4 +1,5 @@
 import asyncio
+import importlib
 import sys
 from pathlib import Path
 
@@ -8,11 +9,13 @@ FIXTURES = Path(__file__).resolve().parent / "fixtures" / "api"
 
 def _patch_db(monkeypatch, tmp_path):
     db_path = tmp_path / "cache.sqlite3"
-    monkeypatch.setattr("src.assessor.cache.db._DB_PATH", db_path)
     # Force module reload so imports pick up the patched path
     for mod in list(sys.modules.keys()):
         if mod.startswith("src.assessor.cache") or mod.startswith("src.assessor.fetchers"):
             sys.modules.pop(mod, None)
+    # Fetchers import the cache as ``assessor.cache.db``; patch both copies
+    for name in ("src.assessor.cache.db", "assessor.cache.db"):
+        monkeypatch.setattr(importlib.import_module(name), "_DB_PATH", db_path)
     return db_path
 
 
@@ -64,4 +67,603 @@ def test_cisa_snapshot_hits_cache(monkeypatch, tmp_path):
 
     monkeypatch.setattr(cisa_kev, "_http_get", mock_http_get)
     results = asyncio.run(cisa_kev.fetch_cisa_kev(offline=False, snapshot_id="snap-2"))
-    assert len(results) > 0
\ No newline at end of file
+    assert len(results) > 0
+
+def test_cisa_conditional_request_304_bumps_retrieved_at(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    import httpx
+    from assessor.cache import db as cache_db
+    from src.assessor.fetchers import cisa_kev
+
+    raw = (FIXTURES / "cisa_kev_sample.json").read_bytes()
+    cache_db.upsert_content(cisa_kev._API_URL, raw, headers={"ETag": '"v1"'})
+    with cache_db.get_connection() as conn:
+        conn.execute("UPDATE content SET retrieved_at = datetime('now', '-3 days')")
+
+    seen = {}
+
+    async def mock_http_get(url, headers=None):
+        seen.update(headers or {})
+        return httpx.Response(304, headers={"ETag": '"v1"'}, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(cisa_kev, "_http_get", mock_http_get)
+    results = asyncio.run(cisa_kev.fetch_cisa_kev())
+
+    assert seen == {"If-None-Match": '"v1"'}
+    assert any(entry["id"] == "CVE-2021-34527" for entry in results)
+    cached = cache_db.get_cached_content(cisa_kev._API_URL)
+    assert cache_db.age_seconds(cached["retrieved_at"]) < 60
+
+
+def test_cisa_serves_stale_while_revalidating(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    from assessor.cache import db as cache_db
+    from assessor.utils.background import background
+    from src.assessor.fetchers import cisa_kev
+
+    raw = (FIXTURES / "cisa_kev_sample.json").read_bytes()
+    cache_db.upsert_content(
+        cisa_kev._API_URL, raw, headers={"Cache-Control": "max-age=60, stale-while-revalidate=600"}
+    )
+    with cache_db.get_connection() as conn:
+        conn.execute("UPDATE content SET retrieved_at = datetime('now', '-120 seconds')")
+
+    submitted = []
+    monkeypatch.setattr(background, "submit", lambda key, factory: submitted.append(key))
+
+    async def mock_http_get(*args, **kwargs):
+        raise AssertionError("stale copy should be served without waiting on the network")
+
+    monkeypatch.setattr(cisa_kev, "_http_get", mock_http_get)
+    results = asyncio.run(cisa_kev.fetch_cisa_kev())
+
+    assert len(results) > 0
+    assert submitted == [("revalidate", cisa_kev._API_URL)]
+
+
+def test_http_clients_are_pooled_per_loop_and_host():
+    from assessor.utils import http
+
+    async def main():
+        first = http.get_async_client("https://services.nvd.nist.gov/rest/json/cves/2.0")
+        again = http.get_async_client("https://SERVICES.nvd.nist.gov/other?x=1")
+        other = http.get_async_client("https://www.cisa.gov/feed.json")
+        return first, again, other
+
+    first, again, other = http.run_sync(main())
+    assert first is again
+    assert first is not other
+    # run_sync keeps its loop, so the next call reuses the same open clients.
+    assert not first.is_closed
+    assert http.run_sync(main())[0] is first
+    http.close_clients()
+    assert first.is_closed and other.is_closed
+    assert http.run_sync(main())[0] is not first
+    assert http.get_client("https://api.github.com/a") is http.get_client("https://api.github.com/b")
+
+
+def test_nvd_streams_pages_and_resumes_from_cache(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    import httpx
+    from src.assessor.fetchers import nvd
+
+    total = 5
+    requested = []
+    failing = {"4"}
+
+    async def mock_http_get(url, params, headers=None):
+        start = int(params.get("startIndex", 0))
+        requested.append(start)
+        if params.get("startIndex") in failing:
+            raise httpx.ConnectError("boom")
+        cves = [
+            {"cve": {"id": f"CVE-2024-{i:04d}", "descriptions": [], "metrics": {}}}
+            for i in range(start, min(start + 2, total))
+        ]
+        body = {"totalResults": total, "startIndex": start, "vulnerabilities": cves}
+        return httpx.Response(200, json=body, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(nvd, "_http_get", mock_http_get)
+
+    async def collect():
+        return [cve["id"] async for cve in nvd.iter_cves("PeaZip", results_per_page=2)]
+
+    try:
+        asyncio.run(collect())
+    except httpx.ConnectError:
+        pass
+    failing.clear()
+    requested.clear()
+
+    ids = asyncio.run(collect())
+    assert ids == [f"CVE-2024-{i:04d}" for i in range(total)]
+    assert requested == [4]
+
+
+def test_nvd_mirror_sync_and_local_search(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    from datetime import datetime, timedelta, timezone
+
+    import httpx
+    from src.assessor.fetchers import nvd
+
+    def record(cve_id, description, cpe=None):
+        cve = {"id": cve_id, "published": f"2024-01-{cve_id[-2:]}T00:00:00.000",
+               "descriptions": [{"lang": "en", "value": description}], "metrics": {}}
+        if cpe:
+            cve["configurations"] = [
+                {"nodes": [{"cpeMatch": [{"vulnerable": True, "criteria": cpe}]}]}
+            ]
+        return {"cve": cve}
+
+    records = [
+        record("CVE-2024-0001", "Path traversal in archive extraction",
+               "cpe:2.3:a:giorgiotani:peazip:*:*:*:*:*:*:*:*"),
+        record("CVE-2024-0002", "PeaZip before 9.0 mishandles symlinks"),
+        record("CVE-2024-0003", "Unrelated web server bug",
+               "cpe:2.3:a:apache:http_server:2.4:*:*:*:*:*:*:*"),
+    ]
+    calls = []
+
+    async def mock_http_get(url, params, headers=None):
+        calls.append(dict(params))
+        start, size = int(params["startIndex"]), int(params["resultsPerPage"])
+        body = {"totalResults": len(records), "vulnerabilities": records[start:start + size]}
+        return httpx.Response(200, json=body, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(nvd, "_http_get", mock_http_get)
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    report = asyncio.run(nvd.sync_mirror(results_per_page=2, now=now))
+    assert report["full"] and report["cves"] == 3
+    assert [c["startIndex"] for c in calls] == ["0", "2"]
+
+    async def no_network(*args, **kwargs):
+        raise AssertionError("mirror lookups must not touch the network")
+
+    monkeypatch.setattr(nvd, "_http_get", no_network)
+    found = asyncio.run(nvd.fetch_cves("PeaZip", offline=True))
+    assert [cve["id"] for cve in found] == ["CVE-2024-0002", "CVE-2024-0001"]
+    assert [cve["id"] for cve in asyncio.run(nvd.fetch_cves("HTTP Server"))] == ["CVE-2024-0003"]
+
+    # A mirror past NVD_MIRROR_MAX_AGE is bypassed for the live API ...
+    from assessor.cache import db as cache_db
+    from assessor.fetchers.revalidate import collect_stale
+
+    with cache_db.get_connection() as conn:
+        conn.execute("UPDATE nvd_sync_state SET synced_at = datetime('now', '-30 days')")
+    live = []
+
+    async def live_http_get(url, params, headers=None):
+        live.append(params["keywordSearch"])
+        body = {"totalResults": 1, "vulnerabilities": [record("CVE-2024-0009", "PeaZip RCE")]}
+        return httpx.Response(200, json=body, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(nvd, "_http_get", live_http_get)
+    assert [cve["id"] for cve in asyncio.run(nvd.fetch_cves("PeaZip"))] == ["CVE-2024-0009"]
+    assert live == ["PeaZip"]
+    assert [cve["id"] for cve in asyncio.run(nvd.fetch_cves("PeaZip", offline=True))] == [
+        "CVE-2024-0002", "CVE-2024-0001"
+    ]
+
+    # ... and stands in, reported as stale, while the upstream is down.
+    async def unreachable(url, params, headers=None):
+        raise httpx.ConnectError("down", request=httpx.Request("GET", url))
+
+    async def fetch_while_down():
+        with collect_stale() as served:
+            return await nvd.fetch_cves("HTTP Server"), served
+
+    monkeypatch.setattr(nvd, "_http_get", unreachable)
+    found, served = asyncio.run(fetch_while_down())
+    assert [cve["id"] for cve in found] == ["CVE-2024-0003"]
+    assert [item["url"] for item in served] == [nvd._API_URL]
+
+    calls.clear()
+    monkeypatch.setattr(nvd, "_http_get", mock_http_get)
+    records[:] = []
+    report = asyncio.run(nvd.sync_mirror(now=now + timedelta(days=200)))
+    assert report["windows"] == 2
+    assert calls[0]["lastModStartDate"].startswith("2025-01-01T00:00:00.000")
+    assert calls[1]["lastModEndDate"].startswith("2025-07-20T00:00:00.000")
+
+
+def test_kev_index_annotates_cves_in_one_pass():
+    from assessor.fetchers.cisa_kev import KevIndex
+
+    payload = {
+        "catalogVersion": "2024.10.01",
+        "vulnerabilities": [
+            {"cveID": "CVE-2023-4966", "dateAdded": "2023-10-18", "dueDate": "2023-11-08",
+             "knownRansomwareCampaignUse": "Known"},
+            {"cveID": "CVE-2021-34527", "dateAdded": "2021-11-03", "dueDate": "2021-07-20",
+             "knownRansomwareCampaignUse": "Unknown"},
+        ],
+    }
+    index = KevIndex.from_payload(payload)
+    assert KevIndex.from_payload(dict(payload)) is index
+    assert "CVE-2023-4966" in index and len(index) == 2
+
+    cves = [{"id": "CVE-2023-4966", "severity": "CRITICAL"}, {"id": "CVE-2020-0001"}]
+    annotated = index.annotate(cves)
+    assert annotated[0]["in_kev"] is True
+    assert annotated[0]["kev_date_added"] == "2023-10-18"
+    assert annotated[0]["kev_ransomware"] is True
+    assert annotated[1] == {"id": "CVE-2020-0001", "in_kev": False}
+    assert "in_kev" not in cves[0]
+    assert [entry["id"] for entry in index.entries_for(c["id"] for c in cves)] == ["CVE-2023-4966"]
+    assert index.entries_for(["CVE-2020-0001"]) == []
+    assert [entry["id"] for entry in index.entries] == ["CVE-2023-4966", "CVE-2021-34527"]
+    assert index.entries_for(["CVE-2021-34527"]) == [index.entries[1]]
+
+
+def test_token_bucket_reserves_and_honours_blocks(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+    from assessor.cache import throttle
+
+    waits = [throttle.reserve("nvd", capacity=2, rate=1.0, now=100.0) for _ in range(3)]
+    assert waits == [0.0, 0.0, 1.0]
+    # Refilled by t=103, but the server asked us to wait until t=110.
+    throttle.block("nvd", until=110.0, now=103.0)
+    assert throttle.reserve("nvd", capacity=2, rate=1.0, now=103.0) == 7.0
+    assert throttle.reserve("nvd", capacity=2, rate=1.0, now=103.0) == 8.0
+
+
+def test_get_with_retries_honours_retry_after(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    import httpx
+    from assessor.cache.db import get_connection
+    from assessor.config.settings import Config
+    from assessor.utils import http
+
+    monkeypatch.setattr(Config, "RETRY_BACKOFF_BASE", 0.001)
+    statuses = [429, 503, 200]
+
+    def handler(request):
+        status = statuses.pop(0)
+        return httpx.Response(status, headers={"Retry-After": "0"}, json={"ok": status == 200})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http, "get_async_client", lambda url: client)
+
+    response = asyncio.run(http.get_with_retries("https://api.example.com/feed", max_retries=3))
+    assert response.json() == {"ok": True}
+    with get_connection(readonly=True) as conn:
+        assert conn.execute(
+            "SELECT blocked_until FROM rate_limits WHERE host = 'api.example.com'"
+        ).fetchone()[0] > 0
+
+
+def test_vendor_posture_probes_concurrently_and_replays_offline(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    import httpx
+    from src.assessor.fetchers import vendor_psirt
+
+    pages = {
+        "/": "<html><body>Welcome. Read our transparency report.</body></html>",
+        "/psirt": "Our bug bounty pays well.",
+        "/bug-bounty": "Report a vulnerability to our PSIRT.",
+        "/.well-known/security.txt": "Contact: mailto:security@example.com\nPolicy: bug bounty",
+    }
+    requested = []
+
+    async def handler(request):
+        requested.append(request.url.path)
+        if request.url.path == "/trust":
+            await asyncio.sleep(30)
+        body = pages.get(request.url.path)
+        if body is None:
+            return httpx.Response(404)
+        return httpx.Response(200, text=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(vendor_psirt, "get_async_client", lambda url: client)
+
+    # /trust never answers in time and counts as failed, so /psirt is the
+    # first security page that answers and the only one scored.
+    online = asyncio.run(
+        vendor_psirt.fetch_vendor_posture("https://example.com", "Example", deadline=1.0)
+    )
+    assert online == {
+        "psirt_page": False,
+        "bug_bounty": True,
+        "security_advisories": False,
+        "transparency_report": True,
+    }
+    assert "/trust" in requested
+
+    monkeypatch.setattr(vendor_psirt, "get_async_client", None)
+    offline = asyncio.run(
+        vendor_psirt.fetch_vendor_posture("https://example.com", "Example", offline=True)
+    )
+    assert offline == online
+
+    # Without a homepage nothing is scored, whatever the security pages say.
+    del pages["/"]
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(vendor_psirt, "get_async_client", lambda url: client)
+    missing = asyncio.run(
+        vendor_psirt.fetch_vendor_posture("https://gone.example", "Example", deadline=1.0)
+    )
+    assert missing == dict.fromkeys(missing, False)
+
+    # The homepage is scanned as it streams in; reading stops once every keyword matched.
+    sent = []
+
+    async def homepage_chunks():
+        yield b"<html><head><title>Example</title><p>Security advisory, bug bounty "
+        yield b"and transparency report</p>"
+        for i in range(100):
+            sent.append(i)
+            yield b"<p>" + b"filler " * 200 + b"</p>"
+
+    async def streaming(request):
+        if request.url.path == "/":
+            return httpx.Response(200, content=homepage_chunks())
+        return httpx.Response(404)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(streaming))
+    monkeypatch.setattr(vendor_psirt, "get_async_client", lambda url: client)
+    streamed = asyncio.run(
+        vendor_psirt.fetch_vendor_posture("https://stream.example", "Example", deadline=1.0)
+    )
+    assert streamed == dict.fromkeys(streamed, True)
+    assert len(sent) <= 1
+    # The prefix read before stopping is not cached as the homepage.
+    from assessor.cache.db import get_cached_content
+    assert get_cached_content("https://stream.example") is None
+    assert get_cached_content("https://example.com") is not None
+
+
+def test_github_advisories_follow_links_and_index_cve_aliases(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    import httpx
+    from src.assessor.fetchers import github_advisories as ghsa
+
+    def advisory(ghsa_id, cve_id, package):
+        return {
+            "ghsa_id": ghsa_id,
+            "cve_id": cve_id,
+            "identifiers": [{"type": "GHSA", "value": ghsa_id}, {"type": "CVE", "value": cve_id}],
+            "updated_at": "2024-05-01T00:00:00Z",
+            "vulnerabilities": [{"package": {"ecosystem": "pip", "name": package}}],
+        }
+
+    pages = {
+        "first": [advisory("GHSA-aaaa-aaaa-aaaa", "CVE-2024-0001", "django")],
+        "second": [advisory("GHSA-bbbb-bbbb-bbbb", "CVE-2024-0002", "django")],
+    }
+    calls = []
+
+    async def mock_http_get(url, headers=None):
+        calls.append(url)
+        if "after=" in url:
+            return httpx.Response(200, json=pages["second"], request=httpx.Request("GET", url))
+        link = f'<{ghsa._API_URL}?per_page=100&after=Y3Vyc29y>; rel="next"'
+        return httpx.Response(
+            200, json=pages["first"], headers={"Link": link}, request=httpx.Request("GET", url)
+        )
+
+    monkeypatch.setattr(ghsa, "_http_get", mock_http_get)
+    found = asyncio.run(ghsa.fetch_advisories(ecosystem="pip", affects="django"))
+    assert [item["id"] for item in found] == ["GHSA-aaaa-aaaa-aaaa", "GHSA-bbbb-bbbb-bbbb"]
+    assert "affects=django" in calls[0] and "ecosystem=pip" in calls[0]
+    assert len(calls) == 2
+    calls.clear()
+    capped = asyncio.run(ghsa.fetch_advisories(ecosystem="pip", affects="django", max_pages=1))
+    assert [item["id"] for item in capped] == ["GHSA-aaaa-aaaa-aaaa"]
+    assert len(calls) <= 1
+
+    async def no_network(*args, **kwargs):
+        raise AssertionError("cached pages must be replayed offline")
+
+    monkeypatch.setattr(ghsa, "_http_get", no_network)
+    replayed = asyncio.run(ghsa.fetch_advisories(ecosystem="pip", affects="django", offline=True))
+    assert replayed == found
+
+    cves = ghsa.annotate_cves([{"id": "CVE-2024-0002"}, {"id": "CVE-2024-9999"}])
+    assert cves[0]["ghsa_ids"] == ["GHSA-bbbb-bbbb-bbbb"]
+    assert cves[0]["packages"][0]["name"] == "django"
+    assert cves[1]["ghsa_ids"] == []
+
+
+def test_gather_sources_runs_concurrently_with_per_source_timeouts():
+    import time
+
+    from assessor.fetchers.gather import gather_sources
+
+    async def slow(value, delay):
+        await asyncio.sleep(delay)
+        return value
+
+    async def broken():
+        raise RuntimeError("upstream 500")
+
+    sources = {
+        "nvd_cves": lambda: slow(["CVE-2024-0001"], 0.2),
+        "cisa_kev": lambda: slow("kev", 0.2),
+        "vendor_posture": lambda: slow({}, 5),
+        "github": broken,
+    }
+    started = time.monotonic()
+    results = asyncio.run(gather_sources(sources, timeouts={"vendor_posture": 0.3}))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6
+    assert results["nvd_cves"].value == ["CVE-2024-0001"] and results["cisa_kev"].ok
+    assert results["vendor_posture"].error == "timed out after 0.3s"
+    assert results["github"].to_dict()["error"] == "upstream 500"
+
+
+def test_circuit_breaker_fails_fast_and_serves_stale_cache(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    import httpx
+    import pytest
+    from assessor.cache import db as cache_db
+    from assessor.fetchers import cisa_kev
+    from assessor.fetchers.gather import gather_sources
+    from assessor.utils.breaker import CircuitBreaker, CircuitOpenError
+
+    now = [0.0]
+    breaker = CircuitBreaker("nvd", failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+    breaker.before()
+    breaker.record_failure()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    now[0] = 10.0
+    breaker.before()  # the half-open probe
+    assert breaker.snapshot()["state"] == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    breaker.record_success()
+    assert breaker.snapshot() == {"name": "nvd", "state": "closed", "failures": 0, "retry_in": None}
+
+    # An unreachable upstream falls back to the last cached copy, however old.
+    cache_db.upsert_content(cisa_kev._API_URL, (FIXTURES / "cisa_kev_sample.json").read_bytes())
+    with cache_db.get_connection() as conn:
+        conn.execute("UPDATE content SET retrieved_at = datetime('now', '-30 days')")
+
+    async def down(*args, **kwargs):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(cisa_kev, "_http_get", down)
+    results = asyncio.run(gather_sources({"cisa_kev": lambda: cisa_kev.fetch_kev_index()}))
+    status = results["cisa_kev"].to_dict()
+    assert status["ok"] and status["stale"]
+    assert status["stale_evidence"][0]["url"] == cisa_kev._API_URL
+    assert len(results["cisa_kev"].value) > 0
+
+    # A client error is an answer, not an outage: it is not covered up.
+    async def gone(*args, **kwargs):
+        request = httpx.Request("GET", cisa_kev._API_URL)
+        raise httpx.HTTPStatusError(
+            "404 Not Found", request=request, response=httpx.Response(404, request=request)
+        )
+
+    monkeypatch.setattr(cisa_kev, "_http_get", gone)
+    results = asyncio.run(gather_sources({"cisa_kev": lambda: cisa_kev.fetch_kev_index()}))
+    status = results["cisa_kev"].to_dict()
+    assert not status["ok"] and not status["stale"]
+    assert "404" in status["error"]
+
+
+def test_concurrent_fetches_share_one_request_and_honour_foreign_leases(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    import httpx
+    from assessor.cache import aio
+    from assessor.cache import db as cache_db
+    from assessor.cache import leases
+    from assessor.config.settings import Config
+    from assessor.fetchers import cisa_kev
+    from assessor.fetchers.revalidate import fetch_revalidated
+
+    body = (FIXTURES / "cisa_kev_sample.json").read_bytes()
+    calls = []
+
+    async def slow_get(headers):
+        calls.append(headers)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, content=body, request=httpx.Request("GET", cisa_kev._API_URL))
+
+    async def burst():
+        return await asyncio.gather(
+            *(fetch_revalidated(cisa_kev._API_URL, len, slow_get) for _ in range(5))
+        )
+
+    assert asyncio.run(burst()) == [len(body)] * 5
+    assert len(calls) == 1
+
+    # Callers with different decoders each get their own decoding.
+    monkeypatch.setattr(Config, "FETCH_LEASE_POLL", 0.01)
+    with cache_db.get_connection() as conn:
+        conn.execute("UPDATE content SET retrieved_at = datetime('now', '-30 days')")
+
+    async def mixed():
+        return await asyncio.gather(
+            fetch_revalidated(cisa_kev._API_URL, len, slow_get),
+            fetch_revalidated(cisa_kev._API_URL, bytes, slow_get),
+        )
+
+    assert asyncio.run(mixed()) == [len(body), body]
+
+    # Another process holds the lease: wait for it and use what it stored.
+    with cache_db.get_connection() as conn:
+        conn.execute("UPDATE content SET retrieved_at = datetime('now', '-30 days')")
+    url = "https://Example.com:443/feed?b=2&a=1#top"
+    key = "https://example.com/feed?a=1&b=2#"
+    assert leases.acquire(key, "other-worker", ttl=60.0)
+
+    async def other_worker_lands():
+        await asyncio.sleep(0.05)
+        await aio.upsert_content(url, b"fetched elsewhere")
+        await aio.release_lease(key, "other-worker")
+
+    async def waiter():
+        landed = asyncio.ensure_future(other_worker_lands())
+        payload = await fetch_revalidated(url, bytes, slow_get)
+        await landed
+        return payload
+
+    calls.clear()
+    assert asyncio.run(waiter()) == b"fetched elsewhere"
+    assert calls == []
+    assert leases.holder(key) is None
+
+
+def test_cassettes_record_and_replay_through_shared_clients_and_stand_in(monkeypatch, tmp_path):
+    _patch_db(monkeypatch, tmp_path)
+
+    import httpx
+    from assessor.config.settings import Config
+    from assessor.fetchers import cisa_kev
+    from assessor.utils import http
+    from assessor.utils.cassette import Cassette, RecordingTransport, StandInTransport
+    from assessor.utils.standin import StandInServer, UpstreamProfile
+
+    body = (FIXTURES / "cisa_kev_sample.json").read_bytes()
+
+    def upstream(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, headers={"ETag": '"v1"', "Set-Cookie": "s=1"}, content=body)
+
+    path = tmp_path / "upstream.json"
+    cassette = Cassette(path)
+    recorder = RecordingTransport(cassette, httpx.MockTransport(upstream))
+    with httpx.Client(transport=recorder) as client:
+        assert client.get(cisa_kev._API_URL).content == body
+        assert client.get(cisa_kev._API_URL, headers={"If-None-Match": '"v1"'}).status_code == 304
+    recorded = Cassette.load(path)
+    assert len(recorded) == 1
+
+    # Replayed through the shared client registry, conditional requests included.
+    monkeypatch.setattr(Config, "HTTP_CASSETTE", str(path))
+    http.close_clients()
+    assert http.get_client(cisa_kev._API_URL).get(cisa_kev._API_URL).content == body
+    index = asyncio.run(cisa_kev.fetch_kev_index())
+    assert len(index) > 0
+    replayed = http.get_client(cisa_kev._API_URL).get(
+        cisa_kev._API_URL, headers={"If-None-Match": '"v1"'}
+    )
+    assert replayed.status_code == 304
+    http.close_clients()
+
+    # The stand-in server replays it over HTTP and throttles per upstream host.
+    profile = UpstreamProfile(rate_limit=(2, 60.0))
+    with StandInServer(recorded, profile) as server:
+        transport = StandInTransport(server.url, httpx.HTTPTransport())
+        with httpx.Client(transport=transport) as client:
+            statuses = [client.get(cisa_kev._API_URL).status_code for _ in range(3)]
+            missing = client.get("https://example.com/nothing-recorded")
+    assert statuses == [200, 200, 429]
+    assert missing.status_code == 404
+    assert server.statuses == {200: 2, 429: 1, 404: 1}